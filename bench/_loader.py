@@ -0,0 +1,29 @@
+"""Laad losse ClimaCore modules zonder het Home Assistant-afhankelijke `__init__.py`.
+
+De API client heeft alleen `aiohttp` en `requests` nodig. Door het package als
+lege module te registreren kunnen we `climacore.api` importeren zonder dat
+Home Assistant geïnstalleerd hoeft te zijn. Benchmarks die de coordinator zelf
+aansturen gebruiken `load_integration()` en hebben wél Home Assistant nodig.
+"""
+import importlib
+import os
+import sys
+import types
+
+PACKAGE_DIR = os.path.join(os.path.dirname(__file__), "..", "custom_components", "climacore")
+
+
+def load(module_name: str):
+    if "climacore" not in sys.modules:
+        package = types.ModuleType("climacore")
+        package.__path__ = [os.path.abspath(PACKAGE_DIR)]
+        sys.modules["climacore"] = package
+    return importlib.import_module(f"climacore.{module_name}")
+
+
+def load_integration():
+    """Importeer het volledige `custom_components.climacore` package (vereist Home Assistant)."""
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    return importlib.import_module("custom_components.climacore")
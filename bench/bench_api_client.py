@@ -0,0 +1,101 @@
+"""Benchmark: latency van de synchrone vs. de async Gateway client.
+
+Gebruik:
+    python bench/bench_api_client.py [--requests 200] [--latency 0.0]
+
+Start een lokale mock Gateway en meet per client de round-trip tijd van
+`async_trigger_main_logic`. De synchrone client betaalt per aanroep een
+executor-hop en een nieuwe TCP-verbinding; de async client hergebruikt de
+keep-alive verbinding van één gedeelde sessie. De async client wordt gemeten
+met protocol v1 (volledige JSON) en v2 (config hash + gzip); per variant
+wordt ook het aantal verstuurde bytes per aanroep gerapporteerd.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from _loader import load
+from mock_gateway import MockGateway
+
+api = load("api")
+
+GROUPS = ["woonkamer", "badkamer", "keuken", "slaapkamer_1", "slaapkamer_2", "slaapkamer_3"]
+SCENARIOS = ["afwezig", "voorverwarming", "dag_fris", "dag_koud", "dag_mild_warm", "nacht_fris", "nacht_koud", "nacht_mild_warm"]
+
+# Een realistische payload: zes zones met elk een eigen setpoint-groep
+PAYLOAD = {
+    "config": {
+        **{f"temp_{group}_{scenario}": 18.0 + n * 0.5 for group in GROUPS for n, scenario in enumerate(SCENARIOS)},
+        "fallback_temp": 18.0,
+    },
+    "context": {"current_time": "12:00:00", "trigger_entity_id": "person.a", "trigger_entity_ids": ["person.a"]},
+    "sensors": {"outdoor_temp": 8.0, "outdoor_humidity": 80.0, "gasten_aanwezig": "off",
+                "onderweg_naar_huis": "off", "systeem_keuze": "Ambisense/MyPyllant"},
+    "persons": {"person.a": "home", "person.b": "not_home"},
+    "climate_zones": {
+        f"Zone {group}": {
+            "climate_entity": f"climate.{group}",
+            "lookup_prefix": group,
+            "window_sensors": ["off"],
+            "_all_climate_entities": [f"climate.{group}", f"climate.{group}_2"],
+            "schedule": {"start": "06:30:00", "end": "22:00:00"},
+        }
+        for group in GROUPS
+    },
+}
+
+
+class _ExecutorHass:
+    """Net genoeg `hass` om de synchrone client via een executor te draaien."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=4)
+
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+
+async def _measure(client, count: int) -> list[float]:
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.async_trigger_main_logic(PAYLOAD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(name: str, timings: list[float], gateway: MockGateway) -> None:
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    bytes_per_call = gateway.bytes_received / max(1, len(gateway.requests))
+    print(f"{name:<9} n={len(timings):<5} p50={statistics.median(timings):7.2f} ms  "
+          f"p99={p99:7.2f} ms  mean={statistics.fmean(timings):7.2f} ms  bytes/call={bytes_per_call:7.0f}")
+    gateway.requests.clear()
+    gateway.bytes_received = 0
+
+
+async def main(count: int, latency: float) -> None:
+    gateway = MockGateway(latency=latency)
+    url = await gateway.start()
+    try:
+        sync_client = api.ClimaCoreSyncApiClient(_ExecutorHass(), "bench", gateway_url=url)
+        _report("sync", await _measure(sync_client, count), gateway)
+
+        async with aiohttp.ClientSession() as session:
+            for protocol in (1, 2):
+                async_client = api.ClimaCoreApiClient(session, "bench", gateway_url=url, protocol=protocol)
+                _report(f"async v{protocol}", await _measure(async_client, count), gateway)
+    finally:
+        await gateway.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Gesimuleerde Gateway latency (s)")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency))
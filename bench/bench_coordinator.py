@@ -0,0 +1,450 @@
+"""Benchmark: gedrag van de ClimaCoreCoordinator onder een stroom statuswijzigingen.
+
+Gebruik:
+    python bench/bench_coordinator.py [--scenario all] [--zones 6] [--seconds 20]
+                                      [--latency 0.05] [--homes 1] [--shared-wifi] [--replay stream.json]
+                                      [--json results.json] [--check bench/baseline.json]
+
+Draait een kale Home Assistant core (zonder integraties) met gestubde climate
+services en een lokale mock Gateway die beslist met de lokale noodloop. Een
+scenario beschrijft één uur aan statuswijzigingen; dat uur wordt in `--seconds`
+afgespeeld en de debounce-tijden en heartbeat schalen mee.
+
+Per scenario:
+- Gateway-calls en service-calls per (afgespeeld) uur
+- p50/p99 van de laatste statuswijziging tot de afgeronde run (inclusief geschaalde debounce)
+- hoeveel wijzigingen in een latere run opgingen (coalesced) of nooit een run haalden
+  (dropped, bv. een klapperend raam of een aanwezigheidsbron die binnen de hysterese terugviel)
+- hoe lang de event loop geblokkeerd was (max en totaal)
+
+Met `--homes N` draaien N coordinators (elk een eigen config entry en
+activatiecode) op dezelfde entiteiten en één gedeelde batcher; `round_trips/h`
+laat dan zien hoeveel HTTP round trips de Gateway-calls van alle huizen kostten.
+
+De Wi-Fi sensoren horen standaard elk bij één persoon (via het apparaat van
+diens device_tracker), zoals bij de mobiele app. Met `--shared-wifi` horen ze
+bij niemand en gelden ze voor iedereen. Dan houdt één verbonden telefoon het
+hele huis 'thuis' en zegt `presence_churn` weinig over de hysterese.
+
+Met `--check` worden de resultaten vergeleken met een eerder `--json` bestand
+(zie `bench/baseline.json`, gemaakt met `--seconds 10`). Komt een scenario boven
+de grens van `REGRESSION_LIMITS` uit (meer Gateway-calls, een hogere p99 of een
+langer geblokkeerde event loop), dan eindigt de benchmark met exit code 1. De CI
+draait zo op elke push. Na een bewuste verandering: baseline opnieuw schrijven met
+`--json bench/baseline.json`.
+
+Een opgenomen stroom (`--replay`) is een JSON-lijst van
+{"t": seconden sinds start, "entity_id": ..., "state": ..., "attributes": {...}}.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import aiohttp
+
+from _loader import load_integration
+from mock_gateway import MockGateway
+
+climacore = load_integration()
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+
+from custom_components.climacore import debounce, outdoor, presence  # noqa: E402
+from custom_components.climacore.api import ClimaCoreApiClient  # noqa: E402
+from custom_components.climacore.batcher import GatewayBatcher  # noqa: E402
+from custom_components.climacore.const import (  # noqa: E402
+    SETPOINT_SCENARIOS, WINDOW_BATCH_SECONDS, DEFAULT_WINDOW_DEBOUNCE, PRESENCE_SOURCES, WEATHER_EMA_TAU_SECONDS,
+)
+from custom_components.climacore.fallback import decide_locally  # noqa: E402
+
+HOUR = 3600
+HEARTBEAT = 600
+PERSONS = ["person.anna", "person.bram", "person.chris", "person.dewi"]
+WIFI_SENSORS = ["sensor.anna_wifi", "sensor.bram_wifi"]
+WEATHER = "weather.home"
+HOME_SSID = "Thuisnetwerk"
+
+# --check: grens = baseline * (1 + relatief) + absoluut. De tellingen zijn met een vaste
+# seed (vrijwel) reproduceerbaar; tijden op een gedeelde CI-runner veel minder.
+REGRESSION_LIMITS = {
+    "gateway_per_hour": (0.10, 1),
+    "round_trips_per_hour": (0.10, 1),
+    "service_per_hour": (0.10, 2),
+    "p99_ms": (0.25, 20.0),
+    "loop_max_ms": (1.00, 20.0),
+    "loop_blocked_ms": (1.00, 50.0),
+}
+
+
+# --- Synthetische stromen (één uur, offsets in seconden) -----------------------
+
+def presence_churn(rng: random.Random, zones: int) -> list[dict]:
+    """Personen die vaak komen en gaan, met meebewegende Wi-Fi sensoren."""
+    events = []
+    for person in PERSONS:
+        t, home = rng.uniform(0, 300), True
+        while t < HOUR:
+            home = not home
+            events.append({"t": t, "entity_id": person, "state": "home" if home else "not_home"})
+            t += rng.uniform(120, 900)
+    for sensor in WIFI_SENSORS:
+        t = rng.uniform(0, 60)
+        while t < HOUR:
+            ssid = HOME_SSID if rng.random() < 0.7 else "<not connected>"
+            events.append({"t": t, "entity_id": sensor, "state": ssid})
+            t += rng.uniform(30, 240)
+    return events
+
+
+def window_flapping(rng: random.Random, zones: int) -> list[dict]:
+    """Ramen die klapperen (korte open/dicht bursts) en soms echt open blijven."""
+    events = []
+    for i in range(1, zones + 1):
+        t = rng.uniform(0, 600)
+        while t < HOUR:
+            for _ in range(rng.randint(2, 6)):
+                events.append({"t": t, "entity_id": f"binary_sensor.raam_{i}", "state": "on"})
+                t += rng.uniform(0.5, 5)
+                events.append({"t": t, "entity_id": f"binary_sensor.raam_{i}", "state": "off"})
+                t += rng.uniform(0.5, 5)
+            if rng.random() < 0.3:
+                events.append({"t": t, "entity_id": f"binary_sensor.raam_{i}", "state": "on"})
+                t += rng.uniform(120, 600)
+                events.append({"t": t, "entity_id": f"binary_sensor.raam_{i}", "state": "off"})
+            t += rng.uniform(300, 900)
+    return events
+
+
+def weather_updates(rng: random.Random, zones: int) -> list[dict]:
+    """Weerentiteit die elke ~30 s met ruis ververst (zoals de meeste weerproviders)."""
+    events, temp, hum = [], 8.0, 80.0
+    for t in range(0, HOUR, 30):
+        temp += rng.uniform(-0.3, 0.3)
+        hum = min(100.0, max(40.0, hum + rng.uniform(-2, 2)))
+        events.append({"t": t, "entity_id": WEATHER, "state": "cloudy",
+                       "attributes": {"temperature": round(temp, 1), "humidity": round(hum)}})
+    return events
+
+
+def many_zones(rng: random.Random, zones: int) -> list[dict]:
+    """Alles tegelijk, over (minimaal) tien zones."""
+    zones = max(zones, 10)
+    return presence_churn(rng, zones) + window_flapping(rng, zones) + weather_updates(rng, zones)
+
+
+SCENARIOS = {
+    "presence_churn": presence_churn,
+    "window_flapping": window_flapping,
+    "weather_updates": weather_updates,
+    "many_zones": many_zones,
+}
+
+
+# --- Opzet ---------------------------------------------------------------------
+
+def build_options(zones: int, scale: float) -> dict:
+    options = {
+        "person_entities": PERSONS,
+        "wifi_tracker_sensors": WIFI_SENSORS,
+        "home_wifi_ssid": HOME_SSID,
+        "weather_entity": WEATHER,
+        "gasten_entity": "input_boolean.gasten",
+        "onderweg_entity": "input_boolean.onderweg",
+        "systeem_keuze_direct": "Zigbee/Lokaal",
+        "fallback_temp": 18.0,
+        "zones": [],
+    }
+    for i in range(1, zones + 1):
+        prefix = "woonkamer" if i == 1 else f"zone{i}"
+        options["zones"].append({
+            "id": f"zone_{i}",
+            "zone_name": f"Zone {i}",
+            "climate_entities": [f"climate.zone_{i}"],
+            "window_sensors": [f"binary_sensor.raam_{i}"],
+            "lookup_prefix": prefix,
+            "day_start": "00:00:00",
+            "night_start": "23:59:59",
+            "window_debounce": DEFAULT_WINDOW_DEBOUNCE / scale,
+        })
+        for n, scenario in enumerate(SETPOINT_SCENARIOS):
+            options[f"temp_{prefix}_{scenario}"] = 15.0 + n * 0.5
+    return options
+
+
+def seed_states(hass: HomeAssistant, zones: int, shared_wifi: bool = False) -> None:
+    # Elke Wi-Fi sensor zit (zoals bij de mobiele app) op hetzelfde apparaat als de
+    # device_tracker van zijn persoon, zodat de aanwezigheidsfusie hem aan die persoon koppelt.
+    # Met shared_wifi hangen ze nergens aan en gelden ze voor iedereen.
+    registry = er.async_get(hass)
+    trackers: dict[str, list[str]] = {}
+    for sensor in WIFI_SENSORS if not shared_wifi else []:
+        name = sensor.split(".", 1)[1].removesuffix("_wifi")
+        registry.async_get_or_create("sensor", "bench", sensor, suggested_object_id=f"{name}_wifi", device_id=f"phone_{name}")
+        registry.async_get_or_create(
+            "device_tracker", "bench", f"{name}_phone", suggested_object_id=f"{name}_phone", device_id=f"phone_{name}"
+        )
+        trackers[f"person.{name}"] = [f"device_tracker.{name}_phone"]
+    for person in PERSONS:
+        hass.states.async_set(person, "home", {"device_trackers": trackers.get(person, [])})
+    for sensor in WIFI_SENSORS:
+        hass.states.async_set(sensor, HOME_SSID)
+    hass.states.async_set(WEATHER, "cloudy", {"temperature": 8.0, "humidity": 80})
+    hass.states.async_set("input_boolean.gasten", "off")
+    hass.states.async_set("input_boolean.onderweg", "off")
+    for i in range(1, zones + 1):
+        hass.states.async_set(f"climate.zone_{i}", "heat", {"current_temperature": 19.0, "temperature": 18.0})
+        hass.states.async_set(f"binary_sensor.raam_{i}", "off")
+
+
+def register_stub_services(hass: HomeAssistant, service_calls: list, actuator_latency: float) -> None:
+    """Climate services die alleen de status bijwerken, zoals een echte thermostaat zou doen."""
+
+    async def _set_climate(call) -> None:
+        service_calls.append(time.perf_counter())
+        if actuator_latency:
+            await asyncio.sleep(actuator_latency)
+        entity_ids = call.data["entity_id"]
+        for entity_id in [entity_ids] if isinstance(entity_ids, str) else entity_ids:
+            state = hass.states.get(entity_id)
+            attributes = dict(state.attributes) if state else {}
+            if "temperature" in call.data:
+                attributes["temperature"] = call.data["temperature"]
+            hass.states.async_set(entity_id, call.data.get("hvac_mode", state.state if state else "heat"), attributes)
+
+    async def _notify(call) -> None:
+        service_calls.append(time.perf_counter())
+
+    for service in ("set_temperature", "set_hvac_mode", "set_preset_mode", "turn_on", "turn_off"):
+        hass.services.async_register("climate", service, _set_climate)
+    hass.services.async_register("persistent_notification", "create", _notify)
+
+
+class LoopMonitor:
+    """Meet hoe lang de event loop niet aan de beurt kwam (blokkerende code)."""
+
+    INTERVAL = 0.005
+    THRESHOLD = 0.001
+
+    def __init__(self):
+        self.max_lag = 0.0
+        self.blocked = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.INTERVAL)
+            lag = time.perf_counter() - start - self.INTERVAL
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.THRESHOLD:
+                self.blocked += lag
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+# --- Afspelen ------------------------------------------------------------------
+
+async def run_scenario(name: str, events: list[dict], zones: int, seconds: float, latency: float,
+                       actuator_latency: float, homes: int = 1, shared_wifi: bool = False) -> dict:
+    scale = HOUR / seconds
+    # Het bundelvenster van de raamsensoren schaalt mee met de afgespeelde tijd
+    debounce.WINDOW_BATCH_SECONDS = WINDOW_BATCH_SECONDS / scale
+    outdoor.WEATHER_EMA_TAU_SECONDS = WEATHER_EMA_TAU_SECONDS / scale
+    presence.PRESENCE_SOURCES = {
+        kind: (confidence, arrive / scale, leave / scale) for kind, (confidence, arrive, leave) in PRESENCE_SOURCES.items()
+    }
+
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="climacore_bench_"))
+    await er.async_load(hass)
+    service_calls: list[float] = []
+    register_stub_services(hass, service_calls, actuator_latency)
+    seed_states(hass, zones, shared_wifi)
+
+    gateway = MockGateway(
+        latency=latency,
+        responder=lambda path, body: decide_locally(body.get("payload", {})) if path.endswith("main_logic") else None,
+    )
+    url = await gateway.start()
+    session = aiohttp.ClientSession()
+    batcher = GatewayBatcher(hass, session, gateway_url=url)
+    coordinators = []
+    for home in range(homes):
+        entry = SimpleNamespace(entry_id=f"bench_{name}_{home}", data={}, options=build_options(zones, scale))
+        api_client = ClimaCoreApiClient(session, f"bench{home}", gateway_url=url)
+        batcher.register(api_client)
+        coordinators.append(climacore.ClimaCoreCoordinator(hass, entry, api_client))
+
+    # Trigger -> afgeronde run: de tijdstempels per entiteit wachten tot een run ze meeneemt.
+    # We meten vanaf de láátste wijziging (de input is dan stabiel); eerdere wijzigingen
+    # van dezelfde entiteit zijn in die run opgegaan en tellen als 'coalesced'.
+    # Bij meerdere huizen telt het huis dat als eerste klaar is.
+    pending: dict[str, list[float]] = {}
+    latencies: list[float] = []
+    coalesced = 0
+
+    def _instrument(run_main_logic):
+        async def _instrumented_run(trigger_entity_ids: list[str]) -> None:
+            nonlocal coalesced
+            await run_main_logic(trigger_entity_ids)
+            done = time.perf_counter()
+            for entity_id in trigger_entity_ids:
+                if stamps := pending.pop(entity_id, None):
+                    latencies.append(done - stamps[-1])
+                    coalesced += len(stamps) - 1
+        return _instrumented_run
+
+    for home_coordinator in coordinators:
+        home_coordinator._async_run_main_logic = _instrument(home_coordinator._async_run_main_logic)
+        await home_coordinator.setup_listeners()
+    await asyncio.gather(*(home_coordinator.async_trigger_main_logic() for home_coordinator in coordinators))
+    await hass.async_block_till_done()
+    gateway_before, services_before = len(gateway.requests), len(service_calls)
+    round_trips_before = gateway.round_trips
+
+    # De heartbeat van 10 minuten loopt niet mee in versneld tempo: injecteer hem zelf
+    stream = sorted(
+        [*events, *({"t": t, "heartbeat": True} for t in range(HEARTBEAT, HOUR, HEARTBEAT))],
+        key=lambda event: event["t"],
+    )
+    monitor = LoopMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    for event in stream:
+        if (delay := start + event["t"] / scale - time.perf_counter()) > 0:
+            await asyncio.sleep(delay)
+        if event.get("heartbeat"):
+            for home_coordinator in coordinators:
+                hass.async_create_task(home_coordinator.async_trigger_main_logic())
+            continue
+        entity_id = event["entity_id"]
+        state = hass.states.get(entity_id)
+        attributes = event.get("attributes", state.attributes if state else {})
+        if state is None or state.state != event["state"] or dict(state.attributes) != attributes:
+            pending.setdefault(entity_id, []).append(time.perf_counter())
+        hass.states.async_set(entity_id, event["state"], attributes)
+
+    # Uitlopen: lopende debounce-timers en runs afmaken
+    settle = max(DEFAULT_WINDOW_DEBOUNCE + WINDOW_BATCH_SECONDS, *(leave for _c, _a, leave in PRESENCE_SOURCES.values()))
+    await asyncio.sleep(settle * 2 / scale)
+    await hass.async_block_till_done()
+    monitor.stop()
+
+    result = {
+        "scenario": name,
+        "events": len(events),
+        "homes": homes,
+        "gateway_per_hour": len(gateway.requests) - gateway_before,
+        "round_trips_per_hour": gateway.round_trips - round_trips_before,
+        "skipped_per_hour": sum(c.gateway_calls_skipped for c in coordinators),
+        "merged_triggers": sum(c.merged_trigger_count for c in coordinators),
+        "service_per_hour": len(service_calls) - services_before,
+        "guard_skipped": sum(c.stats()["guard_skipped"] for c in coordinators),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+        "coalesced_triggers": coalesced,
+        "dropped_triggers": sum(len(stamps) for stamps in pending.values()),
+        "loop_max_ms": monitor.max_lag * 1000,
+        "loop_blocked_ms": monitor.blocked * 1000,
+    }
+
+    for home_coordinator in coordinators:
+        home_coordinator.cleanup_listeners()
+        home_coordinator.window_debouncer.async_cancel_all()
+        home_coordinator.scheduler.async_cancel_all()
+    await session.close()
+    await gateway.stop()
+    await hass.async_stop(force=True)
+    debounce.WINDOW_BATCH_SECONDS = WINDOW_BATCH_SECONDS
+    presence.PRESENCE_SOURCES = PRESENCE_SOURCES
+    outdoor.WEATHER_EMA_TAU_SECONDS = WEATHER_EMA_TAU_SECONDS
+    return result
+
+
+def _report(result: dict) -> None:
+    print(
+        f"{result['scenario']:<16} homes={result['homes']:<2} events={result['events']:<5} "
+        f"gateway/h={result['gateway_per_hour']:<4} round_trips/h={result['round_trips_per_hour']:<4} "
+        f"skipped/h={result['skipped_per_hour']:<4} merged={result['merged_triggers']:<4} "
+        f"service/h={result['service_per_hour']:<5} guard={result['guard_skipped']:<5} "
+        f"p50={result['p50_ms']:7.2f} ms  p99={result['p99_ms']:7.2f} ms  coalesced={result['coalesced_triggers']:<4} "
+        f"dropped={result['dropped_triggers']:<4} "
+        f"loop max={result['loop_max_ms']:6.2f} ms  blocked={result['loop_blocked_ms']:7.2f} ms"
+    )
+
+
+def check_regressions(results: list[dict], baseline: list[dict]) -> list[str]:
+    """Vergelijk met de baseline; geeft per overschreden grens een regel terug."""
+    expected = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        if (reference := expected.get(result["scenario"])) is None:
+            print(f"{result['scenario']:<16} niet in de baseline, niet gecontroleerd")
+            continue
+        for metric, (relative, absolute) in REGRESSION_LIMITS.items():
+            limit = reference[metric] * (1 + relative) + absolute
+            if result[metric] > limit:
+                regressions.append(
+                    f"{result['scenario']}: {metric} = {result[metric]:.2f} (baseline {reference[metric]:.2f}, grens {limit:.2f})"
+                )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as file:
+            streams = {"replay": json.load(file)}
+    else:
+        names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+        streams = {name: SCENARIOS[name](random.Random(args.seed), args.zones) for name in names}
+
+    results = []
+    for name, events in streams.items():
+        zones = max(args.zones, 10) if name == "many_zones" else args.zones
+        result = await run_scenario(
+            name, events, zones, args.seconds, args.latency, args.actuator_latency, args.homes, args.shared_wifi
+        )
+        _report(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.check:
+        with open(args.check, encoding="utf-8") as file:
+            regressions = check_regressions(results, json.load(file))
+        for regression in regressions:
+            print(f"REGRESSIE {regression}")
+        if regressions:
+            return 1
+        print(f"Geen regressies t.o.v. {args.check}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--zones", type=int, default=6)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Echte duur van één afgespeeld uur (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Gesimuleerde Gateway latency (s)")
+    parser.add_argument("--actuator-latency", type=float, default=0.0, help="Duur van één climate service-call (s)")
+    parser.add_argument("--homes", type=int, default=1, help="Aantal huizen (config entries) met één gedeelde batcher")
+    parser.add_argument("--shared-wifi", action="store_true",
+                        help="Wi-Fi sensoren aan niemand koppelen (gelden dan voor iedereen)")
+    parser.add_argument("--replay", help="JSON-bestand met een opgenomen stroom statuswijzigingen")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Schrijf de resultaten ook als JSON naar dit bestand")
+    parser.add_argument("--check", help="Baseline (JSON van --json); exit code 1 bij een regressie")
+    sys.exit(asyncio.run(main(parser.parse_args())))
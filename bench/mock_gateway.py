@@ -0,0 +1,112 @@
+"""Lokale mock van de ClimaCore Gateway voor benchmarks.
+
+Draait een aiohttp server op 127.0.0.1 die de endpoints van de echte Gateway
+nabootst. De antwoorden zijn bewust simpel: een vast scenario en geen acties,
+tenzij een `responder` wordt meegegeven.
+
+Protocol v2 (`/api/v2/...`, gzip-body met config hash) wordt ondersteund zolang
+`2` in `protocols` staat; zonder v2 antwoordt de mock 404, zoals een oude Gateway.
+De responder krijgt altijd de volledige (v1) body, ongeacht het protocol.
+
+Het batch-endpoint (`/api/v2/batch/main_logic`) verwerkt de verzoeken van
+meerdere huizen in één round trip en geeft per huis een eigen status terug.
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from _loader import load
+
+protocol = load("protocol")
+
+DEFAULT_RESPONSE = {"scenario": "Dag - Fris", "actions": []}
+
+
+class MockGateway:
+    """Een minimale Gateway die verzoeken telt en optioneel vertraging simuleert."""
+
+    def __init__(self, latency: float = 0.0, responder=None, protocols: tuple[int, ...] = (1, 2), batch: bool = True):
+        self.latency = latency
+        self.responder = responder
+        self.protocols = protocols
+        self.requests: list[dict] = []
+        self.bytes_received = 0
+        # Aantal HTTP round trips; een batch telt als één
+        self.round_trips = 0
+        self.batch = batch
+        # Protocol v2: config hash -> statisch deel van de payload
+        self.configs: dict[str, dict] = {}
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    async def _read(self, request: web.Request) -> dict:
+        # aiohttp pakt een gzip-body zelf uit; Content-Length is wat er over de lijn ging
+        raw = await request.read()
+        self.bytes_received += request.content_length or len(raw)
+        return json.loads(raw or b"{}")
+
+    def _answer(self, path: str, body: dict) -> tuple[int, dict]:
+        self.requests.append({"path": path, "body": body, "time": time.monotonic()})
+        if body.get("activation_code") == "invalid":
+            return 403, {"error": "forbidden"}
+        response = self.responder(path, body) if self.responder else None
+        return 200, response if response is not None else DEFAULT_RESPONSE
+
+    def _answer_v2(self, path: str, body: dict) -> tuple[int, dict]:
+        config_hash = body.get("config_hash")
+        if static := body.get("config"):
+            if protocol.config_hash(static) != config_hash:
+                return 400, {"error": "config hash klopt niet"}
+            self.configs[config_hash] = static
+        if config_hash not in self.configs:
+            return 409, {"error": "unknown config hash"}
+        # Vanaf hier ziet de responder precies wat hij bij v1 zou zien
+        full = {
+            "activation_code": body.get("activation_code"),
+            "payload": protocol.merge_payload(self.configs[config_hash], body.get("state", {})),
+        }
+        return self._answer(path, full)
+
+    async def _reply(self, status: int, response: dict) -> web.Response:
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(response, status=status)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return await self._reply(*self._answer(request.path, await self._read(request)))
+
+    async def _handle_v2(self, request: web.Request) -> web.Response:
+        return await self._reply(*self._answer_v2(request.path, await self._read(request)))
+
+    async def _handle_batch(self, request: web.Request) -> web.Response:
+        body = await self._read(request)
+        path = f"/api/v2/{request.match_info['endpoint']}"
+        results = []
+        for item in body.get("requests", []):
+            status, response = self._answer_v2(path, item)
+            results.append({"status": status, "response": response} if status == 200 else {"status": status, **response})
+        return await self._reply(200, {"results": results})
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/api/v1/{endpoint}", self._handle)
+        if 2 in self.protocols:
+            # Eerst de specifieke batch-route, anders vangt de generieke route hem af
+            if self.batch:
+                app.router.add_post("/api/v2/batch/{endpoint}", self._handle_batch)
+            app.router.add_post("/api/v2/{endpoint}", self._handle_v2)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
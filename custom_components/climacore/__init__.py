@@ -1,11 +1,11 @@
 """De ClimaCore Integratie."""
 import logging
-import asyncio
 import os
-from typing import Any
-from datetime import time
+from typing import Any, Callable
+from datetime import timedelta
+from functools import partial
 
-from homeassistant.core import HomeAssistant, callback, CoreState
+from homeassistant.core import HomeAssistant, callback, CoreState, CALLBACK_TYPE
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     Platform, ATTR_ENTITY_ID, STATE_UNAVAILABLE, STATE_UNKNOWN,
@@ -23,8 +23,35 @@ from homeassistant.helpers.entity_registry import (
 )
 import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN, CONF_ACTIVATION_CODE
-from .api import ClimaCoreApiClient, ApiAuthError, ApiConnectionError, ApiTimeoutError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN, CONF_ACTIVATION_CODE, CONF_API_MODE, API_MODE_ASYNC, API_MODE_SYNC,
+    SIGNAL_STATUS_UPDATE, SIGNAL_DECISION_UPDATE, SIGNAL_PRESENCE_UPDATE, FINGERPRINT_MAX_AGE_MINUTES,
+    ROLE_WINDOW, ROLE_PERSON, ROLE_PRESENCE, ROLE_WIFI, ROLE_WEATHER, WEATHER_FORECAST_INTERVAL_MINUTES,
+    DECISION_SOURCE_CLOUD, DECISION_SOURCE_LOCAL,
+    STORAGE_VERSION, STORAGE_KEY, STORAGE_SAVE_DELAY,
+    BATCHER_KEY, STATIC_PATH_KEY, OBSOLETE_OPTIONS,
+)
+from .debounce import WindowDebouncer
+from .presence import PresenceFusion
+from .outdoor import WeatherTracker
+from .snapshot import ConfigSnapshot, migrate_zone_slots
+from .config_flow import activation_code_unique_id
+from .fingerprint import payload_fingerprint
+from .executor import ZoneActionExecutor
+from .fallback import decide_locally, weather_band, SCENARIO_LABELS
+from .thermal import ZoneThermalModel
+from .scheduler import TimerScheduler
+from .batcher import GatewayBatcher
+from .services import async_register_services, async_unregister_services
+from .trace import TraceBuffer, DecisionTrace, STAGE_PAYLOAD, STAGE_GATEWAY, STAGE_ACTIONS
+from .api import (
+    ClimaCoreApiClient, ClimaCoreSyncApiClient,
+    ApiAuthError, ApiConnectionError, ApiTimeoutError
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,29 +62,82 @@ async def async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None
     _LOGGER.debug(f"ClimaCore opties bijgewerkt, herlaad listeners...")
     coordinator: ClimaCoreCoordinator = hass.data[DOMAIN].get(entry.entry_id)
     if coordinator:
+        if coordinator.options.get(CONF_API_MODE, API_MODE_ASYNC) != entry.options.get(CONF_API_MODE, API_MODE_ASYNC):
+            # De transport-modus wisselen vraagt een nieuwe API client: volledige herlaad.
+            await hass.config_entries.async_reload(entry.entry_id)
+            return
+        new_snapshot = ConfigSnapshot.from_options(entry.options)
+        if (
+            [zone.key for zone in coordinator.snapshot.zones] != [zone.key for zone in new_snapshot.zones]
+            or coordinator.snapshot.person_entities != new_snapshot.person_entities
+        ):
+            # Zones of personen erbij of eraf: hun entiteiten worden bij het opzetten van het platform aangemaakt
+            await hass.config_entries.async_reload(entry.entry_id)
+            return
         await coordinator.update_options(entry.options)
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migreer oudere config entries naar het huidige formaat."""
+    if entry.version > 4:
+        # Nieuwer formaat (downgrade): deze versie begrijpt de entry niet
+        _LOGGER.error(f"ClimaCore configuratie heeft versie {entry.version}; deze versie kent tot en met 4. Downgrade niet ondersteund.")
+        return False
+    if entry.version == 1:
+        # v1 -> v2: de vaste zone-slots worden een lijst met vaste ids
+        options = migrate_zone_slots(entry.options)
+        hass.config_entries.async_update_entry(entry, options=options, version=2)
+        _LOGGER.info(f"ClimaCore configuratie gemigreerd naar versie 2 ({len(options['zones'])} zones).")
+    if entry.version == 2:
+        # v2 -> v3: opties zonder effect verdwijnen
+        options = {key: value for key, value in entry.options.items() if key not in OBSOLETE_OPTIONS}
+        hass.config_entries.async_update_entry(entry, options=options, version=3)
+    if entry.version == 3:
+        # v3 -> v4: de unique_id is een hash van de activatiecode (was de code zelf, of DOMAIN
+        # bij entries uit de tijd dat er maar één huis kon zijn)
+        activation_code = entry.data.get(CONF_ACTIVATION_CODE)
+        unique_id = activation_code_unique_id(activation_code) if activation_code else entry.unique_id
+        hass.config_entries.async_update_entry(entry, unique_id=unique_id, version=4)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Zet ClimaCore op vanuit een config entry."""
     
     _LOGGER.info(f"ClimaCore v1.5.8 aan het laden...")
     
-    api_client = ClimaCoreApiClient(entry.data.get(CONF_ACTIVATION_CODE))
+    activation_code = entry.data.get(CONF_ACTIVATION_CODE)
+
+    if entry.options.get(CONF_API_MODE) == API_MODE_SYNC:
+        _LOGGER.info("ClimaCore API client draait in compatibiliteitsmodus (synchroon).")
+        api_client = ClimaCoreSyncApiClient(hass, activation_code)
+    else:
+        api_client = ClimaCoreApiClient(async_get_clientsession(hass), activation_code)
+        # Eén gedeelde batcher voor alle huizen op deze HA instantie
+        if (batcher := hass.data.get(BATCHER_KEY)) is None:
+            batcher = hass.data[BATCHER_KEY] = GatewayBatcher(hass, async_get_clientsession(hass))
+        batcher.register(api_client)
     coordinator = ClimaCoreCoordinator(hass, entry, api_client)
     
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    entry.add_update_listener(async_options_updated)
+    # Warme start: herstel het laatste scenario vóórdat de sensoren worden aangemaakt
+    await coordinator.async_restore()
+
+    entry.async_on_unload(entry.add_update_listener(async_options_updated))
     
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
-    static_path = os.path.join(hass.config.path(f"custom_components/{DOMAIN}/www"))
-    await hass.http.async_register_static_paths([
-        StaticPathConfig(f"/{DOMAIN}_assets", static_path, cache_headers=False)
-    ])
-    _LOGGER.info(f"Assets geregistreerd op URL: /{DOMAIN}_assets")
+    if not hass.data.get(STATIC_PATH_KEY):
+        static_path = os.path.join(hass.config.path(f"custom_components/{DOMAIN}/www"))
+        await hass.http.async_register_static_paths([
+            StaticPathConfig(f"/{DOMAIN}_assets", static_path, cache_headers=False)
+        ])
+        hass.data[STATIC_PATH_KEY] = True
+        _LOGGER.info(f"Assets geregistreerd op URL: /{DOMAIN}_assets")
+
+    async_register_services(hass)
     
     # --- AANPASSING: Wacht op volledige start van Home Assistant ---
     async def _start_climacore_logic(_):
@@ -65,7 +145,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.info("Home Assistant is volledig gestart (Event). ClimaCore activeert nu zijn triggers.")
         await coordinator.setup_listeners()
         
-        # We voeren één keer een 'clean sweep' uit om zeker te zijn dat de status klopt
+        # We voeren één keer een 'clean sweep' uit om zeker te zijn dat de status klopt.
+        # Komen de inputs overeen met wat we vóór de herstart opsloegen, dan slaat de
+        # wijzigingsdetectie de Gateway-aanroep vanzelf over.
         await coordinator.async_trigger_main_logic()
 
     # --- HIER ZAT DE FOUT (Nu gecorrigeerd naar kleine letters) ---
@@ -89,14 +171,22 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator: ClimaCoreCoordinator = hass.data[DOMAIN].get(entry.entry_id)
     if coordinator:
         coordinator.cleanup_listeners()
+        coordinator.scheduler.async_cancel_all()
+        coordinator.window_debouncer.async_cancel_all()
+        if (batcher := hass.data.get(BATCHER_KEY)) and batcher.unregister(coordinator.api_client):
+            hass.data.pop(BATCHER_KEY)
     
     if unload_ok:
-        _LOGGER.debug("ClimaCore static path aan het unregisteren...")
-        await hass.http.async_unregister_static_paths(f"/{DOMAIN}_assets")
-        
         if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
             hass.data[DOMAIN].pop(entry.entry_id)
 
+        # De assets en services zijn gedeeld: pas weg als het laatste huis verdwijnt
+        if not hass.data.get(DOMAIN):
+            async_unregister_services(hass)
+        if not hass.data.get(DOMAIN) and hass.data.pop(STATIC_PATH_KEY, None):
+            _LOGGER.debug("ClimaCore static path aan het unregisteren...")
+            await hass.http.async_unregister_static_paths(f"/{DOMAIN}_assets")
+
     _LOGGER.debug("ClimaCore succesvol verwijderd.")
     return unload_ok
 
@@ -104,81 +194,281 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 class ClimaCoreCoordinator:
     """De "Motor" van ClimaCore."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api_client: ClimaCoreApiClient):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api_client: ClimaCoreApiClient | ClimaCoreSyncApiClient):
         self.hass = hass
         self.entry = entry
         self.api_client = api_client
         self.options = entry.options
-        self._listeners = []
+        # Voorgecompileerde opties; alleen opnieuw opgebouwd bij een wijziging
+        self._snapshot = ConfigSnapshot.from_options(self.options)
+        # Actieve listeners per sleutel (zie _desired_listeners)
+        self._listeners: dict[str, CALLBACK_TYPE] = {}
         self._entity_registry: EntityRegistry | None = None
         self._is_running = False
-        self._boost_window = None 
+        # Voorverwarming per zone: zone key -> {"start", "end"}
+        self._boost_windows: dict[str, dict] = {}
+        # Eigenaar van alle dynamische one-shot timers (starttijden van de voorverwarming)
+        self.scheduler = TimerScheduler(hass)
+        # Single-flight: triggers tijdens een run worden samengevoegd tot één vervolg-run.
+        # Een dict i.p.v. set zodat de volgorde (laatste trigger achteraan) behouden blijft.
+        self._pending_triggers: dict[str, None] = {}
+        self._rerun_requested = False
+        self.merged_trigger_count = 0
+        # Wijzigingsdetectie: vingerafdruk en tijdstip van het laatste geslaagde Gateway-antwoord
+        self._last_fingerprint: str | None = None
+        self._last_response_time = None
+        self.gateway_calls = 0
+        self.gateway_calls_skipped = 0
+        # Wie nam de laatste beslissing: de Gateway (cloud) of de lokale noodloop?
+        self.decision_source: str | None = None
+        self.scenario: str | None = None
+        # De laatste beslissing per zone: zone key -> {"scenario", "target_temperature"}
+        self.zone_decisions: dict[str, dict] = {}
+        self.last_decision_time = None
+        self._last_response: dict | None = None
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id))
+        # Geleerde opwarmsnelheid per zone (zone key -> model)
+        self.thermal_models: dict[str, ZoneThermalModel] = {}
+        self._action_executor = ZoneActionExecutor(hass)
+        # De laatste beslis-traces (timings, payload, antwoord), voor diagnose
+        self.traces = TraceBuffer()
+        self.window_debouncer = WindowDebouncer(
+            hass, self._async_schedule_run, self.async_publish_status
+        )
+        # Stabiele aanwezigheid per persoon; alleen een bevestigde wissel start de hoofdlogica
+        self.presence = PresenceFusion(hass, self.scheduler, self._async_schedule_run, self._async_publish_presence)
+        self.presence.async_configure(self._snapshot, None)
+        # Glad buitenweer en de weersverwachting; alleen een band-wissel start de hoofdlogica
+        self.weather = WeatherTracker(hass, self._async_schedule_run)
+        self.weather.async_configure(self._snapshot.weather_entity)
+
+    async def async_restore(self) -> None:
+        """Herstel de laatste beslissing uit de Store (warme start na herstart)."""
+        try:
+            data = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning(f"Kon opgeslagen ClimaCore status niet laden: {e}")
+            return
+        if not data:
+            return
+
+        self.scenario = data.get("scenario")
+        self.decision_source = data.get("decision_source")
+        self._last_response = data.get("response")
+        self._last_fingerprint = data.get("fingerprint")
+        self.zone_decisions = data.get("zone_decisions") or {}
+        if decided_at := data.get("decided_at"):
+            self.last_decision_time = dt_util.parse_datetime(decided_at)
+        if response_time := data.get("response_time"):
+            self._last_response_time = dt_util.parse_datetime(response_time)
+
+        nu = dt_util.now()
+        for zone_key, boost_window in (data.get("boost_windows") or {}).items():
+            start = dt_util.parse_datetime(boost_window["start"])
+            end = dt_util.parse_datetime(boost_window["end"])
+            if start and end and nu < end:
+                self._boost_windows[zone_key] = {"start": start, "end": end}
+                if start > nu:
+                    # De starttrigger overleeft een herstart niet: opnieuw inplannen
+                    self.scheduler.async_schedule(f"boost_{zone_key}", start, self.async_trigger_main_logic)
+
+        for zone_key, model_data in (data.get("thermal") or {}).items():
+            self.thermal_models[zone_key] = ZoneThermalModel.from_dict(model_data)
+
+        _LOGGER.info(f"ClimaCore status hersteld uit opslag. Laatste scenario: {self.scenario}")
+
+    @callback
+    def _data_to_store(self) -> dict:
+        return {
+            "scenario": self.scenario,
+            "decision_source": self.decision_source,
+            "response": self._last_response,
+            "fingerprint": self._last_fingerprint,
+            "zone_decisions": self.zone_decisions,
+            "decided_at": self.last_decision_time.isoformat() if self.last_decision_time else None,
+            "response_time": self._last_response_time.isoformat() if self._last_response_time else None,
+            "boost_windows": self.boost_windows_as_dict(),
+            "thermal": {zone_key: model.as_dict() for zone_key, model in self.thermal_models.items()},
+        }
+
+    def boost_windows_as_dict(self) -> dict:
+        return {
+            zone_key: {"start": window["start"].isoformat(), "end": window["end"].isoformat()}
+            for zone_key, window in self._boost_windows.items()
+        }
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    def _zone_decisions(self, response: dict, zone_results: dict) -> dict[str, dict]:
+        """Werk de beslis-cache per zone bij met een antwoord en de uitvoer van de acties.
+
+        Een zone zonder climate-actie in dit antwoord houdt haar vorige doel; `changed_at`
+        schuift alleen op als de beslissing voor die zone echt anders is.
+
+        Het Gateway-contract is `scenario` + `actions`; `zone_scenarios` en
+        `zone_reasons` (per zone-naam) zijn optioneel en komen nu alleen uit de
+        lokale noodloop. Ontbreekt een zone daarin, dan geldt het globale scenario.
+        """
+        zone_scenarios = response.get("zone_scenarios") or {}
+        zone_reasons = response.get("zone_reasons") or {}
+        nu = dt_util.utcnow().isoformat()
+        decisions = {}
+        for zone in self._snapshot.zones:
+            previous = self.zone_decisions.get(zone.key, {})
+            result = zone_results.get(zone.name, {})
+            scenario = zone_scenarios.get(zone.name) or response.get("scenario")
+            decision = {
+                "scenario": SCENARIO_LABELS.get(scenario, scenario),
+                "target_temperature": result.get("temperature", previous.get("target_temperature")),
+                "hvac_mode": result.get("hvac_mode", previous.get("hvac_mode")),
+                "reason": zone_reasons.get(zone.name),
+                "source": self.decision_source,
+                "error": result.get("error"),
+            }
+            unchanged = all(previous.get(key) == value for key, value in decision.items())
+            decision["service_calls"] = result.get("calls", 0)
+            decision["changed_at"] = previous.get("changed_at") if unchanged else nu
+            decisions[zone.key] = decision
+        return decisions
+
+    @callback
+    def _async_publish_decision(self, response: dict, zone_results: dict) -> None:
+        """Onthoud de beslissing en meld die (alleen) aan de entiteiten van dit huis."""
+        if scenario := response.get("scenario"):
+            self.scenario = scenario
+        self.zone_decisions = self._zone_decisions(response, zone_results)
+        self.last_decision_time = dt_util.utcnow()
+        async_dispatcher_send(self.hass, SIGNAL_DECISION_UPDATE.format(self.entry.entry_id))
+        self._async_schedule_save()
+
+    @callback
+    def async_publish_status(self) -> None:
+        """Laat de sensoren weten dat de interne status (tellers, timers) is gewijzigd."""
+        async_dispatcher_send(self.hass, SIGNAL_STATUS_UPDATE.format(self.entry.entry_id))
+
+    @callback
+    def _async_publish_presence(self) -> None:
+        async_dispatcher_send(self.hass, SIGNAL_PRESENCE_UPDATE.format(self.entry.entry_id))
+        self.async_publish_status()
 
     @callback
     def cleanup_listeners(self) -> None:
         _LOGGER.debug(f"Opschonen van {len(self._listeners)} listeners...")
-        for remove_listener in self._listeners:
+        for remove_listener in self._listeners.values():
             remove_listener()
-        self._listeners = []
+        self._listeners = {}
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return self._snapshot
 
     async def update_options(self, new_options: dict) -> None:
         self.options = new_options
-        self.cleanup_listeners()
-        await self.setup_listeners()
-
-    async def setup_listeners(self) -> None:
-        _LOGGER.debug("Registreren van ClimaCore triggers...")
-        self._entity_registry = async_get_entity_registry(self.hass)
-        
-        main_triggers = []
-        
-        if person_entities := self.options.get("person_entities"):
-            main_triggers.extend(person_entities)
-        if weather_entity := self.options.get("weather_entity"):
-            main_triggers.append(weather_entity)
-        if gasten_entity := self.options.get("gasten_entity"):
-            main_triggers.append(gasten_entity)
-        if onderweg_entity := self.options.get("onderweg_entity"):
-            main_triggers.append(onderweg_entity)
-            
-        # --- NIEUW: TAGS & WIFI ---
-        if presence_sensors := self.options.get("presence_sensors"):
-            main_triggers.extend(presence_sensors)
-        if wifi_sensors := self.options.get("wifi_tracker_sensors"):
-            main_triggers.extend(wifi_sensors)
-        # --------------------------
-
-        if main_triggers:
-            _LOGGER.debug(f"Listener voor Hoofdtriggers: {main_triggers}")
-            self._listeners.append(
-                async_track_state_change_event(
-                    self.hass, main_triggers, self.async_trigger_main_logic
-                )
+        self._snapshot = ConfigSnapshot.from_options(new_options)
+        self.presence.async_configure(self._snapshot, self._entity_registry)
+        self.weather.async_configure(self._snapshot.weather_entity)
+        # Alleen het verschil: ongewijzigde listeners (en de heartbeat) blijven gewoon lopen
+        added, removed = self._async_sync_listeners()
+        _LOGGER.debug(f"Listeners bijgewerkt na optie-wijziging: {added} erbij, {removed} eraf.")
+
+    def _desired_listeners(self) -> dict[str, Callable[[], CALLBACK_TYPE]]:
+        """Alle listeners die bij de huidige snapshot horen, als sleutel -> fabriek.
+
+        Eén state-tracker per entiteit: HA houdt de callbacks toch al per entity_id
+        bij, dus dit kost niets extra en maakt het verschil per entiteit berekenbaar.
+        """
+        snapshot = self._snapshot
+        desired: dict[str, Callable[[], CALLBACK_TYPE]] = {}
+
+        # Hoofdtriggers en raamsensoren (de debounce zit in async_trigger_main_logic)
+        for entity_id in (*snapshot.main_triggers, *snapshot.window_sensors):
+            desired[f"state:{entity_id}"] = partial(
+                async_track_state_change_event, self.hass, [entity_id], self.async_trigger_main_logic
             )
 
-        window_sensors = []
-        for i in range(1, 11):
-            zone_data = self.options.get(f"zone_{i}", {})
-            if sensors := zone_data.get("window_sensors"):
-                window_sensors.extend(sensors)
-        
-        if window_sensors:
-            _LOGGER.debug(f"Listener voor Raamsensoren: {window_sensors}")
-            self._listeners.append(
-                async_track_state_change_event(
-                    self.hass, window_sensors, self.async_trigger_main_logic
-                )
+        # THERMISCH MODEL: leert mee van de (primaire) thermostaat per zone, triggert de hoofdlogica niet
+        for zone in snapshot.zones:
+            desired[f"climate:{zone.climate_entities[0]}"] = partial(
+                async_track_state_change_event, self.hass, [zone.climate_entities[0]], self._async_climate_state_changed
             )
 
         # TIJD TRIGGERS
-        self._listeners.append(async_track_time_change(self.hass, self.async_trigger_main_logic, hour=23, minute=0, second=0))
-        self._listeners.append(async_track_time_change(self.hass, self.async_trigger_main_logic, hour=4, minute=59, second=59))
-        self._listeners.append(async_track_time_change(self.hass, self.async_trigger_proactive_start, hour=4, minute=0, second=0))
-        
+        desired["time:23:00:00"] = partial(async_track_time_change, self.hass, self.async_trigger_main_logic, hour=23, minute=0, second=0)
+        desired["time:04:59:59"] = partial(async_track_time_change, self.hass, self.async_trigger_main_logic, hour=4, minute=59, second=59)
+        desired["time:04:00:00"] = partial(async_track_time_change, self.hass, self.async_trigger_proactive_start, hour=4, minute=0, second=0)
+
+        # WEERSVERWACHTING: één keer per interval ophalen (de proactieve start leest de cache)
+        if snapshot.weather_entity:
+            desired[f"forecast:{snapshot.weather_entity}"] = partial(
+                async_track_time_interval, self.hass, self.weather.async_refresh_forecast,
+                timedelta(minutes=WEATHER_FORECAST_INTERVAL_MINUTES),
+            )
+
         # HEARTBEAT
-        self._listeners.append(async_track_time_interval(self.hass, self.async_trigger_main_logic, dt_util.dt.timedelta(minutes=10)))
-        
-        _LOGGER.debug("Alle listeners zijn geregistreerd.")
+        desired["heartbeat"] = partial(async_track_time_interval, self.hass, self.async_trigger_main_logic, dt_util.dt.timedelta(minutes=10))
+        return desired
+
+    @callback
+    def _async_sync_listeners(self) -> tuple[int, int]:
+        """Breng de actieve listeners in lijn met de snapshot; geeft (erbij, eraf)."""
+        desired = self._desired_listeners()
+        removed = [key for key in self._listeners if key not in desired]
+        for key in removed:
+            self._listeners.pop(key)()
+        added = [key for key in desired if key not in self._listeners]
+        for key in added:
+            self._listeners[key] = desired[key]()
+        return len(added), len(removed)
+
+    async def setup_listeners(self) -> None:
+        _LOGGER.debug("Registreren van ClimaCore triggers...")
+        self._entity_registry = async_get_entity_registry(self.hass)
+        # Nu alle entiteiten er zijn: de sensoren aan hun personen koppelen
+        self.presence.async_configure(self._snapshot, self._entity_registry)
+        self.weather.async_configure(self._snapshot.weather_entity)
+        self._async_sync_listeners()
+        _LOGGER.debug(f"Alle listeners zijn geregistreerd ({len(self._listeners)}).")
+
+    def _get_outdoor_temp(self) -> float:
+        return self.weather.temperature
+
+    @callback
+    def _async_climate_state_changed(self, event) -> None:
+        """Voer de thermostaat-meting aan het thermisch model van de zone."""
+        entity_id = event.data.get("entity_id")
+        new_state = event.data.get("new_state")
+        zone = self._snapshot.entity_zones.get(entity_id)
+        if not zone or not new_state or zone.climate_entities[0] != entity_id:
+            return
+        try:
+            current_temp = float(new_state.attributes["current_temperature"])
+            setpoint = float(new_state.attributes["temperature"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if new_state.state == "off":
+            # Geen warmtevraag, hoe hoog het setpoint ook staat
+            setpoint = current_temp
+
+        model = self.thermal_models.setdefault(zone.key, ZoneThermalModel())
+        minutes = event.time_fired.timestamp() / 60
+        if model.observe(minutes, current_temp, setpoint, self._get_outdoor_temp()):
+            self._async_schedule_save()
+
+    def learned_minutes_per_degree(self, zone_key: str, outdoor_temp: float) -> float | None:
+        """De geleerde opwarmsnelheid van een zone, of None zolang er te weinig data is."""
+        if model := self.thermal_models.get(zone_key):
+            return model.minutes_per_degree(outdoor_temp)
+        return None
+
+    def learned_rates(self) -> dict:
+        """Geleerde minuten per graad per zone (bij de huidige buitentemperatuur), voor diagnose."""
+        outdoor_temp = self._get_outdoor_temp()
+        return {
+            zone.name: self.learned_minutes_per_degree(zone.key, outdoor_temp)
+            for zone in self._snapshot.zones
+        }
 
     def _get_state(self, entity_id: str) -> str | None:
         state = self.hass.states.get(entity_id)
@@ -194,102 +484,58 @@ class ClimaCoreCoordinator:
             return value if value is not None else default
         return default
 
-    def _build_main_logic_payload(self, trigger_entity_id: str | None = None) -> dict:
-        config_data = {key: value for key, value in self.options.items() if key.startswith("temp_")}
-        config_data["fallback_temp"] = self.options.get("fallback_temp", 18.0)
+    def _build_main_logic_payload(self, trigger_entity_ids: list[str] | None = None) -> dict:
+        snapshot = self._snapshot
+        config_data = dict(snapshot.config_data)
 
-        # BOOST LOGICA
         nu = dt_util.now()
-        simulated_time_str = nu.strftime('%H:%M:%S')
-        
-        if self._boost_window:
-            if self._boost_window["start"] <= nu < self._boost_window["end"]:
-                simulated_time_str = self._boost_window["end"].strftime('%H:%M:%S')
-                _LOGGER.info(f"BOOST ACTIEF: A.I. berekende voorverwarming. Ik simuleer tijdstip {simulated_time_str}.")
-            elif nu >= self._boost_window["end"]:
-                self._boost_window = None
-        
+        trigger_entity_ids = trigger_entity_ids or []
         context_data = {
-            "current_time": simulated_time_str,
-            "trigger_entity_id": trigger_entity_id 
+            "current_time": nu.strftime('%H:%M:%S'),
+            # De meest recente trigger, zoals de Gateway die altijd al kreeg
+            "trigger_entity_id": trigger_entity_ids[-1] if trigger_entity_ids else None,
+            # Alle triggers die in deze (samengevoegde) run zijn meegenomen
+            "trigger_entity_ids": trigger_entity_ids,
         }
 
-        weather_entity = self.options.get("weather_entity")
-        try: temp = float(self._get_state_attr(weather_entity, "temperature", 15.0))
-        except (ValueError, TypeError): temp = 15.0
-        try: hum = float(self._get_state_attr(weather_entity, "humidity", 50))
-        except (ValueError, TypeError): hum = 50.0
-
+        self.weather.async_advance()
+        # De stabiele weer-band van de tracker (met dode zone); de vingerafdruk gebruikt alleen deze
+        context_data["weather_band"] = self.weather.band
         sensors_data = {
-            "outdoor_temp": temp, "outdoor_humidity": hum,
-            "gasten_aanwezig": self._get_state(self.options.get("gasten_entity")) or "off",
-            "onderweg_naar_huis": self._get_state(self.options.get("onderweg_entity")) or "off",
-            "systeem_keuze": self.options.get("systeem_keuze_direct", "Ambisense/MyPyllant")
+            # Gladgestreken (zie outdoor.py), zodat ruis van de weerprovider de vingerafdruk niet verandert
+            "outdoor_temp": self.weather.temperature, "outdoor_humidity": self.weather.humidity,
+            "gasten_aanwezig": self._get_state(snapshot.gasten_entity) or "off",
+            "onderweg_naar_huis": self._get_state(snapshot.onderweg_entity) or "off",
+            "systeem_keuze": snapshot.systeem_keuze
         }
 
-        # --- WI-FI & TAG DOMINANTIE LOGICA ---
-        persons_data = {}
-        person_entities = self.options.get("person_entities", [])
-        
-        # 1. Check Tag/Sensor Aanwezigheid (Nieuw)
-        tags = self.options.get("presence_sensors", [])
-        is_tag_home = False
-        for tag in tags:
-            state = self._get_state(tag)
-            # Accepteer 'home' (trackers) en 'on' (binary sensors/knoppen)
-            if state in ["home", "on", "active"]:
-                is_tag_home = True
-                break
-
-        # 2. Check Wi-Fi
-        target_ssid = self.options.get("home_wifi_ssid")
-        wifi_sensors = self.options.get("wifi_tracker_sensors", [])
-        is_wifi_connected = False
-        if target_ssid and wifi_sensors:
-            for sensor in wifi_sensors:
-                wifi_state = self._get_state(sensor)
-                if wifi_state and target_ssid in wifi_state:
-                    is_wifi_connected = True
-                    break
-        
-        for entity_id in person_entities:
-            gps_state = self._get_state(entity_id)
-            # Als Wi-Fi OF Tag aanwezig is -> Iedereen is "Thuis"
-            if is_wifi_connected or is_tag_home:
-                persons_data[entity_id] = "home"
-            elif gps_state == "home":
-                persons_data[entity_id] = "home"
-            else:
-                persons_data[entity_id] = "not_home"
-        # ------------------------------------------------
+        # Bevestigde status per persoon (GPS, Wi-Fi en tags samengevoegd, zie presence.py)
+        persons_data = self.presence.states()
 
         climate_zones_data = {}
-        for i in range(1, 11): 
-            zone_key = f"zone_{i}"
-            zone_config = self.options.get(zone_key)
-            
-            if not zone_config or not zone_config.get("climate_entities"): 
-                continue
-            
-            zone_name = zone_config.get("zone_name", f"Zone {i}")
-            if not zone_name: zone_name = f"Zone {i}"
-            
+        for zone in snapshot.zones:
+            # BOOST LOGICA: tijdens de voorverwarming laten we de dag van déze zone eerder beginnen
+            day_start = zone.day_start
+            if boost_window := self._boost_windows.get(zone.key):
+                if boost_window["start"] <= nu < boost_window["end"]:
+                    day_start = boost_window["start"].strftime('%H:%M:%S')
+                    _LOGGER.info(f"BOOST ACTIEF voor {zone.name}: dag begint om {day_start} i.p.v. {zone.day_start}.")
+                elif nu >= boost_window["end"]:
+                    del self._boost_windows[zone.key]
+
             window_states = []
-            for sensor_id in zone_config.get("window_sensors", []):
+            for sensor_id in zone.window_sensors:
                 state = self._get_state(sensor_id)
                 if state: window_states.append(state)
-            
-            day_start = zone_config.get("day_start", "06:00:00")
-            night_start = zone_config.get("night_start", "22:00:00")
 
-            climate_zones_data[zone_name] = {
-                "climate_entity": zone_config["climate_entities"][0],
-                "lookup_prefix": zone_config.get("lookup_prefix", "woonkamer"),
+            climate_zones_data[zone.name] = {
+                "climate_entity": zone.climate_entities[0],
+                "lookup_prefix": zone.lookup_prefix,
                 "window_sensors": window_states,
-                "_all_climate_entities": zone_config["climate_entities"],
+                "_all_climate_entities": list(zone.climate_entities),
                 "schedule": {
                     "start": day_start,
-                    "end": night_start
+                    "end": zone.night_start
                 }
             }
 
@@ -299,81 +545,30 @@ class ClimaCoreCoordinator:
             "climate_zones": climate_zones_data
         }
 
-    async def _execute_actions(self, actions: list, climate_zones_payload: dict):
-        _LOGGER.debug(f"Uitvoeren van {len(actions)} acties ontvangen van ClimaCore API...")
-        
-        for action in actions:
-            try:
-                service = action.get("service")
-                entity_name = action.get("entity") 
-                data = action.get("data", {})
-                
-                if not service: continue
-
-                # Vertragingen en notificaties altijd uitvoeren
-                if service == "delay":
-                    delay_seconds = data.get("seconds", 1)
-                    # _LOGGER.debug(f"Actie: Wacht {delay_seconds} seconden...")
-                    await asyncio.sleep(delay_seconds)
-                    continue
-
-                if service.startswith("persistent_notification"):
-                    await self.hass.services.async_call("persistent_notification", service.split('.')[1], data)
-                    continue
-
-                if not entity_name: continue
-
-                zone_data = climate_zones_payload.get(entity_name)
-                if not zone_data:
-                    _LOGGER.warning(f"Actie overgeslagen: Zone '{entity_name}' niet gevonden.")
-                    continue
-
-                target_entities = zone_data.get("_all_climate_entities", [])
-                if not target_entities: continue
-                
-                # --- NIEUWE API BESPARINGS LOGICA ---
-                # We checken of de actie wel nodig is om de API te sparen.
-                should_execute = True
-                primary_entity = target_entities[0]
-                current_state_obj = self.hass.states.get(primary_entity)
-
-                if current_state_obj:
-                    # 1. Check Temperatuur Setpoint
-                    if "temperature" in data:
-                        target_temp = float(data["temperature"])
-                        try:
-                            current_setpoint = float(current_state_obj.attributes.get("temperature", -1))
-                            # Als het verschil kleiner is dan 0.1 graad, doe niets.
-                            if abs(current_setpoint - target_temp) < 0.1:
-                                _LOGGER.debug(f"SKIP: {primary_entity} staat al op {target_temp}°C.")
-                                should_execute = False
-                        except (ValueError, TypeError):
-                            pass # Kan huidige niet lezen, dus forceer update
-
-                    # 2. Check HVAC Mode (heat/cool/auto)
-                    if "hvac_mode" in data and should_execute:
-                        target_mode = data["hvac_mode"]
-                        current_mode = current_state_obj.state
-                        if current_mode == target_mode:
-                            _LOGGER.debug(f"SKIP: {primary_entity} staat al op modus '{target_mode}'.")
-                            should_execute = False
-                
-                if not should_execute:
-                    continue
-                # ------------------------------------
-
-                _LOGGER.debug(f"Actie: Roep service {service} aan voor {entity_name} | Data: {data}")
-                domain, service_name = service.split('.')
-                
-                await self.hass.services.async_call(
-                    domain, service_name, 
-                    {"entity_id": target_entities, **data},
-                    blocking=True 
-                )
-            
-            except Exception as e:
-                _LOGGER.error(f"FOUT tijdens uitvoeren actie voor {entity_name}: {e}. We gaan door...")
-                continue
+    async def _execute_actions(self, actions: list, climate_zones_payload: dict, trace: DecisionTrace | None = None) -> dict:
+        """Voer de acties uit; geeft per zone (naam) de uitgevoerde climate-stand terug."""
+        snapshot = self._snapshot
+        guard_skipped = self._action_executor.guard_skipped
+        zone_timings = await self._action_executor.async_execute(
+            actions, climate_zones_payload, snapshot.systeem_keuze, snapshot.max_parallel_calls
+        )
+        if trace:
+            trace.zone_timings = zone_timings
+            trace.guard_skipped = self._action_executor.guard_skipped - guard_skipped
+        return self._action_executor.zone_results
+
+    def stats(self) -> dict:
+        """Tellers van het hete pad, voor de diagnose-sensoren en de diagnose-download."""
+        return {
+            "gateway_calls": self.gateway_calls,
+            "gateway_calls_skipped": self.gateway_calls_skipped,
+            "merged_triggers": self.merged_trigger_count,
+            "dropped_window_triggers": self.window_debouncer.ignored,
+            "suppressed_presence_flaps": self.presence.suppressed,
+            "ignored_weather_updates": self.weather.ignored,
+            "guard_skipped": self._action_executor.guard_skipped,
+            "actions_merged": self._action_executor.actions_merged,
+        }
 
     @callback
     async def async_trigger_main_logic(self, *args):
@@ -394,138 +589,218 @@ class ClimaCoreCoordinator:
             except Exception:
                 _LOGGER.debug("Kon trigger details niet parsen (waarschijnlijk tijd-trigger).")
 
-        is_window_trigger = False
-        if trigger_entity_id:
-            for i in range(1, 11):
-                zone_data = self.options.get(f"zone_{i}", {})
-                if trigger_entity_id in zone_data.get("window_sensors", []):
-                    is_window_trigger = True
-                    break
-        
-        if is_window_trigger:
-            to_state = new_state_obj.state if new_state_obj else "unknown"
-            _LOGGER.debug(f"Raamsensor {trigger_entity_id} ging naar '{to_state}'. Wacht 15s debounce...")
-            await asyncio.sleep(15)
-            
-            current_state = self._get_state(trigger_entity_id)
-            if to_state == "on" and current_state == "off":
-                _LOGGER.info(f"Debounce: Raam {trigger_entity_id} was even open, maar nu weer dicht. Genegeerd.")
-                return
-            if to_state == "off" and current_state == "on":
-                _LOGGER.info(f"Debounce: Raam {trigger_entity_id} was even dicht, maar nu weer open. Genegeerd.")
-                return
-            _LOGGER.debug(f"Raam {trigger_entity_id} status bevestigd als '{current_state}'. Doorgaan met API-call.")
+        if trigger_entity_id and self._snapshot.entity_roles.get(trigger_entity_id) == ROLE_WINDOW:
+            # Niet wachten: de debouncer plant (of herstart) een timer per sensor
+            # en bundelt de sensoren die tot rust komen in één run.
+            self.window_debouncer.async_handle_event(
+                trigger_entity_id,
+                old_state_obj.state if old_state_obj else None,
+                new_state_obj.state if new_state_obj else None,
+                self._snapshot.window_debounce[trigger_entity_id],
+            )
+            return
+
+        if trigger_entity_id and self._snapshot.entity_roles.get(trigger_entity_id) in (ROLE_PERSON, ROLE_PRESENCE, ROLE_WIFI):
+            # Aanwezigheid telt pas na de hysterese van de bron; de fusie start zelf een run
+            # zodra een persoon echt van status wisselt.
+            self.presence.async_handle_state(trigger_entity_id, new_state_obj.state if new_state_obj else None)
+            return
+
+        if trigger_entity_id and self._snapshot.entity_roles.get(trigger_entity_id) == ROLE_WEATHER:
+            # Alleen een wissel van weer-band kan het scenario veranderen; de tracker start dan zelf een run
+            self.weather.async_handle_state(new_state_obj)
+            return
+
+        await self._async_schedule_run([trigger_entity_id] if trigger_entity_id else None)
+
+    async def _async_schedule_run(self, trigger_entity_ids: list[str] | None = None) -> None:
+        """Single-flight scheduler voor de hoofdlogica.
+
+        Er draait nooit meer dan één run tegelijk. Triggers die binnenkomen terwijl
+        een run bezig is, worden samengevoegd tot precies één vervolg-run die de
+        dan geldende status leest.
+        """
+        for trigger_entity_id in trigger_entity_ids or []:
+            self._pending_triggers.pop(trigger_entity_id, None)
+            self._pending_triggers[trigger_entity_id] = None
 
         if self._is_running:
-            _LOGGER.warning("Trigger overgeslagen: ClimaCore is al bezig (anti-loop).")
+            self._rerun_requested = True
+            self.merged_trigger_count += 1
+            _LOGGER.debug(f"ClimaCore is al bezig. Trigger {trigger_entity_ids} samengevoegd in de volgende run.")
             return
         self._is_running = True
-        
+
         try:
-            payload = self._build_main_logic_payload(trigger_entity_id=trigger_entity_id)
-            
-            response = await self.hass.async_add_executor_job(
-                self.api_client.trigger_main_logic, payload
-            )
+            while True:
+                self._rerun_requested = False
+                trigger_entity_ids = list(self._pending_triggers)
+                self._pending_triggers = {}
+                await self._async_run_main_logic(trigger_entity_ids)
+                if not self._rerun_requested:
+                    break
+                _LOGGER.debug(f"Vervolg-run voor samengevoegde triggers: {list(self._pending_triggers)}")
+        finally:
+            self._is_running = False
+
+    def _is_response_still_valid(self, fingerprint: str) -> bool:
+        """Is het laatste Gateway-antwoord nog geldig voor deze (genormaliseerde) payload?"""
+        if fingerprint != self._last_fingerprint or self._last_response_time is None:
+            return False
+        max_age = dt_util.dt.timedelta(minutes=FINGERPRINT_MAX_AGE_MINUTES)
+        return dt_util.utcnow() - self._last_response_time < max_age
+
+    async def _async_run_main_logic(self, trigger_entity_ids: list[str]) -> None:
+        """Eén volledige ronde: payload bouwen, Gateway aanroepen, acties uitvoeren."""
+        trace = self.traces.start(trigger_entity_ids)
+        try:
+            with trace.stage(STAGE_PAYLOAD):
+                payload = self._build_main_logic_payload(trigger_entity_ids=trigger_entity_ids)
+                fingerprint = payload_fingerprint(payload, self._snapshot.schedule_boundaries)
+            trace.payload = payload
+
+            if self._is_response_still_valid(fingerprint):
+                self.gateway_calls_skipped += 1
+                trace.outcome = "skipped"
+                _LOGGER.debug(f"Geen relevante wijziging (vingerafdruk {fingerprint}). Gateway-aanroep overgeslagen.")
+                return
+
+            self._last_fingerprint = None
+            self.gateway_calls += 1
+            with trace.stage(STAGE_GATEWAY):
+                response = await self.api_client.async_trigger_main_logic(payload)
+            trace.response = response
+            trace.outcome = DECISION_SOURCE_CLOUD
+            self._last_fingerprint = fingerprint
+            self._last_response_time = dt_util.utcnow()
+            self._last_response = response
+            self._async_schedule_save()
+            self.async_publish_status()
             
+            if self.decision_source == DECISION_SOURCE_LOCAL:
+                _LOGGER.info("ClimaCore Gateway is weer bereikbaar. De cloud neemt het weer over van de noodloop.")
+            self.decision_source = DECISION_SOURCE_CLOUD
+
+            zone_results = {}
             if response and (actions := response.get("actions")):
-                await self._execute_actions(actions, payload.get("climate_zones", {}))
+                with trace.stage(STAGE_ACTIONS):
+                    zone_results = await self._execute_actions(actions, payload.get("climate_zones", {}), trace)
             
-            scenario = response.get('scenario')
-            _LOGGER.info(f"ClimaCore logica succesvol uitgevoerd. Actief scenario: {scenario}")
-
-            if scenario:
-                self.hass.bus.async_fire("climacore_scenario_update", {"scenario": scenario})
-
-        except (ApiAuthError, ApiConnectionError, ApiTimeoutError) as e:
+            _LOGGER.info(f"ClimaCore logica succesvol uitgevoerd. Actief scenario: {response.get('scenario')}")
+            self._async_publish_decision(response or {}, zone_results)
+
+        except (ApiConnectionError, ApiTimeoutError) as e:
+            _LOGGER.error(f"Fout tijdens aanroepen ClimaCore API: {e}. Lokale noodloop neemt over.")
+            trace.error = str(e)
+            await self._async_run_local_fallback(payload, trace)
+        except ApiAuthError as e:
             _LOGGER.error(f"Fout tijdens aanroepen ClimaCore API: {e}")
+            trace.outcome, trace.error = "error", str(e)
         except Exception as e:
             _LOGGER.exception(f"Onverwachte fout in ClimaCore hoofdlogica: {e}")
+            trace.outcome, trace.error = "error", str(e)
         finally:
-            self._is_running = False
+            self.async_publish_status()
+
+    async def _async_run_local_fallback(self, payload: dict, trace: DecisionTrace) -> None:
+        """Beslis lokaal op basis van dezelfde payload als de Gateway had moeten krijgen."""
+        try:
+            response = decide_locally(payload)
+            self.decision_source = DECISION_SOURCE_LOCAL
+            trace.outcome, trace.response = DECISION_SOURCE_LOCAL, response
+            self.async_publish_status()
+
+            zone_results = {}
+            if actions := response.get("actions"):
+                with trace.stage(STAGE_ACTIONS):
+                    zone_results = await self._execute_actions(actions, payload.get("climate_zones", {}), trace)
+
+            _LOGGER.warning(f"Noodloop actief: lokaal berekend scenario '{response.get('scenario')}'.")
+            self._async_publish_decision(response, zone_results)
+        except Exception as e:
+            _LOGGER.exception(f"Onverwachte fout in de lokale noodloop: {e}")
 
     @callback
+    def _plan_preheat(self, zone, nu):
+        """Bereken (start, doel) van de voorverwarming van één zone, of None als die niet nodig is."""
+        target_datetime = nu.replace(
+            hour=zone.day_start_time.hour, minute=zone.day_start_time.minute,
+            second=zone.day_start_time.second, microsecond=0
+        )
+        if target_datetime <= nu:
+            # De dag van deze zone is al begonnen
+            return None
+
+        # Het weer rond de dagstart (uit de verwachting), niet het weer van nu
+        outdoor_temp, outdoor_humidity, weather_source = self.weather.conditions_between(nu, target_datetime)
+        band = weather_band(outdoor_temp, outdoor_humidity)
+
+        try: current_temp = float(self._get_state_attr(zone.climate_entities[0], "current_temperature", 18.0))
+        except (ValueError, TypeError): current_temp = 18.0
+        setpoint = self._snapshot.setpoints.get(zone.lookup_prefix, {}).get(f"dag_{band}", self._snapshot.fallback_temp)
+        gap = setpoint - current_temp
+        if gap <= 0:
+            _LOGGER.debug(f"Proactieve start {zone.name}: al {current_temp}°C (doel {setpoint}°C), geen voorverwarming nodig.")
+            return None
+
+        # Geleerde opwarmsnelheid (gecorrigeerd voor buitentemperatuur); de slider is de terugval
+        minutes_per_degree = self.learned_minutes_per_degree(zone.key, outdoor_temp)
+        source = "geleerd"
+        if minutes_per_degree is None:
+            minutes_per_degree = self._snapshot.minutes_per_degree
+            source = "slider"
+
+        start_datetime = target_datetime - timedelta(minutes=gap * minutes_per_degree)
+        _LOGGER.info(
+            f"Proactieve start {zone.name}: {current_temp}°C -> {setpoint}°C om {zone.day_start} "
+            f"({minutes_per_degree} min/°C, {source}; buiten {outdoor_temp}°C, {weather_source}), "
+            f"start om {start_datetime.strftime('%H:%M:%S')}."
+        )
+        return start_datetime, target_datetime
+
     async def async_trigger_proactive_start(self, *args):
+        """Bereken per zone wanneer de voorverwarming moet beginnen.
+
+        Volledig lokaal: elke zone gebruikt haar eigen dagstart, kamertemperatuur,
+        setpoint-groep en (geleerde) opwarmsnelheid, en krijgt een eigen boost-venster.
+        """
         _LOGGER.info("Proactieve Start Calculator trigger (04:00)...")
-        
-        weather_entity = self.options.get("weather_entity")
-        woonkamer_climate_entity = None
-        for i in range(1, 11):
-            zone_cfg = self.options.get(f"zone_{i}", {})
-            if zone_cfg.get("lookup_prefix") == "woonkamer":
-                if climate_entities := zone_cfg.get("climate_entities"):
-                    woonkamer_climate_entity = climate_entities[0]
-                    break
-        
-        if not woonkamer_climate_entity:
-            _LOGGER.error("Proactieve start geannuleerd: Geen climate entiteit gevonden met 'woonkamer' setpoint groep.")
+        snapshot = self._snapshot
+        if not snapshot.zones:
+            _LOGGER.error("Proactieve start geannuleerd: Geen zones met een climate entiteit geconfigureerd.")
             return
 
-        try: temp = float(self._get_state_attr(weather_entity, "temperature", 15.0))
-        except (ValueError, TypeError): temp = 15.0
-        try: hum = float(self._get_state_attr(weather_entity, "humidity", 50))
-        except (ValueError, TypeError): hum = 50.0
-        try: current_temp = float(self._get_state_attr(woonkamer_climate_entity, "current_temperature", 18.0))
-        except (ValueError, TypeError): current_temp = 18.0
-
-        sensors_payload = {"outdoor_temp": temp, "outdoor_humidity": hum, "current_indoor_temp": current_temp}
-        config_payload = {
-            "proactive_target_time": self.options.get("proactive_target_time", "06:00:00"),
-            "minutes_per_degree": self.options.get("minutes_per_degree", 30),
-            "temp_woonkamer_dag_fris": self.options.get("temp_woonkamer_dag_fris", 20.5),
-            "temp_woonkamer_dag_koud": self.options.get("temp_woonkamer_dag_koud", 21.0),
-            "temp_woonkamer_dag_mild_warm": self.options.get("temp_woonkamer_dag_mild_warm", 20.0),
-        }
-        payload = {"sensors": sensors_payload, "config": config_payload}
-        
         try:
-            response = await self.hass.async_add_executor_job(
-                self.api_client.trigger_proactive_start, payload
-            )
-            
-            start_tijd_str = response.get("calculated_start_time")
-            if not start_tijd_str:
-                _LOGGER.error(f"Proactieve start API gaf geen starttijd terug. Info: {response.get('info')}")
-                return
-            
-            _LOGGER.info(f"Proactieve start API berekend: start om {start_tijd_str}. Info: {response.get('info')}")
-            
-            start_tijd = time.fromisoformat(start_tijd_str)
-            vandaag = dt_util.now().date()
-            start_datetime = dt_util.as_local(dt_util.dt.datetime.combine(vandaag, start_tijd))
-            
-            # Huidige tijd ophalen
-            nu = dt_util.now()
+            # Uit de cache, of nu opgehaald als die verlopen is
+            await self.weather.async_forecast()
 
-            # --- DE CRUCIALE BOOST CONFIGURATIE ---
-            target_str = self.options.get("proactive_target_time", "06:00:00")
-            target_time = time.fromisoformat(target_str)
-            target_datetime = dt_util.as_local(dt_util.dt.datetime.combine(vandaag, target_time))
-
-            # Stel het window in, dit zorgt dat main_logic de tijd "simuleert"
-            self._boost_window = {
-                "start": start_datetime,
-                "end": target_datetime
-            }
-
-            # --- INTELLIGENTE TRIGGER LOGICA ---
-            # Situatie A: Starttijd is in de toekomst
-            if start_datetime > nu:
-                _LOGGER.info(f"Dynamische trigger ingesteld voor {start_datetime.isoformat()}")
-                async_track_time_change(
-                    self.hass, self.async_trigger_main_logic, 
-                    hour=start_datetime.hour, 
-                    minute=start_datetime.minute, 
-                    second=start_datetime.second
-                )
-
-            # Situatie B: Starttijd is in het verleden (Catch-up)
-            else:
-                _LOGGER.warning(f"Het is koud! Berekende starttijd ({start_tijd_str}) is al verstreken. We starten DIRECT.")
-                # Omdat self._boost_window hierboven al is ingesteld, zal main_logic nu correct "Ochtend" simuleren!
+            nu = dt_util.now()
+            for zone_key in self._boost_windows:
+                self.scheduler.async_cancel(f"boost_{zone_key}")
+            self._boost_windows = {}
+            catch_up = False
+
+            for zone in snapshot.zones:
+                plan = self._plan_preheat(zone, nu)
+                if plan is None:
+                    continue
+                start_datetime, target_datetime = plan
+                self._boost_windows[zone.key] = {"start": start_datetime, "end": target_datetime}
+
+                # --- INTELLIGENTE TRIGGER LOGICA ---
+                if start_datetime > nu:
+                    # Situatie A: Starttijd is in de toekomst
+                    _LOGGER.info(f"Dynamische trigger ingesteld voor {zone.name} om {start_datetime.isoformat()}")
+                    self.scheduler.async_schedule(f"boost_{zone.key}", start_datetime, self.async_trigger_main_logic)
+                else:
+                    # Situatie B: Starttijd is in het verleden (Catch-up)
+                    _LOGGER.warning(f"Het is koud! Berekende starttijd voor {zone.name} is al verstreken. We starten DIRECT.")
+                    catch_up = True
+
+            self._async_schedule_save()
+            if catch_up:
+                # Het boost-venster staat al klaar, dus main_logic laat de dag van die zones nu beginnen
                 await self.async_trigger_main_logic()
-                
-        except (ApiAuthError, ApiConnectionError, ApiTimeoutError) as e:
-            _LOGGER.error(f"Fout tijdens aanroepen Proactieve Start API: {e}")
+
         except Exception as e:
             _LOGGER.exception(f"Onverwachte fout in Proactieve Start logica: {e}")
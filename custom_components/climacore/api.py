@@ -1,9 +1,23 @@
 """API Client voor de ClimaCore Gateway."""
+import asyncio
+from abc import ABC, abstractmethod
 import requests
 import logging
 import json
+import random
+import time
 
-from .const import CLIMACORE_GATEWAY_URL
+import aiohttp
+
+from .const import (
+    CLIMACORE_GATEWAY_URL, MAX_CONCURRENT_REQUESTS,
+    API_TIMEOUT_MAIN_LOGIC, API_TIMEOUT_VALIDATE,
+    API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_CAP,
+    API_RETRY_BUDGET_RATIO, API_RETRY_BUDGET_MIN, API_RETRY_BUDGET_MAX,
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT,
+    PROTOCOL_V1, PROTOCOL_V2,
+)
+from .protocol import split_payload, config_hash, encode_body
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,8 +34,148 @@ class ApiAuthError(Exception):
     """Ongeldige activatiecode."""
     pass
 
-class ClimaCoreApiClient:
-    """De API Client die communiceert met de ClimaCore Gateway."""
+class ApiCircuitOpenError(ApiConnectionError):
+    """De circuit breaker staat open: de Gateway wordt niet aangeroepen."""
+    pass
+
+class ApiProtocolError(Exception):
+    """De Gateway ondersteunt dit protocol niet (terugval op v1)."""
+    pass
+
+class ApiConfigUnknownError(ApiProtocolError):
+    """Protocol v2: de Gateway kent deze config hash (nog) niet."""
+    pass
+
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker met half-open proberen.
+
+    - closed: alles gaat door; opeenvolgende fouten worden geteld.
+    - open: na `failure_threshold` fouten; aanroepen falen direct (geen timeout afwachten).
+    - half_open: na `reset_timeout` seconden mag precies één proef-aanroep door.
+      Slaagt die, dan sluit de breaker; faalt die, dan gaat hij weer open.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = BREAKER_CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.times_opened = 0
+        self.last_failure: str | None = None
+
+    @property
+    def state(self) -> str:
+        if self._state == BREAKER_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return BREAKER_HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == BREAKER_CLOSED:
+            return True
+        if state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state != BREAKER_CLOSED:
+            _LOGGER.info("Circuit breaker gesloten: ClimaCore Gateway reageert weer.")
+        self._state = BREAKER_CLOSED
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.total_successes += 1
+
+    def record_failure(self, error: Exception) -> None:
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self.last_failure = str(error)
+        if self._probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            if self._state != BREAKER_OPEN or self._probe_in_flight:
+                self.times_opened += 1
+                _LOGGER.warning(f"Circuit breaker open na {self.consecutive_failures} fouten. Gateway-aanroepen worden {self.reset_timeout}s overgeslagen.")
+            self._state = BREAKER_OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Geef de proef-aanroep vrij als die zonder uitslag eindigde (bv. geannuleerd)."""
+        self._probe_in_flight = False
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_successes": self.total_successes,
+            "times_opened": self.times_opened,
+            "last_failure": self.last_failure,
+        }
+
+
+class RetryBudget:
+    """Begrensd retry-budget (token bucket).
+
+    Elke aanroep spaart `ratio` token op; elke retry kost één token. Zo kan een
+    storing nooit meer dan ~`ratio` extra verkeer veroorzaken bovenop het normale.
+    """
+
+    def __init__(self, ratio: float = API_RETRY_BUDGET_RATIO, minimum: float = API_RETRY_BUDGET_MIN, maximum: float = API_RETRY_BUDGET_MAX):
+        self._ratio = ratio
+        self._maximum = maximum
+        self.tokens = float(minimum)
+
+    def deposit(self) -> None:
+        self.tokens = min(self._maximum, self.tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def backoff_delay(attempt: int, base: float = API_BACKOFF_BASE, cap: float = API_BACKOFF_CAP) -> float:
+    """Exponentiële backoff met 'full jitter'."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+MAIN_LOGIC_ENDPOINT = "/api/v1/main_logic"
+V2_PREFIX = "/api/v2/"
+MAIN_LOGIC_V2_ENDPOINT = f"{V2_PREFIX}main_logic"
+# Meerdere huizen in één round trip (zie batcher.py)
+MAIN_LOGIC_BATCH_ENDPOINT = f"{V2_PREFIX}batch/main_logic"
+# Statuscodes waarmee een oude Gateway laat weten dat hij v2 niet kent
+_V2_UNSUPPORTED_STATUS = (400, 404, 405, 415, 501)
+
+# Minimale payload voor de validatie-check.
+# De Gateway checkt de code in Firestore. Als die klopt, stuurt hij het door naar main-logic.
+# Main-logic zal waarschijnlijk een lege actielijst terugsturen (wat een 200 OK is).
+VALIDATION_PAYLOAD = {
+    "test_connection": True,
+    "sensors": {},
+    "config": {},
+    "persons": {},
+    "climate_zones": {},
+    "context": {"current_time": "12:00:00"}
+}
+
+
+class _BaseApiClient(ABC):
+    """Gedeelde logica voor de async en de (legacy) synchrone client.
+
+    Beide clients bieden dezelfde async interface aan de coordinator, zodat
+    de coordinator niet hoeft te weten welke transport-modus actief is.
+    """
 
     def __init__(self, activation_code: str, gateway_url: str = CLIMACORE_GATEWAY_URL):
         """Initialiseer de API client."""
@@ -32,6 +186,246 @@ class ClimaCoreApiClient:
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        self.breaker = CircuitBreaker()
+        self.retry_budget = RetryBudget()
+        self.protocol = PROTOCOL_V1
+
+    def _build_body(self, payload: dict) -> dict:
+        return {
+            "activation_code": self._activation_code,
+            "payload": payload
+        }
+
+    @abstractmethod
+    async def _async_make_request(self, endpoint: str, payload: dict, timeout: int) -> dict:
+        """Eén HTTP-aanroep naar de Gateway (transport-specifiek)."""
+
+    async def _async_request(self, endpoint: str, payload: dict, timeout: int) -> dict:
+        """Eén logische aanroep: circuit breaker, retry budget en backoff rond `_async_make_request`."""
+        # Geen await tussen deze twee: de status hoort bij precies deze toelating
+        probe = self.breaker.state == BREAKER_HALF_OPEN
+        if not self.breaker.allow_request():
+            raise ApiCircuitOpenError("Circuit breaker staat open: ClimaCore Gateway tijdelijk overgeslagen.")
+
+        self.retry_budget.deposit()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = await self._async_make_request(endpoint, payload, timeout)
+                except (ApiAuthError, ApiProtocolError):
+                    # De Gateway antwoordde wel; de verbinding is dus gezond.
+                    self.breaker.record_success()
+                    raise
+                except (ApiConnectionError, ApiTimeoutError) as e:
+                    probing = self.breaker.state != BREAKER_CLOSED
+                    if probing or attempt >= API_MAX_RETRIES or not self.retry_budget.withdraw():
+                        self.breaker.record_failure(e)
+                        raise
+                    delay = backoff_delay(attempt)
+                    attempt += 1
+                    _LOGGER.debug(f"Gateway-aanroep {endpoint} mislukt ({e}). Poging {attempt + 1} over {delay:.1f}s.")
+                    await asyncio.sleep(delay)
+                    continue
+                except Exception as e:
+                    # Onverwacht (bv. een fout bij het coderen van de body): telt als mislukte aanroep
+                    self.breaker.record_failure(e)
+                    raise
+                self.breaker.record_success()
+                return result
+        finally:
+            if probe:
+                # Geannuleerd (CancelledError) of anderszins zonder uitslag: de breaker mag opnieuw proberen
+                self.breaker.release_probe()
+
+    async def async_validate_activation_code(self) -> str:
+        """Valideert de activatiecode door een dummy-request naar de Gateway te sturen."""
+        try:
+            # Korte timeout voor de validatie-check
+            await self._async_request(MAIN_LOGIC_ENDPOINT, VALIDATION_PAYLOAD, timeout=API_TIMEOUT_VALIDATE)
+            _LOGGER.info("Activatiecode succesvol gevalideerd.")
+            return "valid"
+        except ApiAuthError:
+            return "invalid_auth"
+        except ApiTimeoutError:
+            return "timeout"
+        except ApiConnectionError:
+            # Geen 403, dus de code is waarschijnlijk geldig, maar de backend faalde (bv. 500).
+            return "cannot_connect"
+        except Exception:
+            return "unknown"
+
+    async def async_trigger_main_logic(self, payload: dict) -> dict:
+        """Roept de hoofdlogica (Het Brein) aan in de cloud."""
+        _LOGGER.debug("API-aanroep: trigger_main_logic")
+        return await self._async_request(MAIN_LOGIC_ENDPOINT, payload, timeout=API_TIMEOUT_MAIN_LOGIC)
+
+
+class ClimaCoreApiClient(_BaseApiClient):
+    """De async API Client die communiceert met de ClimaCore Gateway.
+
+    Gebruikt de gedeelde aiohttp sessie van Home Assistant, zodat verbindingen
+    (TCP + TLS) hergebruikt worden tussen aanroepen. Een semaphore begrenst het
+    aantal gelijktijdige verzoeken naar de Gateway.
+
+    De hoofdlogica gaat standaard via protocol v2 (zie protocol.py): de statische
+    config alleen als de Gateway de hash nog niet kent, en een gzip-body. Kent de
+    Gateway v2 niet, dan schakelt de client (tot de volgende herstart) terug naar v1.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        activation_code: str,
+        gateway_url: str = CLIMACORE_GATEWAY_URL,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        protocol: int = PROTOCOL_V2,
+    ):
+        """Initialiseer de API client."""
+        super().__init__(activation_code, gateway_url)
+        self._session = session
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.protocol = protocol
+        # Protocol v2: laatst berekende (statisch deel, hash) en de hash die de Gateway kent
+        self._static_cache: tuple[dict, str] | None = None
+        self._acked_config_hash: str | None = None
+        self.bytes_sent = 0
+        # Gedeelde batcher als er meerdere huizen (config entries) actief zijn
+        self.batcher = None
+
+    @property
+    def activation_code(self) -> str:
+        return self._activation_code
+
+    def _get_config_hash(self, static: dict) -> str:
+        # Vergelijken is goedkoper dan opnieuw serialiseren en hashen
+        if self._static_cache is None or self._static_cache[0] != static:
+            self._static_cache = (static, config_hash(static))
+        return self._static_cache[1]
+
+    async def async_trigger_main_logic(self, payload: dict) -> dict:
+        """Roept de hoofdlogica aan; via protocol v2 als de Gateway dat ondersteunt."""
+        if self.protocol == PROTOCOL_V2:
+            try:
+                return await self._async_trigger_main_logic_v2(payload)
+            except ApiProtocolError as e:
+                _LOGGER.warning(f"Gateway ondersteunt protocol v2 niet ({e}). Terugval op het v1 formaat.")
+                self.protocol = PROTOCOL_V1
+                self._acked_config_hash = None
+        return await super().async_trigger_main_logic(payload)
+
+    async def _async_trigger_main_logic_v2(self, payload: dict) -> dict:
+        _LOGGER.debug("API-aanroep: trigger_main_logic (v2)")
+        static, dynamic = split_payload(payload)
+        current_hash = self._get_config_hash(static)
+        body = {"protocol": PROTOCOL_V2, "config_hash": current_hash, "state": dynamic}
+        if current_hash != self._acked_config_hash:
+            body["config"] = static
+
+        try:
+            response = await self._async_send_v2(body)
+        except ApiConfigUnknownError:
+            if "config" in body:
+                raise
+            # De Gateway is de config kwijt (bv. herstart): één keer opnieuw, mét config
+            _LOGGER.debug(f"Gateway kent config hash {current_hash} niet meer. Config opnieuw meesturen.")
+            body["config"] = static
+            response = await self._async_send_v2(body)
+
+        self._acked_config_hash = current_hash
+        return response
+
+    async def _async_send_v2(self, body: dict) -> dict:
+        # Alleen met een gesloten breaker via de batcher; een proef-aanroep (half-open) gaat altijd apart
+        if self.batcher is not None and self.batcher.active and self.breaker.state == BREAKER_CLOSED:
+            return await self.batcher.async_submit(self, body)
+        return await self.async_request_v2(body)
+
+    async def async_request_v2(self, body: dict) -> dict:
+        """Eén v2-aanroep voor alleen dit huis, met de eigen breaker en retries."""
+        return await self._async_request(MAIN_LOGIC_V2_ENDPOINT, body, timeout=API_TIMEOUT_MAIN_LOGIC)
+
+    async def _async_make_request(self, endpoint: str, payload: dict, timeout: int = 15) -> dict:
+        """Stuur een verzoek naar een endpoint, zonder executor-thread."""
+        if endpoint == MAIN_LOGIC_V2_ENDPOINT:
+            data = encode_body({"activation_code": self._activation_code, **payload})
+            headers = {**self._headers, "Content-Encoding": "gzip"}
+        else:
+            data = json.dumps(self._build_body(payload)).encode("utf-8")
+            headers = self._headers
+        self.bytes_sent += len(data)
+
+        async with self._semaphore:
+            return await async_post(self._session, self._gateway_url, endpoint, data, headers, timeout)
+
+
+def error_for_status(endpoint: str, status: int, error_text: str = "") -> Exception:
+    """Vertaal een foutstatus van de Gateway naar de bijbehorende exceptie."""
+    if status == 403:
+        _LOGGER.error("Activatiecode is ongeldig of verlopen (403 Forbidden).")
+        return ApiAuthError("Activatiecode ongeldig.")
+
+    if endpoint.startswith(V2_PREFIX):
+        if status == 409:
+            return ApiConfigUnknownError("Config hash onbekend bij de Gateway.")
+        if status in _V2_UNSUPPORTED_STATUS:
+            return ApiProtocolError(f"Status {status} op {endpoint}")
+
+    _LOGGER.error(f"Gateway gaf onverwachte status: {status}, {error_text}")
+    return ApiConnectionError(f"Onverwachte fout van de Gateway: {status}")
+
+
+async def async_post(
+    session: aiohttp.ClientSession, gateway_url: str, endpoint: str, data: bytes, headers: dict, timeout: int
+) -> dict:
+    """Eén POST naar de Gateway; fouten worden vertaald naar de Api*-excepties."""
+    url = f"{gateway_url}{endpoint}"
+    try:
+        async with session.post(
+            url,
+            data=data,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            if response.status == 200:
+                try:
+                    return await response.json(content_type=None)
+                except (aiohttp.ContentTypeError, json.JSONDecodeError) as e:
+                    _LOGGER.error(f"Gateway gaf 200 OK, maar response was geen JSON. {e}")
+                    raise ApiConnectionError("Gateway gaf 200 OK, maar response was geen JSON.")
+
+            raise error_for_status(endpoint, response.status, await response.text())
+
+    except (ApiAuthError, ApiConnectionError, ApiProtocolError):
+        raise
+
+    except asyncio.TimeoutError:
+        _LOGGER.error(f"Timeout bij verbinden met ClimaCore Gateway ({url})")
+        raise ApiTimeoutError("Verbinding met de ClimaCore Gateway time-out.")
+
+    except aiohttp.ClientError as e:
+        _LOGGER.error(f"Fout bij verbinden met ClimaCore Gateway: {e}")
+        raise ApiConnectionError(f"Verbindingsfout: {e}")
+
+    except Exception as e:
+        _LOGGER.error(f"Onverwachte fout in async_post: {e}")
+        raise ApiConnectionError(f"Onverwachte fout in API client: {e}")
+
+
+class ClimaCoreSyncApiClient(_BaseApiClient):
+    """Compatibiliteitsmodus: de oorspronkelijke blokkerende `requests` client.
+
+    Elke aanroep loopt via een executor-thread en opent een nieuwe verbinding.
+    Alleen bedoeld voor installaties waar de gedeelde aiohttp sessie problemen geeft.
+    """
+
+    def __init__(self, hass, activation_code: str, gateway_url: str = CLIMACORE_GATEWAY_URL):
+        """Initialiseer de API client."""
+        super().__init__(activation_code, gateway_url)
+        self._hass = hass
+
+    async def _async_make_request(self, endpoint: str, payload: dict, timeout: int = 15) -> dict:
+        return await self._hass.async_add_executor_job(self._make_request, endpoint, payload, timeout)
 
     def _make_request(self, endpoint: str, payload: dict, timeout: int = 15) -> dict:
         """
@@ -39,15 +433,10 @@ class ClimaCoreApiClient:
         Deze functie is *synchroon* en moet via hass.async_add_executor_job worden aangeroepen.
         """
         url = f"{self._gateway_url}{endpoint}"
-        
-        data_to_send = {
-            "activation_code": self._activation_code,
-            "payload": payload
-        }
 
         # --- AANGEPAST: Robuustere foutafhandeling ---
         try:
-            response = requests.post(url, json=data_to_send, headers=self._headers, timeout=timeout)
+            response = requests.post(url, json=self._build_body(payload), headers=self._headers, timeout=timeout)
 
             if response.status_code == 200:
                 # Probeer JSON te parsen
@@ -60,7 +449,7 @@ class ClimaCoreApiClient:
             elif response.status_code == 403:
                 _LOGGER.error("Activatiecode is ongeldig of verlopen (403 Forbidden).")
                 raise ApiAuthError("Activatiecode ongeldig.")
-            
+
             else:
                 # Probeer de fout-JSON van de gateway te loggen
                 try:
@@ -68,67 +457,23 @@ class ClimaCoreApiClient:
                     _LOGGER.error(f"Gateway gaf onverwachte status: {response.status_code}, {error_json}")
                 except requests.exceptions.JSONDecodeError:
                     _LOGGER.error(f"Gateway gaf onverwachte status: {response.status_code}, {response.text}")
-                
+
                 raise ApiConnectionError(f"Onverwachte fout van de Gateway: {response.status_code}")
 
+        except (ApiAuthError, ApiConnectionError):
+            raise
+
         except requests.exceptions.Timeout:
             _LOGGER.error(f"Timeout bij verbinden met ClimaCore Gateway ({url})")
             raise ApiTimeoutError("Verbinding met de ClimaCore Gateway time-out.")
-        
+
         except requests.exceptions.RequestException as e:
             _LOGGER.error(f"Fout bij verbinden met ClimaCore Gateway: {e}")
             raise ApiConnectionError(f"Verbindingsfout: {e}")
-            
+
         except Exception as e:
             # vang alle andere mogelijke fouten af (zoals bugs in de code hierboven)
             _LOGGER.error(f"Onverwachte fout in _make_request: {e}")
             # We raisen ApiConnectionError zodat de config flow het snapt
             raise ApiConnectionError(f"Onverwachte fout in API client: {e}")
         # --- EINDE AANPASSING ---
-
-    def validate_activation_code(self) -> str:
-        """
-        Valideert de activatiecode door een dummy-request naar de Gateway te sturen.
-        """
-        # We gebruiken een minimale 'test' payload.
-        # De Gateway checkt de code in Firestore. Als die klopt, stuurt hij het door naar main-logic.
-        # Main-logic zal waarschijnlijk een lege actielijst terugsturen (wat een 200 OK is).
-        test_payload = {
-            "test_connection": True,
-            "sensors": {},
-            "config": {},
-            "persons": {},
-            "climate_zones": {},
-            "context": {"current_time": "12:00:00"}
-        }
-
-        try:
-            # Korte timeout voor de validatie-check
-            self._make_request("/api/v1/main_logic", payload=test_payload, timeout=10)
-            _LOGGER.info("Activatiecode succesvol gevalideerd.")
-            return "valid"
-            
-        except ApiAuthError:
-            return "invalid_auth"
-        except ApiTimeoutError:
-            return "timeout"
-        except ApiConnectionError:
-            # Als we hier komen, is de code waarschijnlijk WEL geldig (want geen 403),
-            # maar faalde de backend (bv. 500 error).
-            # Voor installatie-doeleinden kunnen we dit als 'cannot_connect' markeren
-            # zodat de gebruiker het opnieuw probeert.
-            return "cannot_connect"
-        except Exception:
-            return "unknown"
-
-
-    def trigger_main_logic(self, payload: dict) -> dict:
-        """Roept de hoofdlogica (Het Brein) aan in de cloud."""
-        _LOGGER.debug("API-aanroep: trigger_main_logic")
-        # Standaard timeout van 30 seconden voor de 'echte' logica
-        return self._make_request("/api/v1/main_logic", payload, timeout=30)
-
-    def trigger_proactive_start(self, payload: dict) -> dict:
-        """Roept de proactieve start calculator aan in de cloud."""
-        _LOGGER.debug("API-aanroep: trigger_proactive_start")
-        return self._make_request("/api/v1/proactive_start", payload, timeout=30)
\ No newline at end of file
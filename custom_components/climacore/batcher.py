@@ -0,0 +1,165 @@
+"""Eén Gateway round trip voor meerdere huizen (config entries) tegelijk.
+
+Elke coordinator houdt zijn eigen API client, circuit breaker en retries. Alleen
+de v2 hoofdlogica-aanroepen van clients met een gesloten breaker komen hier
+binnen; wat binnen `BATCH_WINDOW_SECONDS` samenvalt, gaat als één verzoek naar
+het batch-endpoint. De Gateway antwoordt per huis met een eigen status, dus een
+fout bij het ene huis raakt het andere niet:
+
+- 200: het antwoord gaat naar dat huis.
+- 403 / 409: dezelfde exceptie als bij een losse aanroep (ongeldige code, hash onbekend).
+- Iets anders (ook een ongeldig resultaat), of de hele batch mislukt: dat huis
+  doet alsnog een losse aanroep, met zijn eigen retries en breaker. Alleen de
+  status van het batch-endpoint zelf zegt of de Gateway bundelen kent.
+
+Kent de Gateway het batch-endpoint niet, dan valt de batcher (tot de volgende
+herstart) terug op losse aanroepen.
+"""
+import asyncio
+import logging
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import CLIMACORE_GATEWAY_URL, BATCH_WINDOW_SECONDS, API_TIMEOUT_MAIN_LOGIC, PROTOCOL_V2
+from .protocol import encode_body
+from .api import (
+    ClimaCoreApiClient, MAIN_LOGIC_BATCH_ENDPOINT, MAIN_LOGIC_V2_ENDPOINT,
+    async_post, error_for_status,
+    ApiAuthError, ApiConnectionError, ApiTimeoutError, ApiProtocolError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class GatewayBatcher:
+    """Bundelt gelijktijdige hoofdlogica-aanroepen van meerdere huizen."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: aiohttp.ClientSession,
+        gateway_url: str = CLIMACORE_GATEWAY_URL,
+        window: float = BATCH_WINDOW_SECONDS,
+    ):
+        self.hass = hass
+        self._session = session
+        self._gateway_url = gateway_url.rstrip('/')
+        self._window = window
+        self._clients: set[ClimaCoreApiClient] = set()
+        self._queue: list[tuple[ClimaCoreApiClient, dict, asyncio.Future]] = []
+        self._flush_unsub: CALLBACK_TYPE | None = None
+        self.supported = True
+        # Tellers voor diagnose
+        self.batches_sent = 0
+        self.requests_batched = 0
+
+    @property
+    def active(self) -> bool:
+        """Bundelen heeft pas zin vanaf twee huizen, en alleen als de Gateway het kent."""
+        return self.supported and len(self._clients) > 1
+
+    def register(self, client: ClimaCoreApiClient) -> None:
+        self._clients.add(client)
+        client.batcher = self
+
+    def unregister(self, client: ClimaCoreApiClient) -> bool:
+        """Meld een client af; geeft True als er geen clients meer over zijn."""
+        self._clients.discard(client)
+        client.batcher = None
+        return not self._clients
+
+    async def async_submit(self, client: ClimaCoreApiClient, body: dict) -> dict:
+        future = self.hass.loop.create_future()
+        self._queue.append((client, body, future))
+        if len(self._queue) >= len(self._clients):
+            # Alle huizen zijn binnen: niet op het venster wachten
+            self._async_flush()
+        elif self._flush_unsub is None:
+            self._flush_unsub = async_call_later(self.hass, self._window, self._async_flush_timer)
+        return await future
+
+    @callback
+    def _async_flush_timer(self, _now) -> None:
+        self._flush_unsub = None
+        self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        if self._flush_unsub:
+            self._flush_unsub()
+            self._flush_unsub = None
+        items, self._queue = self._queue, []
+        if items:
+            self.hass.async_create_task(self._async_send(items))
+
+    async def _async_send(self, items: list) -> None:
+        results: list = [None] * len(items)
+        if len(items) > 1 and self.supported:
+            try:
+                results = await self._async_post_batch(items)
+                self.batches_sent += 1
+                self.requests_batched += len(items)
+            except ApiProtocolError as e:
+                _LOGGER.info(f"Gateway ondersteunt geen gebundelde aanroepen ({e}). Elk huis belt weer apart.")
+                self.supported = False
+            except (ApiAuthError, ApiConnectionError, ApiTimeoutError) as e:
+                _LOGGER.debug(f"Gebundelde Gateway-aanroep mislukt ({e}). Huizen worden apart aangeroepen.")
+
+        await asyncio.gather(*(
+            self._async_resolve(client, body, future, result)
+            for (client, body, future), result in zip(items, results)
+        ))
+
+    async def _async_post_batch(self, items: list) -> list:
+        _LOGGER.debug(f"Gebundelde Gateway-aanroep voor {len(items)} huizen.")
+        data = encode_body({
+            "protocol": PROTOCOL_V2,
+            "requests": [{"activation_code": client.activation_code, **body} for client, body, _future in items],
+        })
+        headers = {"Content-Type": "application/json", "Accept": "application/json", "Content-Encoding": "gzip"}
+        response = await async_post(
+            self._session, self._gateway_url, MAIN_LOGIC_BATCH_ENDPOINT, data, headers, API_TIMEOUT_MAIN_LOGIC
+        )
+        results = response.get("results") if isinstance(response, dict) else None
+        if not isinstance(results, list) or len(results) != len(items):
+            raise ApiConnectionError("Batch-antwoord van de Gateway past niet bij het verzoek.")
+        return results
+
+    async def _async_resolve(self, client: ClimaCoreApiClient, body: dict, future: asyncio.Future, result: object) -> None:
+        if future.done():
+            return
+        if isinstance(result, dict):
+            status = result.get("status")
+            if status == 200:
+                client.breaker.record_success()
+                future.set_result(result.get("response") or {})
+                return
+            if status in (403, 409):
+                # De Gateway gaf een inhoudelijk antwoord voor dit huis. Andere statussen
+                # zeggen niets over het protocol (alleen die van de batch zelf): los aanroepen.
+                client.breaker.record_success()
+                future.set_exception(error_for_status(MAIN_LOGIC_V2_ENDPOINT, status, result.get("error", "")))
+                return
+        elif result is not None:
+            _LOGGER.debug(f"Ongeldig batch-resultaat voor een huis ({type(result).__name__}). Losse aanroep.")
+
+        # Geen bruikbaar antwoord voor dit huis: los aanroepen, met eigen retries en breaker
+        try:
+            response = await client.async_request_v2(body)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(response)
+
+    def as_dict(self) -> dict:
+        return {
+            "homes": len(self._clients),
+            "supported": self.supported,
+            "batches_sent": self.batches_sent,
+            "requests_batched": self.requests_batched,
+        }
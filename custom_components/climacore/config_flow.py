@@ -1,26 +1,38 @@
 """Config flow voor ClimaCore."""
+import hashlib
 import voluptuous as vol
 import logging
+import uuid
 from typing import Any, Dict
 
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigFlow, ConfigEntry, OptionsFlow
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import selector
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN, CONF_ACTIVATION_CODE
+from .const import (
+    DOMAIN, CONF_ACTIVATION_CODE, CONF_HOME_NAME, CONF_API_MODE, API_MODE_ASYNC, API_MODE_SYNC, DEFAULT_WINDOW_DEBOUNCE,
+    SETPOINT_GROUPS, SETPOINT_SCENARIOS, BACKEND_CONCURRENCY, CONF_ZONES, CONF_ZONE_ID
+)
 from .api import ClimaCoreApiClient, ApiAuthError, ApiConnectionError
 
 _LOGGER = logging.getLogger(__name__)
 
-SETPOINT_GROUPS = ["woonkamer", "badkamer", "keuken", "slaapkamer_1", "slaapkamer_2", "slaapkamer_3"]
+def activation_code_unique_id(activation_code: str) -> str:
+    """De unique_id van een huis: een hash van de activatiecode, zodat de code zelf niet als id in .storage staat."""
+    return hashlib.sha256(activation_code.encode("utf-8")).hexdigest()[:16]
+
+
+# Keuze in het zone-menu voor het toevoegen van een zone
+NEW_ZONE = "__new__"
 
 # --- SCHEMA'S ---
 def _get_general_schema(options: dict) -> vol.Schema:
     return vol.Schema({
-        vol.Required("proactive_target_time", default=options.get("proactive_target_time", "06:00:00")): selector.TimeSelector(),
         vol.Required("night_start_time", default=options.get("night_start_time", "23:00:00")): selector.TimeSelector(),
         vol.Required("minutes_per_degree", default=options.get("minutes_per_degree", 30.0)): selector.NumberSelector({"min": 5.0, "max": 90.0, "step": 1.0, "mode": "slider", "unit_of_measurement": "min/°C"}),
+        vol.Required(CONF_API_MODE, default=options.get(CONF_API_MODE, API_MODE_ASYNC)): selector.SelectSelector(selector.SelectSelectorConfig(options=[API_MODE_ASYNC, API_MODE_SYNC], mode=selector.SelectSelectorMode.DROPDOWN)),
     })
 
 def _get_entities_schema(options: dict) -> vol.Schema:
@@ -30,7 +42,11 @@ def _get_entities_schema(options: dict) -> vol.Schema:
         vol.Optional("wifi_tracker_sensors", description="Selecteer de Wi-Fi verbinding sensoren", default=options.get("wifi_tracker_sensors", [])): selector.EntitySelector({"domain": "sensor", "multiple": True}),
         vol.Required("gasten_entity", default=options.get("gasten_entity")): selector.EntitySelector({"domain": "input_boolean"}),
         vol.Required("onderweg_entity", default=options.get("onderweg_entity")): selector.EntitySelector({"domain": "input_boolean"}),
-        vol.Required("systeem_keuze_direct", default=options.get("systeem_keuze_direct", "Ambisense/MyPyllant")): selector.SelectSelector(selector.SelectSelectorConfig(options=["Ambisense/MyPyllant", "Zigbee/Lokaal"], mode=selector.SelectSelectorMode.DROPDOWN)),
+        vol.Required("systeem_keuze_direct", default=options.get("systeem_keuze_direct", "Ambisense/MyPyllant")): selector.SelectSelector(selector.SelectSelectorConfig(options=list(BACKEND_CONCURRENCY), mode=selector.SelectSelectorMode.DROPDOWN)),
+        **{
+            vol.Required(key, default=options.get(key, default)): selector.NumberSelector({"min": 1, "max": 10, "step": 1, "mode": "slider"})
+            for key, default in BACKEND_CONCURRENCY.values()
+        },
     })
 
 def _get_persons_schema(options: dict) -> vol.Schema:
@@ -50,13 +66,14 @@ def _get_fallback_schema(options: dict) -> vol.Schema:
         vol.Required("fallback_temp", default=options.get("fallback_temp", 18.0)): selector.NumberSelector({"min": 10.0, "max": 25.0, "step": 0.5, "mode": "slider", "unit_of_measurement": "°C"}),
     })
 
-def _get_zone_schema_generic(zone_data: dict, zone_slot_key: str) -> vol.Schema:
+def _get_zone_schema_generic(zone_data: dict) -> vol.Schema:
     return vol.Schema({
         vol.Optional("zone_name", default=zone_data.get("zone_name", "")): selector.TextSelector(),
         vol.Optional("climate_entities", default=zone_data.get("climate_entities", [])): selector.EntitySelector(selector.EntitySelectorConfig(domain="climate", multiple=True)),
         vol.Required("day_start", default=zone_data.get("day_start", "06:00:00")): selector.TimeSelector(),
         vol.Required("night_start", default=zone_data.get("night_start", "22:00:00")): selector.TimeSelector(),
         vol.Optional("window_sensors", default=zone_data.get("window_sensors", [])): selector.EntitySelector(selector.EntitySelectorConfig(domain="binary_sensor", multiple=True)),
+        vol.Required("window_debounce", default=zone_data.get("window_debounce", DEFAULT_WINDOW_DEBOUNCE)): selector.NumberSelector({"min": 0, "max": 300, "step": 5, "mode": "slider", "unit_of_measurement": "s"}),
         vol.Required("lookup_prefix", default=zone_data.get("lookup_prefix", "woonkamer")): selector.SelectSelector(selector.SelectSelectorConfig(options=SETPOINT_GROUPS, mode=selector.SelectSelectorMode.DROPDOWN)),
     })
 
@@ -69,32 +86,35 @@ def _get_setpoints_schema(options: dict, prefix: str) -> vol.Schema:
     elif "slaapkamer" in prefix: current_defaults = defaults_bedroom
     else: current_defaults = defaults_living
 
-    scenarios = ["afwezig", "voorverwarming", "dag_fris", "dag_koud", "dag_mild_warm", "nacht_fris", "nacht_koud", "nacht_mild_warm"]
     schema_dict = {}
-    for scenario in scenarios:
+    for scenario in SETPOINT_SCENARIOS:
         key = f"temp_{prefix}_{scenario}"
         default_val = options.get(key, current_defaults[scenario])
         schema_dict[vol.Required(key, default=default_val)] = selector.NumberSelector({"min": 10.0, "max": 25.0, "step": 0.5, "mode": "slider", "unit_of_measurement": "°C"})
     return vol.Schema(schema_dict)
 
 # --- INSTALLATIE FLOW ---
-STEP_USER_DATA_SCHEMA = vol.Schema({vol.Required(CONF_ACTIVATION_CODE): str})
+STEP_USER_DATA_SCHEMA = vol.Schema({
+    vol.Required(CONF_ACTIVATION_CODE): str,
+    # Meerdere huizen per HA instantie: de naam onderscheidt ze (apparaat en entry-titel)
+    vol.Optional(CONF_HOME_NAME, default="ClimaCore"): str,
+})
 
 async def validate_input(hass: HomeAssistant, data: dict) -> dict:
-    api_client = ClimaCoreApiClient(data[CONF_ACTIVATION_CODE])
+    api_client = ClimaCoreApiClient(async_get_clientsession(hass), data[CONF_ACTIVATION_CODE])
     try:
-        validation_status = await hass.async_add_executor_job(api_client.validate_activation_code)
+        validation_status = await api_client.async_validate_activation_code()
     except Exception as e:
         _LOGGER.error(f"Onbekende validatiefout: {e}")
         raise InvalidAuth("unknown")
     
-    if validation_status == "valid": return {"title": "ClimaCore"}
+    if validation_status == "valid": return {"title": data.get(CONF_HOME_NAME) or "ClimaCore"}
     elif validation_status == "invalid_auth": raise InvalidAuth("invalid_auth")
     elif validation_status == "cannot_connect": raise ApiConnectionError("cannot_connect")
     else: raise Exception(f"Validatie mislukt: {validation_status}")
 
 class ClimaCoreConfigFlow(ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    VERSION = 4
     @staticmethod
     @callback
     def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
@@ -103,10 +123,11 @@ class ClimaCoreConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None):
         errors = {}
         if user_input is not None:
+            # Eén entry per activatiecode (dus per huis); dubbel koppelen heeft geen zin
+            await self.async_set_unique_id(activation_code_unique_id(user_input[CONF_ACTIVATION_CODE]))
+            self._abort_if_unique_id_configured()
             try:
                 info = await validate_input(self.hass, user_input)
-                await self.async_set_unique_id(DOMAIN)
-                self._abort_if_unique_id_configured()
                 return self.async_create_entry(title=info["title"], data=user_input)
             except InvalidAuth: errors["base"] = "invalid_auth"
             except ApiConnectionError: errors["base"] = "cannot_connect"
@@ -118,7 +139,7 @@ class ClimaCoreConfigFlow(ConfigFlow, domain=DOMAIN):
 class ClimaCoreOptionsFlow(OptionsFlow):
     def __init__(self, config_entry: ConfigEntry):
         self.options: Dict[str, Any] = {}
-        self.current_zone_slot: str = "" 
+        self.current_zone_id: str = NEW_ZONE
 
     async def async_step_init(self, user_input: Dict[str, Any] = None):
         # ALTIJD verversen vanaf de source-of-truth
@@ -129,52 +150,79 @@ class ClimaCoreOptionsFlow(OptionsFlow):
             "fallback": "Stap 7: Noodloop (Fallback)", "setpoints": "Stap 8: Setpoint Groepen"
         })
 
-    async def async_step_general(self, user_input=None): return await self._async_show_form_step(user_input, "general", _get_general_schema, False)
-    async def async_step_entities(self, user_input=None): return await self._async_show_form_step(user_input, "entities", _get_entities_schema, False)
-    async def async_step_persons(self, user_input=None): return await self._async_show_form_step(user_input, "persons", _get_persons_schema, False)
-    async def async_step_fallback(self, user_input=None): return await self._async_show_form_step(user_input, "fallback", _get_fallback_schema, False)
+    async def async_step_general(self, user_input=None): return await self._async_show_form_step(user_input, "general", _get_general_schema)
+    async def async_step_entities(self, user_input=None): return await self._async_show_form_step(user_input, "entities", _get_entities_schema)
+    async def async_step_persons(self, user_input=None): return await self._async_show_form_step(user_input, "persons", _get_persons_schema)
+    async def async_step_fallback(self, user_input=None): return await self._async_show_form_step(user_input, "fallback", _get_fallback_schema)
     
     async def async_step_zone_config(self, user_input: Dict[str, Any] = None):
         # ALTIJD verversen om zeker te zijn dat we de nieuwste zone-namen zien
         self.options = dict(self.config_entry.options)
-        opts = {f"zone_{i}": f"Zone {i}: {self.options.get(f'zone_{i}', {}).get('zone_name', '')}" or f"Zone {i}" for i in range(1, 11)}
-        return self.async_show_menu(step_id="zone_config", menu_options=opts)
-
-    async def async_step_zone_1(self, user_input=None): self.current_zone_slot="zone_1"; return await self._async_show_form_step(user_input, "zone_1", _get_zone_schema_generic, True, "zone_1")
-    async def async_step_zone_2(self, user_input=None): self.current_zone_slot="zone_2"; return await self._async_show_form_step(user_input, "zone_2", _get_zone_schema_generic, True, "zone_2")
-    async def async_step_zone_3(self, user_input=None): self.current_zone_slot="zone_3"; return await self._async_show_form_step(user_input, "zone_3", _get_zone_schema_generic, True, "zone_3")
-    async def async_step_zone_4(self, user_input=None): self.current_zone_slot="zone_4"; return await self._async_show_form_step(user_input, "zone_4", _get_zone_schema_generic, True, "zone_4")
-    async def async_step_zone_5(self, user_input=None): self.current_zone_slot="zone_5"; return await self._async_show_form_step(user_input, "zone_5", _get_zone_schema_generic, True, "zone_5")
-    async def async_step_zone_6(self, user_input=None): self.current_zone_slot="zone_6"; return await self._async_show_form_step(user_input, "zone_6", _get_zone_schema_generic, True, "zone_6")
-    async def async_step_zone_7(self, user_input=None): self.current_zone_slot="zone_7"; return await self._async_show_form_step(user_input, "zone_7", _get_zone_schema_generic, True, "zone_7")
-    async def async_step_zone_8(self, user_input=None): self.current_zone_slot="zone_8"; return await self._async_show_form_step(user_input, "zone_8", _get_zone_schema_generic, True, "zone_8")
-    async def async_step_zone_9(self, user_input=None): self.current_zone_slot="zone_9"; return await self._async_show_form_step(user_input, "zone_9", _get_zone_schema_generic, True, "zone_9")
-    async def async_step_zone_10(self, user_input=None): self.current_zone_slot="zone_10"; return await self._async_show_form_step(user_input, "zone_10", _get_zone_schema_generic, True, "zone_10")
+        if user_input is not None:
+            self.current_zone_id = user_input["zone"]
+            return await self.async_step_zone()
+
+        zones = self.options.get(CONF_ZONES, [])
+        choices = [
+            selector.SelectOptionDict(value=zone[CONF_ZONE_ID], label=f"Zone {i}: {zone.get('zone_name') or '-'}")
+            for i, zone in enumerate(zones, start=1)
+        ]
+        choices.append(selector.SelectOptionDict(value=NEW_ZONE, label="➕ Nieuwe zone toevoegen"))
+        schema = vol.Schema({
+            vol.Required("zone", default=NEW_ZONE if not zones else zones[0][CONF_ZONE_ID]): selector.SelectSelector(
+                selector.SelectSelectorConfig(options=choices, mode=selector.SelectSelectorMode.LIST)
+            ),
+        })
+        return self.async_show_form(step_id="zone_config", data_schema=schema)
+
+    async def async_step_zone(self, user_input: Dict[str, Any] = None):
+        zones: list[dict] = list(self.options.get(CONF_ZONES, []))
+        index = next((i for i, zone in enumerate(zones) if zone[CONF_ZONE_ID] == self.current_zone_id), None)
+
+        if user_input is not None:
+            delete = user_input.pop("delete_zone", False)
+            if index is None:
+                # Nieuwe zone: een vaste id die nooit wordt hergebruikt (entiteiten en geleerde data hangen eraan)
+                zones.append({CONF_ZONE_ID: f"zone_{uuid.uuid4().hex[:8]}", **user_input})
+            elif delete:
+                zones.pop(index)
+            else:
+                zones[index] = {CONF_ZONE_ID: self.current_zone_id, **user_input}
+            self.options[CONF_ZONES] = zones
+            self.hass.config_entries.async_update_entry(self.config_entry, options=self.options)
+            return await self.async_step_zone_config()
+
+        zone_data = zones[index] if index is not None else {}
+        schema = _get_zone_schema_generic(zone_data)
+        if index is not None:
+            schema = schema.extend({vol.Optional("delete_zone", default=False): selector.BooleanSelector()})
+        return self.async_show_form(
+            step_id="zone", data_schema=schema,
+            description_placeholders={"zone": zone_data.get("zone_name") or "Nieuwe zone"},
+        )
 
     async def async_step_setpoints(self, user_input=None):
         # ALTIJD verversen
         self.options = dict(self.config_entry.options)
         return self.async_show_menu(step_id="setpoints", menu_options={"sp_woonkamer": "Woonkamer", "sp_badkamer": "Badkamer", "sp_keuken": "Keuken", "sp_sk1": "Slaapkamer 1", "sp_sk2": "Slaapkamer 2", "sp_sk3": "Slaapkamer 3"})
 
-    async def async_step_sp_woonkamer(self, user_input=None): return await self._async_show_form_step(user_input, "sp_woonkamer", _get_setpoints_schema, False, "woonkamer")
-    async def async_step_sp_badkamer(self, user_input=None): return await self._async_show_form_step(user_input, "sp_badkamer", _get_setpoints_schema, False, "badkamer")
-    async def async_step_sp_keuken(self, user_input=None): return await self._async_show_form_step(user_input, "sp_keuken", _get_setpoints_schema, False, "keuken")
-    async def async_step_sp_sk1(self, user_input=None): return await self._async_show_form_step(user_input, "sp_sk1", _get_setpoints_schema, False, "slaapkamer_1")
-    async def async_step_sp_sk2(self, user_input=None): return await self._async_show_form_step(user_input, "sp_sk2", _get_setpoints_schema, False, "slaapkamer_2")
-    async def async_step_sp_sk3(self, user_input=None): return await self._async_show_form_step(user_input, "sp_sk3", _get_setpoints_schema, False, "slaapkamer_3")
+    async def async_step_sp_woonkamer(self, user_input=None): return await self._async_show_form_step(user_input, "sp_woonkamer", _get_setpoints_schema, "woonkamer")
+    async def async_step_sp_badkamer(self, user_input=None): return await self._async_show_form_step(user_input, "sp_badkamer", _get_setpoints_schema, "badkamer")
+    async def async_step_sp_keuken(self, user_input=None): return await self._async_show_form_step(user_input, "sp_keuken", _get_setpoints_schema, "keuken")
+    async def async_step_sp_sk1(self, user_input=None): return await self._async_show_form_step(user_input, "sp_sk1", _get_setpoints_schema, "slaapkamer_1")
+    async def async_step_sp_sk2(self, user_input=None): return await self._async_show_form_step(user_input, "sp_sk2", _get_setpoints_schema, "slaapkamer_2")
+    async def async_step_sp_sk3(self, user_input=None): return await self._async_show_form_step(user_input, "sp_sk3", _get_setpoints_schema, "slaapkamer_3")
 
-    async def _async_show_form_step(self, user_input, step_id, schema_fn, is_zone, schema_arg=None):
+    async def _async_show_form_step(self, user_input, step_id, schema_fn, schema_arg=None):
         errors = {}
         if user_input is not None:
             try:
-                if is_zone: self.options[self.current_zone_slot] = user_input
-                else: self.options.update(user_input)
+                self.options.update(user_input)
                 
                 # Forceer een directe save naar disk
                 self.hass.config_entries.async_update_entry(self.config_entry, options=self.options)
                 
-                if step_id.startswith("zone_"): return await self.async_step_zone_config()
-                elif step_id.startswith("sp_"): return await self.async_step_setpoints()
+                if step_id.startswith("sp_"): return await self.async_step_setpoints()
                 return await self.async_step_init()
             except Exception as e:
                 _LOGGER.error(f"Fout in options flow stap {step_id}: {e}")
@@ -182,7 +230,6 @@ class ClimaCoreOptionsFlow(OptionsFlow):
         
         # Laad de data opnieuw voor de weergave (dubbele zekerheid)
         current_data = self.options
-        if is_zone: current_data = self.options.get(self.current_zone_slot, {})
         schema = schema_fn(current_data, schema_arg) if schema_arg else schema_fn(current_data)
         return self.async_show_form(step_id=step_id, data_schema=schema, errors=errors)
 
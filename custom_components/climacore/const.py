@@ -4,10 +4,148 @@
 DOMAIN = "climacore"
 
 # Constanten voor de config flow
+CONF_HOME_NAME = "home_name"
 CONF_ACTIVATION_CODE = "activation_code"
 
 # URL van je publieke API Gateway
 # TIP: Sla dit niet hardcoded op, maar laat de gebruiker het misschien invoeren
 # of heb een 'default' en maak het overschrijfbaar.
 # Voor nu hardcoded voor eenvoud.
-CLIMACORE_GATEWAY_URL = "https://climacore-gateway-301645355529.europe-west1.run.app"
\ No newline at end of file
+CLIMACORE_GATEWAY_URL = "https://climacore-gateway-301645355529.europe-west1.run.app"
+# Transport naar de Gateway
+# "async": gedeelde aiohttp sessie van HA (keep-alive, geen executor-thread)
+# "sync": de oorspronkelijke `requests` client via een executor (compatibiliteitsmodus)
+CONF_API_MODE = "api_mode"
+API_MODE_ASYNC = "async"
+API_MODE_SYNC = "sync"
+
+# Maximaal aantal gelijktijdige verzoeken naar de Gateway per client
+MAX_CONCURRENT_REQUESTS = 2
+
+# Gateway protocol. v1: de volledige payload per aanroep (ongecomprimeerd JSON).
+# v2: statische config één keer uploaden onder een hash, daarna alleen de dynamische
+# status; de body is gzip-gecomprimeerd. Bij een oude Gateway vallen we terug op v1.
+PROTOCOL_V1 = 1
+PROTOCOL_V2 = 2
+
+# Meerdere huizen: gelijktijdige v2-aanroepen worden gebundeld (zie batcher.py).
+# Gedeeld over alle config entries in hass.data[BATCHER_KEY].
+BATCHER_KEY = f"{DOMAIN}_batcher"
+BATCH_WINDOW_SECONDS = 0.05
+# De static path voor de assets wordt één keer geregistreerd, hoeveel huizen er ook zijn
+STATIC_PATH_KEY = f"{DOMAIN}_static_path"
+
+# Zones staan als lijst in de opties (options[CONF_ZONES]), elk met een vaste `id`.
+# Tot config entry versie 2 waren het tien vaste slots: options["zone_1"] .. ["zone_10"].
+CONF_ZONES = "zones"
+CONF_ZONE_ID = "id"
+LEGACY_ZONE_SLOTS = range(1, 11)
+# Opties die niets meer doen: bij migratie (v2 -> v3) en import stilzwijgend verwijderd.
+# proactive_target_time: de voorverwarming mikt per zone op haar eigen dagstart.
+OBSOLETE_OPTIONS = ("proactive_target_time",)
+
+# Debounce voor raamsensoren (seconden, per zone instelbaar)
+DEFAULT_WINDOW_DEBOUNCE = 15
+# Sensoren die binnen dit venster tot rust komen, gaan samen in één run
+WINDOW_BATCH_SECONDS = 2
+
+# Dispatcher signaal (per config entry) voor interne status-updates naar de sensoren
+SIGNAL_STATUS_UPDATE = f"{DOMAIN}_status_update_{{}}"
+# Dispatcher signaal (per config entry) voor een nieuwe beslissing (scenario, per-zone doelen)
+SIGNAL_DECISION_UPDATE = f"{DOMAIN}_decision_update_{{}}"
+
+# Setpoint groepen en scenario's (opties: temp_<groep>_<scenario>)
+SETPOINT_GROUPS = ["woonkamer", "badkamer", "keuken", "slaapkamer_1", "slaapkamer_2", "slaapkamer_3"]
+SETPOINT_SCENARIOS = ["afwezig", "voorverwarming", "dag_fris", "dag_koud", "dag_mild_warm", "nacht_fris", "nacht_koud", "nacht_mild_warm"]
+
+# Rollen van entiteiten in de configuratie (zie snapshot.py)
+ROLE_PERSON = "person"
+ROLE_WEATHER = "weather"
+ROLE_GUESTS = "gasten"
+ROLE_EN_ROUTE = "onderweg"
+ROLE_PRESENCE = "presence"
+ROLE_WIFI = "wifi"
+ROLE_WINDOW = "window"
+ROLE_CLIMATE = "climate"
+
+# Wijzigingsdetectie: een ongewijzigde payload wordt niet opnieuw naar de Gateway gestuurd,
+# tenzij het laatste antwoord ouder is dan dit (minuten).
+FINGERPRINT_MAX_AGE_MINUTES = 60
+
+# Maximaal aantal gelijktijdige service-calls naar de thermostaten, per backend
+# (systeem_keuze_direct -> (optie-sleutel, standaard)). Cloud-backends laag houden i.v.m. rate limits.
+BACKEND_CONCURRENCY = {
+    "Ambisense/MyPyllant": ("max_parallel_ambisense", 2),
+    "Zigbee/Lokaal": ("max_parallel_zigbee", 6),
+}
+DEFAULT_BACKEND_CONCURRENCY = 2
+
+# Lokale noodloop (fallback.py): weer-banden voor de dag_koud/dag_fris/dag_mild_warm scenario's (°C / %RV)
+FALLBACK_COLD_BELOW = 5.0
+FALLBACK_COLD_HUMID_BELOW = 10.0
+FALLBACK_HUMID_ABOVE = 85.0
+FALLBACK_MILD_ABOVE = 15.0
+
+# Bron van de laatste beslissing
+DECISION_SOURCE_CLOUD = "cloud"
+DECISION_SOURCE_LOCAL = "local"
+
+# Timeouts per Gateway-endpoint (seconden)
+API_TIMEOUT_MAIN_LOGIC = 15
+API_TIMEOUT_VALIDATE = 10
+
+# Retry: maximaal aantal herhalingen per aanroep, met 'full jitter' exponentiële backoff (seconden).
+API_MAX_RETRIES = 2
+API_BACKOFF_BASE = 1.0
+API_BACKOFF_CAP = 8.0
+# Retry budget: elke aanroep spaart deze fractie van een retry op; het budget is begrensd.
+API_RETRY_BUDGET_RATIO = 0.2
+API_RETRY_BUDGET_MIN = 3
+API_RETRY_BUDGET_MAX = 10
+
+# Circuit breaker: na zoveel opeenvolgende fouten gaat de breaker open,
+# en na de reset-timeout (seconden) mag één proef-aanroep (half-open) door.
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_TIMEOUT = 120
+
+# Persistente opslag (HA Store) voor een warme start na een herstart
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{}}"
+STORAGE_SAVE_DELAY = 10
+
+# Zelflerend thermisch model (thermal.py)
+THERMAL_WINDOW = 96                  # aantal samples per zone (ring buffer)
+THERMAL_MIN_SAMPLES = 6              # minimaal aantal samples voordat het model meetelt
+THERMAL_MIN_GAP = 0.3                # setpoint - kamertemp (°C) waarboven een zone 'aan het opwarmen' is
+THERMAL_MAX_INTERVAL_MINUTES = 120   # langer geen stijging: episode opnieuw beginnen
+THERMAL_MAX_RATE = 0.5               # °C/min; snellere stijgingen zijn meetfouten
+MIN_MINUTES_PER_DEGREE = 5.0
+MAX_MINUTES_PER_DEGREE = 90.0
+
+# Instrumentatie: aantal beslis-traces dat in het geheugen blijft (zie trace.py en diagnostics.py)
+TRACE_BUFFER_SIZE = 25
+
+# Aanwezigheid (presence.py): per bronsoort (betrouwbaarheid, vertraging aankomst, vertraging vertrek in seconden).
+# Aankomst telt (bijna) direct; een vertrek pas als de bron zo lang 'weg' blijft. Telefoons laten
+# Wi-Fi in slaapstand regelmatig even los, en GPS springt rond de geofence.
+PRESENCE_SOURCE_GPS = "gps"
+PRESENCE_SOURCE_WIFI = "wifi"
+PRESENCE_SOURCE_TAG = "tag"
+PRESENCE_SOURCES = {
+    PRESENCE_SOURCE_GPS: (0.7, 30, 120),
+    PRESENCE_SOURCE_WIFI: (0.9, 0, 300),
+    PRESENCE_SOURCE_TAG: (0.8, 0, 180),
+}
+PRESENCE_TAG_HOME_STATES = ("home", "on", "active")
+# Dispatcher signaal (per config entry) voor een bevestigde aanwezigheidswijziging
+SIGNAL_PRESENCE_UPDATE = f"{DOMAIN}_presence_update_{{}}"
+
+# Weer (outdoor.py): temperatuur en RV worden exponentieel gladgestreken (tijdconstante in seconden);
+# de hoofdlogica draait alleen als de gladde waarden een weer-band (koud/fris/mild_warm) echt kruisen,
+# met een dode zone van deze marges rond elke grens.
+WEATHER_EMA_TAU_SECONDS = 1200
+WEATHER_BAND_MARGIN_TEMP = 0.5
+WEATHER_BAND_MARGIN_HUMIDITY = 3.0
+# Weersverwachting via weather.get_forecasts: ophalen per interval, bruikbaar tot de TTL (minuten)
+WEATHER_FORECAST_INTERVAL_MINUTES = 30
+WEATHER_FORECAST_TTL_MINUTES = 90
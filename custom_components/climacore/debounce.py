@@ -0,0 +1,98 @@
+"""Niet-blokkerende debounce per raamsensor."""
+import logging
+from typing import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import WINDOW_BATCH_SECONDS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WindowDebouncer:
+    """Houdt per raamsensor één timer bij in plaats van een slapende coroutine per event.
+
+    Een nieuw event voor dezelfde sensor annuleert en herstart diens timer.
+    Sensoren die binnen hetzelfde venster tot rust komen, worden gebundeld
+    tot één aanroep van `on_settled`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        on_settled: Callable[[list[str]], Awaitable[None]],
+        on_change: Callable[[], None],
+    ):
+        self.hass = hass
+        self._on_settled = on_settled
+        self._on_change = on_change
+        self._timers: dict[str, CALLBACK_TYPE] = {}
+        # De status vóór de eerste flank: als de sensor daar weer op uitkomt, is het een flapper.
+        self._initial_states: dict[str, str | None] = {}
+        self._settled: dict[str, None] = {}
+        self._flush_unsub: CALLBACK_TYPE | None = None
+        # Aantal raam-triggers dat als flapper is weggegooid (voor diagnose)
+        self.ignored = 0
+
+    @property
+    def pending(self) -> int:
+        """Aantal raamsensoren met een lopende debounce-timer."""
+        return len(self._timers)
+
+    @callback
+    def async_handle_event(self, entity_id: str, old_state: str | None, new_state: str | None, delay: float) -> None:
+        """Start (of herstart) de debounce-timer voor deze sensor."""
+        if remove_timer := self._timers.pop(entity_id, None):
+            remove_timer()
+        else:
+            self._initial_states[entity_id] = old_state
+
+        _LOGGER.debug(f"Raamsensor {entity_id} ging naar '{new_state}'. Wacht {delay}s debounce...")
+
+        @callback
+        def _async_timer_done(_now) -> None:
+            self._async_settle(entity_id)
+
+        self._timers[entity_id] = async_call_later(self.hass, delay, _async_timer_done)
+        self._on_change()
+
+    @callback
+    def _async_settle(self, entity_id: str) -> None:
+        self._timers.pop(entity_id, None)
+        initial_state = self._initial_states.pop(entity_id, None)
+        current = self.hass.states.get(entity_id)
+        current_state = current.state if current else None
+
+        if current_state == initial_state:
+            _LOGGER.info(f"Debounce: Raam {entity_id} is weer terug op '{current_state}'. Genegeerd.")
+            self.ignored += 1
+        else:
+            _LOGGER.debug(f"Raam {entity_id} status bevestigd als '{current_state}'.")
+            self._settled[entity_id] = None
+            if self._flush_unsub is None:
+                self._flush_unsub = async_call_later(self.hass, WINDOW_BATCH_SECONDS, self._async_flush)
+
+        self._on_change()
+
+    @callback
+    def _async_flush(self, _now) -> None:
+        self._flush_unsub = None
+        entity_ids = list(self._settled)
+        self._settled = {}
+        if entity_ids:
+            _LOGGER.debug(f"Gebundelde raam-triggers: {entity_ids}")
+            self.hass.async_create_task(self._on_settled(entity_ids))
+
+    @callback
+    def async_cancel_all(self) -> None:
+        """Annuleer alle lopende timers (bij unload of herconfiguratie)."""
+        for remove_timer in self._timers.values():
+            remove_timer()
+        self._timers = {}
+        self._initial_states = {}
+        self._settled = {}
+        if self._flush_unsub:
+            self._flush_unsub()
+            self._flush_unsub = None
+        self._on_change()
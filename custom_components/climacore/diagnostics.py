@@ -0,0 +1,49 @@
+"""Diagnose-download voor ClimaCore."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_ACTIVATION_CODE, BATCHER_KEY
+
+TO_REDACT = {CONF_ACTIVATION_CODE, "home_wifi_ssid"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Geef de interne status van de coordinator terug (zonder geheimen)."""
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if coordinator is None:
+        return diagnostics
+
+    api_client = coordinator.api_client
+    diagnostics["coordinator"] = {
+        "scenario": coordinator.scenario,
+        "decision_source": coordinator.decision_source,
+        **coordinator.stats(),
+        "pending_window_timers": coordinator.window_debouncer.pending,
+        "boost_windows": coordinator.boost_windows_as_dict(),
+        "zone_decisions": coordinator.zone_decisions,
+        "presence": coordinator.presence.as_dict(),
+        "weather": coordinator.weather.as_dict(),
+        "scheduled_jobs": coordinator.scheduler.pending(),
+        "learned_minutes_per_degree": coordinator.learned_rates(),
+    }
+    diagnostics["gateway"] = {
+        **api_client.breaker.as_dict(),
+        "retry_budget": round(api_client.retry_budget.tokens, 2),
+        "protocol": api_client.protocol,
+        "bytes_sent": getattr(api_client, "bytes_sent", None),
+    }
+    if batcher := hass.data.get(BATCHER_KEY):
+        diagnostics["gateway"]["batcher"] = batcher.as_dict()
+    # De laatste beslissingen, inclusief payload, antwoord en timings per stap
+    diagnostics["traces"] = coordinator.traces.as_list()
+    return diagnostics
@@ -0,0 +1,211 @@
+"""Uitvoering van de acties die de ClimaCore Gateway terugstuurt."""
+import asyncio
+import logging
+from time import perf_counter
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sleutel voor de 'lane' met acties die niet aan een zone gekoppeld zijn (notificaties)
+_GLOBAL_LANE = None
+_GLOBAL_LANE_NAME = "notificaties"
+
+# Climate-acties die we per entiteit kunnen vergelijken en samenvoegen tot één call
+_MERGEABLE_SERVICES = ("climate.set_temperature", "climate.set_hvac_mode")
+_MERGEABLE_FIELDS = {"temperature", "hvac_mode"}
+
+
+def _mergeable_fields(action: dict) -> dict | None:
+    """De gewenste climate-velden van een actie, of None als de actie niet samenvoegbaar is."""
+    data = action.get("data", {})
+    if action.get("service") in _MERGEABLE_SERVICES and data and set(data) <= _MERGEABLE_FIELDS:
+        return dict(data)
+    return None
+
+
+def _entity_diff(state, desired: dict) -> dict:
+    """Alleen de velden waarin deze entiteit afwijkt van de gewenste stand."""
+    if state is None:
+        # Onbekende status: liever één call te veel dan een verkeerde stand
+        return dict(desired)
+    diff = {}
+    if "hvac_mode" in desired and state.state != desired["hvac_mode"]:
+        diff["hvac_mode"] = desired["hvac_mode"]
+    if "temperature" in desired:
+        try:
+            target_temp = float(desired["temperature"])
+            current_setpoint = float(state.attributes.get("temperature"))
+            # Als het verschil kleiner is dan 0.1 graad, doe niets.
+            if abs(current_setpoint - target_temp) >= 0.1:
+                diff["temperature"] = desired["temperature"]
+        except (ValueError, TypeError):
+            diff["temperature"] = desired["temperature"] # Kan huidige niet lezen, dus forceer update
+    return diff
+
+
+class ZoneActionExecutor:
+    """Voert acties per zone parallel uit.
+
+    - Binnen één zone blijft de volgorde van de acties behouden.
+    - Verschillende zones lopen tegelijk, begrensd door een semaphore per backend
+      (`systeem_keuze_direct`), zodat trage cloud-thermostaten de rest niet ophouden
+      en we geen rate limits raken.
+    - Een `delay` actie is een barrière: alles ervóór is klaar voordat de pauze begint,
+      en niets erna start eerder.
+    - Smart API Guard: opeenvolgende `set_temperature`/`set_hvac_mode` acties voor een zone
+      worden samengevoegd en per entiteit vergeleken met de huidige stand. Alleen
+      entiteiten die echt afwijken krijgen een call, met alleen de afwijkende velden.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._semaphores: dict[str, tuple[int, asyncio.Semaphore]] = {}
+        # Tellers voor diagnose
+        self.guard_skipped = 0
+        self.actions_merged = 0
+        # Resultaat van de laatste uitvoering per zone: gewenste climate-stand, aantal calls, fout
+        self.zone_results: dict[str, dict] = {}
+
+    def _get_semaphore(self, backend: str, limit: int) -> asyncio.Semaphore:
+        limit = max(1, int(limit))
+        current = self._semaphores.get(backend)
+        if current is None or current[0] != limit:
+            current = (limit, asyncio.Semaphore(limit))
+            self._semaphores[backend] = current
+        return current[1]
+
+    async def async_execute(self, actions: list, climate_zones_payload: dict, backend: str, limit: int) -> dict[str, float]:
+        """Voer de acties uit; geeft per zone de totale uitvoeringsduur (ms) terug."""
+        _LOGGER.debug(f"Uitvoeren van {len(actions)} acties ontvangen van ClimaCore API (max {limit} parallel voor {backend})...")
+        semaphore = self._get_semaphore(backend, limit)
+        timings: dict[str, float] = {}
+        self.zone_results = {}
+
+        lanes: dict[str | None, list] = {}
+        for action in actions:
+            service = action.get("service")
+            if not service:
+                continue
+
+            if service == "delay":
+                await self._async_run_lanes(lanes, climate_zones_payload, semaphore, timings)
+                lanes = {}
+                delay_seconds = action.get("data", {}).get("seconds", 1)
+                await asyncio.sleep(delay_seconds)
+                continue
+
+            lane = _GLOBAL_LANE if service.startswith("persistent_notification") else action.get("entity")
+            lanes.setdefault(lane, []).append(action)
+
+        await self._async_run_lanes(lanes, climate_zones_payload, semaphore, timings)
+        return timings
+
+    async def _async_run_lanes(self, lanes: dict, climate_zones_payload: dict, semaphore: asyncio.Semaphore, timings: dict) -> None:
+        if not lanes:
+            return
+        await asyncio.gather(*(
+            self._async_run_timed_lane(lane, zone_actions, climate_zones_payload, semaphore, timings)
+            for lane, zone_actions in lanes.items()
+        ))
+
+    async def _async_run_timed_lane(self, lane: str | None, zone_actions: list, climate_zones_payload: dict, semaphore: asyncio.Semaphore, timings: dict) -> None:
+        start = perf_counter()
+        try:
+            await self._async_run_lane(zone_actions, climate_zones_payload, semaphore)
+        finally:
+            name = _GLOBAL_LANE_NAME if lane is _GLOBAL_LANE else lane
+            # Een zone kan door een 'delay' in meerdere segmenten lopen: tel die op
+            timings[name] = round(timings.get(name, 0.0) + (perf_counter() - start) * 1000, 2)
+
+    async def _async_run_lane(self, zone_actions: list, climate_zones_payload: dict, semaphore: asyncio.Semaphore) -> None:
+        desired: dict = {}
+        for action in zone_actions:
+            if (fields := _mergeable_fields(action)) is not None and action.get("entity"):
+                if desired:
+                    self.actions_merged += 1
+                # Latere acties winnen, net als bij sequentieel uitvoeren
+                desired.update(fields)
+                continue
+            if desired:
+                await self._async_apply_desired(zone_actions[0].get("entity"), desired, climate_zones_payload, semaphore)
+                desired = {}
+            await self._async_execute_action(action, climate_zones_payload, semaphore)
+        if desired:
+            await self._async_apply_desired(zone_actions[0].get("entity"), desired, climate_zones_payload, semaphore)
+
+    def _record(self, entity_name: str, fields: dict, calls: int, error: str | None = None) -> None:
+        result = self.zone_results.setdefault(entity_name, {"calls": 0, "error": None})
+        result.update({key: value for key, value in fields.items() if key in _MERGEABLE_FIELDS})
+        result["calls"] += calls
+        if error:
+            result["error"] = error
+
+    def _get_target_entities(self, entity_name: str | None, climate_zones_payload: dict) -> list:
+        if not entity_name: return []
+        zone_data = climate_zones_payload.get(entity_name)
+        if not zone_data:
+            _LOGGER.warning(f"Actie overgeslagen: Zone '{entity_name}' niet gevonden.")
+            return []
+        return zone_data.get("_all_climate_entities", [])
+
+    async def _async_apply_desired(self, entity_name: str, desired: dict, climate_zones_payload: dict, semaphore: asyncio.Semaphore) -> None:
+        """Stuur de gewenste climate-stand alleen naar de entiteiten die afwijken."""
+        calls: dict[tuple, list[str]] = {}
+        try:
+            target_entities = self._get_target_entities(entity_name, climate_zones_payload)
+
+            # Groepeer entiteiten met exact dezelfde afwijking, zodat die één call delen.
+            for entity_id in target_entities:
+                diff = _entity_diff(self.hass.states.get(entity_id), desired)
+                if not diff:
+                    self.guard_skipped += 1
+                    _LOGGER.debug(f"SKIP: {entity_id} staat al op {desired}.")
+                    continue
+                calls.setdefault(tuple(sorted(diff.items())), []).append(entity_id)
+
+            for diff_items, entity_ids in calls.items():
+                data = dict(diff_items)
+                # set_temperature accepteert ook hvac_mode, dus één call volstaat
+                service_name = "set_temperature" if "temperature" in data else "set_hvac_mode"
+                _LOGGER.debug(f"Actie: Roep service climate.{service_name} aan voor {entity_name} ({entity_ids}) | Data: {data}")
+                async with semaphore:
+                    await self.hass.services.async_call(
+                        "climate", service_name,
+                        {"entity_id": entity_ids, **data},
+                        blocking=True
+                    )
+            self._record(entity_name, desired, len(calls))
+
+        except Exception as e:
+            _LOGGER.error(f"FOUT tijdens uitvoeren actie voor {entity_name}: {e}. We gaan door...")
+            self._record(entity_name, desired, len(calls), str(e))
+
+    async def _async_execute_action(self, action: dict, climate_zones_payload: dict, semaphore: asyncio.Semaphore) -> None:
+        entity_name = action.get("entity")
+        try:
+            service = action.get("service")
+            data = action.get("data", {})
+
+            if service.startswith("persistent_notification"):
+                await self.hass.services.async_call("persistent_notification", service.split('.')[1], data)
+                return
+
+            target_entities = self._get_target_entities(entity_name, climate_zones_payload)
+            if not target_entities: return
+
+            _LOGGER.debug(f"Actie: Roep service {service} aan voor {entity_name} | Data: {data}")
+            domain, service_name = service.split('.')
+
+            async with semaphore:
+                await self.hass.services.async_call(
+                    domain, service_name,
+                    {"entity_id": target_entities, **data},
+                    blocking=True
+                )
+            self._record(entity_name, data, 1)
+
+        except Exception as e:
+            _LOGGER.error(f"FOUT tijdens uitvoeren actie voor {entity_name}: {e}. We gaan door...")
+            if entity_name:
+                self._record(entity_name, action.get("data", {}), 0, str(e))
@@ -0,0 +1,112 @@
+"""Lokale noodloop: een vereenvoudigde beslisser voor als de Gateway onbereikbaar is.
+
+Werkt op exact dezelfde payload die naar de Gateway gaat en geeft een antwoord
+in hetzelfde formaat terug (`scenario` + `actions`), zodat de coordinator het
+zonder verdere aanpassing kan uitvoeren. Alles draait in-process; geen I/O.
+"""
+from datetime import time
+
+from .const import (
+    FALLBACK_COLD_BELOW, FALLBACK_COLD_HUMID_BELOW, FALLBACK_HUMID_ABOVE, FALLBACK_MILD_ABOVE,
+)
+
+SCENARIO_LABELS = {
+    "afwezig": "Afwezig",
+    "voorverwarming": "Voorverwarming",
+    "dag_fris": "Dag - Fris",
+    "dag_koud": "Dag - Koud",
+    "dag_mild_warm": "Dag - Mild Warm",
+    "nacht_fris": "Nacht - Fris",
+    "nacht_koud": "Nacht - Koud",
+    "nacht_mild_warm": "Nacht - Mild Warm",
+}
+
+
+def weather_band(outdoor_temp: float, outdoor_humidity: float) -> str:
+    """Deel het weer in: 'koud', 'fris' of 'mild_warm' (met RV-compensatie)."""
+    if outdoor_temp < FALLBACK_COLD_BELOW:
+        return "koud"
+    if outdoor_temp < FALLBACK_COLD_HUMID_BELOW and outdoor_humidity >= FALLBACK_HUMID_ABOVE:
+        # Klamme kou voelt kouder aan dan de thermometer zegt
+        return "koud"
+    if outdoor_temp >= FALLBACK_MILD_ABOVE:
+        return "mild_warm"
+    return "fris"
+
+
+def _parse(value: str | None, default: str) -> time:
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        return time.fromisoformat(default)
+
+
+def is_daytime(now: time, start: time, end: time) -> bool:
+    """Valt `now` in het dag-venster [start, end)? Ondersteunt vensters over middernacht."""
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+def decide_locally(payload: dict) -> dict:
+    """Bereken per zone een scenario en setpoint, in het antwoordformaat van de Gateway."""
+    config = payload.get("config", {})
+    context = payload.get("context", {})
+    sensors = payload.get("sensors", {})
+    persons = payload.get("persons", {})
+    zones = payload.get("climate_zones", {})
+
+    fallback_temp = config.get("fallback_temp", 18.0)
+    now = _parse(context.get("current_time"), "12:00:00")
+    band = weather_band(sensors.get("outdoor_temp", 15.0), sensors.get("outdoor_humidity", 50.0))
+
+    someone_home = "home" in persons.values() or sensors.get("gasten_aanwezig") == "on"
+    en_route = sensors.get("onderweg_naar_huis") == "on"
+
+    actions = []
+    zone_scenarios = {}
+    zone_reasons = {}
+    for zone_name, zone in zones.items():
+        schedule = zone.get("schedule", {})
+        if someone_home:
+            day = is_daytime(now, _parse(schedule.get("start"), "06:00:00"), _parse(schedule.get("end"), "22:00:00"))
+            scenario = f"{'dag' if day else 'nacht'}_{band}"
+        else:
+            scenario = "voorverwarming" if en_route else "afwezig"
+
+        zone_scenarios[zone_name] = scenario
+        # Open raam: niet stoken voor de buitenlucht, maar wel vorstvrij houden
+        window_open = "on" in zone.get("window_sensors", [])
+        setpoint_scenario = "afwezig" if window_open else scenario
+        if window_open:
+            zone_reasons[zone_name] = "Raam open"
+        elif someone_home:
+            zone_reasons[zone_name] = f"Iemand thuis ({'dag' if day else 'nacht'}, {band.replace('_', ' ')})"
+        else:
+            zone_reasons[zone_name] = "Onderweg naar huis" if en_route else "Niemand thuis"
+        setpoint = config.get(f"temp_{zone.get('lookup_prefix')}_{setpoint_scenario}", fallback_temp)
+
+        actions.append({
+            "service": "climate.set_temperature",
+            "entity": zone_name,
+            "data": {"temperature": setpoint},
+        })
+
+    # Het globale scenario volgt de woonkamer (zoals de achtergrond op het dashboard)
+    leading = next(
+        (name for name, zone in zones.items() if zone.get("lookup_prefix") == "woonkamer"),
+        next(iter(zones), None),
+    )
+    if leading is not None:
+        global_scenario = zone_scenarios[leading]
+    elif someone_home:
+        global_scenario = f"dag_{band}"
+    else:
+        global_scenario = "voorverwarming" if en_route else "afwezig"
+
+    return {
+        "scenario": SCENARIO_LABELS[global_scenario],
+        "zone_scenarios": zone_scenarios,
+        "zone_reasons": zone_reasons,
+        "actions": actions,
+    }
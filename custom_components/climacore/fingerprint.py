@@ -0,0 +1,44 @@
+"""Vingerafdruk van de hoofdlogica-payload voor de wijzigingsdetectie."""
+import hashlib
+import json
+from bisect import bisect_right
+from datetime import time
+from typing import Any
+
+
+def time_bucket(current_time: str, boundaries: tuple[time, ...]) -> int:
+    """Index van het schema-segment waarin `current_time` valt.
+
+    Twee tijdstippen tussen dezelfde twee schema-grenzen krijgen dezelfde
+    bucket; de Gateway kan op basis van de tijd alleen dan anders beslissen
+    als er een grens (dag/nacht start van een zone, doeltijd) gepasseerd is.
+    """
+    try:
+        parsed = time.fromisoformat(current_time)
+    except (TypeError, ValueError):
+        return -1
+    # Na de laatste grens van de dag zitten we in hetzelfde segment als vóór de eerste.
+    return bisect_right(boundaries, parsed) % (len(boundaries) or 1)
+
+
+def payload_fingerprint(payload: dict, boundaries: tuple[time, ...]) -> str:
+    """Hash van de genormaliseerde payload (zonder trigger-info en exacte tijd)."""
+    context = payload.get("context", {})
+    sensors = dict(payload.get("sensors", {}))
+    # Het (gladde) buitenweer schuift bij bijna elke update een fractie op; de Gateway kiest
+    # het dag-scenario op de weer-band, dus alleen de stabiele band van de WeatherTracker
+    # telt mee (zelfde dode zone als de trigger). Binnen een band ververst
+    # FINGERPRINT_MAX_AGE_MINUTES het antwoord alsnog.
+    sensors.pop("outdoor_temp", None)
+    sensors.pop("outdoor_humidity", None)
+    sensors["weather_band"] = context.get("weather_band")
+
+    normalized: dict[str, Any] = {
+        "config": payload.get("config", {}),
+        "sensors": sensors,
+        "persons": payload.get("persons", {}),
+        "climate_zones": payload.get("climate_zones", {}),
+        "time_bucket": time_bucket(context.get("current_time"), boundaries),
+    }
+    raw = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
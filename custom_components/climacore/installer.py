@@ -0,0 +1,144 @@
+"""Installatie van de meegeleverde bestanden (thema, dashboard-sjabloon, blueprints).
+
+Een bestand wordt alleen geschreven als de inhoud echt anders is (SHA-256 van
+bron en doel), en dan atomair: eerst naar een tijdelijk bestand in de doelmap,
+daarna `os.replace`. Een half geschreven blueprint of thema kan dus nooit
+blijven staan. Alle bestands-I/O van één installatie draait in één executor-job.
+
+Na afloop wordt per geraakt domein één keer herladen (blueprints: `automation`,
+thema: `frontend.reload_themes`), en alleen als er in dat domein iets veranderde.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_INSTALLED = "installed"
+STATUS_UPDATED = "updated"
+STATUS_UNCHANGED = "unchanged"
+STATUS_ERROR = "error"
+
+
+@dataclass(frozen=True)
+class Asset:
+    """Eén bestand uit de integratiemap en waar het in de config-map terechtkomt."""
+
+    key: str
+    title: str
+    source_subdir: str
+    source_filename: str
+    dest_dir: str
+    dest_filename: str
+    # Service die na een wijziging herladen moet worden (domein, service), of None
+    reload: tuple[str, str] | None = None
+
+
+@dataclass(frozen=True)
+class InstallResult:
+    asset: Asset
+    status: str
+    message: str
+
+    @property
+    def changed(self) -> bool:
+        return self.status in (STATUS_INSTALLED, STATUS_UPDATED)
+
+
+ASSET_THEME = "theme"
+ASSET_DASHBOARD = "dashboard"
+ASSET_PREHEAT_BLUEPRINT = "preheat"
+ASSET_GMAPS_BLUEPRINT = "gmaps"
+
+ASSETS: dict[str, Asset] = {
+    asset.key: asset
+    for asset in (
+        Asset(ASSET_THEME, "Thema", "themes", "climacore_theme.yaml", "themes", "climacore.yaml",
+              reload=("frontend", "reload_themes")),
+        Asset(ASSET_DASHBOARD, "Dashboard Sjabloon", "assets", "dashboard_template.yaml",
+              os.path.join("custom_components", DOMAIN, "www"), "climacore-dashboard-template.yaml"),
+        Asset(ASSET_PREHEAT_BLUEPRINT, "Slimme Voorverwarming Blueprint", "assets", "blueprint-preheat.yaml",
+              "blueprints/automation/climacore", "smart_preheat.yaml", reload=("automation", "reload")),
+        Asset(ASSET_GMAPS_BLUEPRINT, "Google Maps Beheer Blueprint", "assets", "blueprint-gmaps-manager.yaml",
+              "blueprints/automation/climacore", "gmaps_manager.yaml", reload=("automation", "reload")),
+    )
+}
+
+
+def _read(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _atomic_write(path: str, content: bytes, source_path: str) -> None:
+    """Schrijf naar een tijdelijk bestand in dezelfde map en zet het daarna in één keer op zijn plek."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".climacore-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        shutil.copystat(source_path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _install_one(config_dir: str, asset: Asset) -> InstallResult:
+    source_path = os.path.join(config_dir, "custom_components", DOMAIN, asset.source_subdir, asset.source_filename)
+    destination_path = os.path.join(config_dir, asset.dest_dir, asset.dest_filename)
+    target = f"{asset.dest_dir}/{asset.dest_filename}"
+    try:
+        content = _read(source_path)
+        if content is None:
+            _LOGGER.error(f"Bronbestand niet gevonden: {source_path}")
+            return InstallResult(asset, STATUS_ERROR, f"Kon het bronbestand niet vinden: {asset.source_filename}")
+
+        current = _read(destination_path)
+        if current is not None and hashlib.sha256(current).digest() == hashlib.sha256(content).digest():
+            _LOGGER.debug(f"{target} is al up-to-date, niets geschreven.")
+            return InstallResult(asset, STATUS_UNCHANGED, f"'{target}' was al up-to-date.")
+
+        _atomic_write(destination_path, content, source_path)
+        _LOGGER.info(f"Bestand succesvol geïnstalleerd naar: {destination_path}")
+        if current is None:
+            return InstallResult(asset, STATUS_INSTALLED, f"Bestand succesvol geïnstalleerd als '{target}'.")
+        return InstallResult(asset, STATUS_UPDATED, f"Bestand bijgewerkt: '{target}'.")
+
+    except Exception as e:
+        _LOGGER.error(f"Fout bij installeren van {asset.source_filename}: {e}")
+        return InstallResult(asset, STATUS_ERROR, f"Er is een fout opgetreden: {e}")
+
+
+def install_assets(config_dir: str, assets: list[Asset]) -> list[InstallResult]:
+    """Installeer de bestanden (blokkerend, dus via de executor aanroepen)."""
+    return [_install_one(config_dir, asset) for asset in assets]
+
+
+async def async_install(hass: HomeAssistant, keys: list[str]) -> list[InstallResult]:
+    """Installeer de gevraagde bestanden in één executor-job en herlaad alleen wat veranderde."""
+    results = await hass.async_add_executor_job(install_assets, hass.config.path(), [ASSETS[key] for key in keys])
+
+    reloads = list(dict.fromkeys(result.asset.reload for result in results if result.changed and result.asset.reload))
+    for domain, service in reloads:
+        if not hass.services.has_service(domain, service):
+            continue
+        _LOGGER.debug(f"Herladen na installatie: {domain}.{service}")
+        await hass.services.async_call(domain, service, blocking=True)
+    return results
@@ -0,0 +1,251 @@
+"""Buitenweer voor ClimaCore: gladgestreken actuele waarden en een gecachte weersverwachting.
+
+(Bewust niet `weather.py`: die naam is in HA gereserveerd voor het weather-platform.)
+
+Een weerprovider ververst vaak elke paar minuten met wat ruis op temperatuur en
+RV. De hoofdlogica hoeft daar alleen op te reageren als het scenario erdoor kan
+veranderen, dus als het weer een andere band (koud/fris/mild_warm, zie
+`fallback.weather_band`) in gaat. Daarom:
+
+- temperatuur en RV gaan door een tijdgebaseerd exponentieel gemiddelde;
+- een band-wissel telt pas als de gladde waarden de grens met een marge
+  voorbij zijn (dode zone), zodat waarden rond een grens niet heen en weer
+  triggeren;
+- de verwachting komt per interval via `weather.get_forecasts` en blijft tot
+  de TTL bruikbaar; de proactieve start rekent daarmee met het weer rond de
+  dagstart in plaats van het weer om 04:00.
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    WEATHER_EMA_TAU_SECONDS, WEATHER_BAND_MARGIN_TEMP, WEATHER_BAND_MARGIN_HUMIDITY,
+    WEATHER_FORECAST_TTL_MINUTES,
+)
+from .fallback import weather_band
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_OUTDOOR_TEMP = 15.0
+DEFAULT_OUTDOOR_HUMIDITY = 50.0
+# Voorkeursvolgorde; niet elke provider levert elk type
+FORECAST_TYPES = ("hourly", "twice_daily", "daily")
+
+
+def _float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class WeatherTracker:
+    """Houdt het gladde buitenweer, de huidige weer-band en de verwachting bij.
+
+    `on_band_change` krijgt de weerentiteit als trigger zodra de band wisselt.
+    """
+
+    def __init__(self, hass: HomeAssistant, on_band_change: Callable[[list[str]], Awaitable[None]]):
+        self.hass = hass
+        self._on_band_change = on_band_change
+        self.entity_id: str | None = None
+        # Laatst gemeten en gladgestreken waarden
+        self._raw_temperature: float | None = None
+        self._raw_humidity: float | None = None
+        self._temperature: float | None = None
+        self._humidity: float | None = None
+        self._updated_at: datetime | None = None
+        self.band: str | None = None
+        self._forecast: list[dict] = []
+        self._forecast_type: str | None = None
+        self._forecast_at: datetime | None = None
+        # Weer-updates die verwerkt zijn, en hoeveel daarvan een band-wissel gaven
+        self.updates = 0
+        self.crossings = 0
+
+    @property
+    def temperature(self) -> float:
+        return DEFAULT_OUTDOOR_TEMP if self._temperature is None else round(self._temperature, 1)
+
+    @property
+    def humidity(self) -> float:
+        return DEFAULT_OUTDOOR_HUMIDITY if self._humidity is None else round(self._humidity)
+
+    @property
+    def ignored(self) -> int:
+        """Weer-updates die geen band-wissel gaven (en dus geen run)."""
+        return self.updates - self.crossings
+
+    @callback
+    def async_configure(self, entity_id: str | None) -> None:
+        """Koppel (een andere) weerentiteit; de gladde waarden beginnen bij de huidige status."""
+        if entity_id != self.entity_id:
+            self.entity_id = entity_id
+            self._temperature = self._humidity = self._updated_at = self.band = None
+            self._raw_temperature = self._raw_humidity = None
+            self._forecast, self._forecast_type, self._forecast_at = [], None, None
+        self._seed()
+
+    def _seed(self) -> None:
+        """Begin bij de huidige status zolang er nog geen waarden zijn.
+
+        Tijdens het opstarten heeft de weerentiteit vaak nog geen status; dan
+        volgt de eerste meting bij `setup_listeners` of de eerste run.
+        """
+        if self._temperature is None and self.entity_id:
+            self._observe(self.hass.states.get(self.entity_id))
+
+    def _observe(self, state: State | None) -> bool:
+        """Verwerk een status; geeft True als de gladde waarden een andere band in gingen."""
+        if state is None or (temperature := _float(state.attributes.get("temperature"))) is None:
+            return False
+        humidity = _float(state.attributes.get("humidity"))
+        if self._temperature is None:
+            self._temperature, self._humidity = temperature, humidity
+            self._updated_at = dt_util.utcnow()
+        self._raw_temperature = temperature
+        if humidity is not None:
+            self._raw_humidity = humidity
+        self._advance(dt_util.utcnow())
+        return self._update_band()
+
+    def _advance(self, now: datetime) -> None:
+        """Schuif de gladde waarden op naar `now`, richting de laatst gemeten waarden.
+
+        Tijdgebaseerd: een update na lange stilte telt zwaarder dan een update na 30 s.
+        """
+        if self._updated_at is None or self._temperature is None:
+            return
+        alpha = 1 - math.exp(-max((now - self._updated_at).total_seconds(), 0) / WEATHER_EMA_TAU_SECONDS)
+        self._temperature += alpha * (self._raw_temperature - self._temperature)
+        if self._raw_humidity is not None:
+            self._humidity = (
+                self._raw_humidity if self._humidity is None else self._humidity + alpha * (self._raw_humidity - self._humidity)
+            )
+        self._updated_at = now
+
+    def _update_band(self) -> bool:
+        if self._temperature is None:
+            return False
+        band = self._classify(self._temperature, self.humidity)
+        if band == self.band:
+            return False
+        previous, self.band = self.band, band
+        return previous is not None
+
+    @callback
+    def async_advance(self) -> None:
+        """Werk de gladde waarden bij tot nu, ook als de provider een tijd niets meldt.
+
+        Wordt bij elke opbouw van de payload aangeroepen; een band-wissel gaat dan
+        met die run mee en start geen extra run.
+        """
+        self._seed()
+        previous = self.band
+        self._advance(dt_util.utcnow())
+        if self._update_band():
+            _LOGGER.debug(f"Weer-band gewisseld tijdens een run: '{previous}' -> '{self.band}'.")
+
+    def _classify(self, temperature: float, humidity: float) -> str:
+        """De weer-band, met een dode zone rond de grenzen: daarbinnen blijft de oude band staan."""
+        band = weather_band(temperature, humidity)
+        if self.band is None or band == self.band:
+            return band
+        corners = {
+            weather_band(temperature + dt, humidity + dh)
+            for dt in (-WEATHER_BAND_MARGIN_TEMP, WEATHER_BAND_MARGIN_TEMP)
+            for dh in (-WEATHER_BAND_MARGIN_HUMIDITY, WEATHER_BAND_MARGIN_HUMIDITY)
+        }
+        return band if len(corners) == 1 else self.band
+
+    @callback
+    def async_handle_state(self, state: State | None) -> None:
+        """Nieuwe status van de weerentiteit: alleen een band-wissel start de hoofdlogica."""
+        if state is None or (temperature := _float(state.attributes.get("temperature"))) is None:
+            return
+        self.updates += 1
+        previous = self.band
+        if not self._observe(state):
+            _LOGGER.debug(f"Weer-update {temperature}°C genegeerd (glad {self.temperature}°C, band '{self.band}').")
+            return
+        self.crossings += 1
+        _LOGGER.info(f"Weer-band gewisseld: '{previous}' -> '{self.band}' ({self.temperature}°C, {self.humidity}% RV).")
+        self.hass.async_create_task(self._on_band_change([self.entity_id]))
+
+    async def async_refresh_forecast(self, *_args) -> None:
+        """Haal de verwachting op via `weather.get_forecasts` (het eerste type dat de provider levert)."""
+        if not self.entity_id or not self.hass.services.has_service("weather", "get_forecasts"):
+            return
+        types = (self._forecast_type,) if self._forecast_type else FORECAST_TYPES
+        for forecast_type in types:
+            try:
+                response = await self.hass.services.async_call(
+                    "weather", "get_forecasts", {"entity_id": self.entity_id, "type": forecast_type},
+                    blocking=True, return_response=True,
+                )
+            except HomeAssistantError as e:
+                _LOGGER.debug(f"Weersverwachting '{forecast_type}' niet beschikbaar voor {self.entity_id}: {e}")
+                continue
+            forecast = (response or {}).get(self.entity_id, {}).get("forecast") or []
+            if not forecast:
+                continue
+            self._forecast = [
+                {"datetime": moment, "temperature": temperature, "humidity": _float(item.get("humidity"))}
+                for item in forecast
+                if (moment := dt_util.parse_datetime(str(item.get("datetime"))))
+                and (temperature := _float(item.get("temperature"))) is not None
+            ]
+            self._forecast_type = forecast_type
+            self._forecast_at = dt_util.utcnow()
+            _LOGGER.debug(f"Weersverwachting ({forecast_type}) opgehaald: {len(self._forecast)} punten.")
+            return
+        # Niets gevonden: bij de volgende poging weer alle types proberen
+        self._forecast_type = None
+
+    async def async_forecast(self) -> list[dict]:
+        """De verwachting uit de cache; opnieuw opgehaald als die ouder is dan de TTL."""
+        if not self._forecast_fresh():
+            await self.async_refresh_forecast()
+        return self._forecast if self._forecast_fresh() else []
+
+    def _forecast_fresh(self) -> bool:
+        return self._forecast_at is not None and dt_util.utcnow() - self._forecast_at < timedelta(minutes=WEATHER_FORECAST_TTL_MINUTES)
+
+    def conditions_between(self, start: datetime, end: datetime) -> tuple[float, float, str]:
+        """(temperatuur, RV, bron) voor het venster [start, end]: de verwachting als die er is, anders het gladde actuele weer.
+
+        Gebruikt alleen de cache; roep eerst `async_forecast` aan voor een verse verwachting.
+        """
+        points = []
+        if self._forecast_fresh():
+            # Een uurverwachting heeft een punt per uur; het punt net vóór `start` dekt het begin van het venster
+            points = [item for item in self._forecast if start - timedelta(hours=1) <= item["datetime"] <= end]
+            if not points:
+                earlier = [item for item in self._forecast if item["datetime"] <= end]
+                points = earlier[-1:]
+        if not points:
+            return self.temperature, self.humidity, "actueel"
+        temperature = round(sum(item["temperature"] for item in points) / len(points), 1)
+        humidities = [item["humidity"] for item in points if item["humidity"] is not None]
+        humidity = round(sum(humidities) / len(humidities)) if humidities else self.humidity
+        return temperature, humidity, "verwachting"
+
+    def as_dict(self) -> dict:
+        """Status voor de diagnose-download."""
+        return {
+            "entity_id": self.entity_id,
+            "temperature": self.temperature,
+            "humidity": self.humidity,
+            "band": self.band,
+            "updates": self.updates,
+            "crossings": self.crossings,
+            "forecast_type": self._forecast_type,
+            "forecast_points": len(self._forecast),
+            "forecast_at": self._forecast_at.isoformat() if self._forecast_at else None,
+        }
@@ -0,0 +1,258 @@
+"""Aanwezigheid per persoon: GPS, Wi-Fi en tags samengevoegd, met hysterese per bron.
+
+Elke bron (de `person` entiteit zelf, een Wi-Fi sensor, een tag) krijgt een
+stabiele status: 'thuis' telt na de aankomst-vertraging van die bronsoort,
+'weg' pas na de (langere) vertrek-vertraging. Een bron die binnen die tijd
+terugvalt, verandert niets. Een persoon is thuis zodra één van zijn bronnen
+stabiel thuis is; de hoofdlogica draait alleen als dat per persoon verandert.
+
+Welke sensor bij wie hoort, volgt uit de `device_trackers` van de persoon:
+een tag die daar zelf in staat, of een sensor op hetzelfde apparaat (zoals de
+Wi-Fi sensor van de mobiele app). Sensoren zonder eigenaar gelden, zoals
+vroeger, voor iedereen.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.helpers.entity_registry import EntityRegistry
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    PRESENCE_SOURCES, PRESENCE_SOURCE_GPS, PRESENCE_SOURCE_WIFI, PRESENCE_SOURCE_TAG,
+    PRESENCE_TAG_HOME_STATES,
+)
+from .scheduler import TimerScheduler
+from .snapshot import ConfigSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def normalize_ssid(value: str | None) -> str | None:
+    """SSID zonder witruimte en zonder de aanhalingstekens die Android er soms omheen zet."""
+    if value is None:
+        return None
+    return value.strip().strip('"').strip() or None
+
+
+@dataclass
+class PresenceSource:
+    entity_id: str
+    kind: str
+    # Ruwe en bevestigde status: True (thuis), False (weg) of None (nog geen bewijs)
+    raw: bool | None = None
+    stable: bool | None = None
+    changed_at: datetime | None = None
+
+    @property
+    def confidence(self) -> float:
+        return PRESENCE_SOURCES[self.kind][0]
+
+
+@dataclass
+class PersonPresence:
+    entity_id: str
+    sources: list[str] = field(default_factory=list)
+    home: bool | None = None
+    confidence: float = 0.0
+    # De bron die de huidige status draagt, en sinds wanneer die status geldt
+    source: str | None = None
+    since: datetime | None = None
+
+
+class PresenceFusion:
+    """Houdt per persoon een stabiele thuis/weg status bij.
+
+    `on_confirmed` krijgt de bron die een persoon van status deed wisselen, als
+    trigger voor de hoofdlogica. `on_change` wordt na elke bevestigde wissel
+    aangeroepen (voor de sensoren).
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        scheduler: TimerScheduler,
+        on_confirmed: Callable[[list[str]], Awaitable[None]],
+        on_change: Callable[[], None],
+    ):
+        self.hass = hass
+        self._scheduler = scheduler
+        self._on_confirmed = on_confirmed
+        self._on_change = on_change
+        self._sources: dict[str, PresenceSource] = {}
+        self._persons: dict[str, PersonPresence] = {}
+        self._target_ssid: str | None = None
+        # Bevestigde wissels per persoon, en ruwe wissels die binnen de hysterese terugvielen
+        self.transitions = 0
+        self.suppressed = 0
+
+    @callback
+    def async_configure(self, snapshot: ConfigSnapshot, entity_registry: EntityRegistry | None) -> None:
+        """Bouw de bronnen per persoon (opnieuw) op; bestaande bronnen houden hun status."""
+        target_ssid = normalize_ssid(snapshot.home_wifi_ssid)
+        if target_ssid != self._target_ssid:
+            # Ander thuis-netwerk: de Wi-Fi bronnen beginnen opnieuw
+            self._target_ssid = target_ssid
+            for entity_id in [entity_id for entity_id, source in self._sources.items() if source.kind == PRESENCE_SOURCE_WIFI]:
+                self._scheduler.async_cancel(f"presence_{entity_id}")
+                del self._sources[entity_id]
+        kinds: dict[str, str] = {entity_id: PRESENCE_SOURCE_TAG for entity_id in snapshot.presence_sensors}
+        if target_ssid:
+            kinds.update((entity_id, PRESENCE_SOURCE_WIFI) for entity_id in snapshot.wifi_sensors)
+
+        owners = self._map_owners(snapshot.person_entities, kinds, entity_registry)
+        persons: dict[str, PersonPresence] = {}
+        for person in snapshot.person_entities:
+            presence = persons[person] = self._persons.get(person) or PersonPresence(person)
+            presence.sources = [
+                person, *(entity_id for entity_id in kinds if person in owners.get(entity_id, snapshot.person_entities))
+            ]
+        kinds.update((person, PRESENCE_SOURCE_GPS) for person in snapshot.person_entities)
+
+        for entity_id in [entity_id for entity_id in self._sources if entity_id not in kinds]:
+            self._scheduler.async_cancel(f"presence_{entity_id}")
+            del self._sources[entity_id]
+        for entity_id, kind in kinds.items():
+            source = self._sources.get(entity_id)
+            if source is None or source.kind != kind or source.stable is None:
+                # Nieuwe bron (of nog zonder bewijs, zoals vlak na de start): de huidige status geldt direct
+                source = self._sources[entity_id] = PresenceSource(entity_id, kind)
+                source.raw = source.stable = self._evaluate(kind, self._current_state(entity_id))
+                source.changed_at = dt_util.utcnow()
+
+        self._persons = persons
+        for person in persons.values():
+            self._async_fuse(person, None)
+        if shared := [entity_id for entity_id in kinds if entity_id not in owners and kinds[entity_id] != PRESENCE_SOURCE_GPS]:
+            _LOGGER.debug(f"Aanwezigheidssensoren zonder eigenaar (gelden voor iedereen): {shared}")
+
+    def _map_owners(
+        self, persons: tuple[str, ...], kinds: dict[str, str], entity_registry: EntityRegistry | None
+    ) -> dict[str, tuple[str, ...]]:
+        """Sensor -> personen, via de device_trackers van elke persoon en hun apparaten."""
+        def _device_id(entity_id: str) -> str | None:
+            entry = entity_registry.async_get(entity_id) if entity_registry else None
+            return entry.device_id if entry else None
+
+        owners: dict[str, list[str]] = {}
+        for person in persons:
+            state = self.hass.states.get(person)
+            trackers = set(state.attributes.get("device_trackers") or []) if state else set()
+            devices = {device_id for tracker in trackers if (device_id := _device_id(tracker))}
+            for entity_id in kinds:
+                if entity_id in trackers or _device_id(entity_id) in devices:
+                    owners.setdefault(entity_id, []).append(person)
+        return {entity_id: tuple(owner_ids) for entity_id, owner_ids in owners.items()}
+
+    def _current_state(self, entity_id: str) -> str | None:
+        state = self.hass.states.get(entity_id)
+        return state.state if state else None
+
+    def _evaluate(self, kind: str, state: str | None) -> bool | None:
+        """Ruwe status van één bron; None als de bron niets zegt (onbeschikbaar)."""
+        if state in (None, STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        if kind == PRESENCE_SOURCE_WIFI:
+            # Exacte SSID: "Thuis" mag niet matchen op "Thuis-Gast" of "Buurman-Thuis"
+            return normalize_ssid(state) == self._target_ssid
+        if kind == PRESENCE_SOURCE_TAG:
+            return state in PRESENCE_TAG_HOME_STATES
+        return state == "home"
+
+    @callback
+    def async_handle_state(self, entity_id: str, state: str | None) -> None:
+        """Verwerk een nieuwe status van een bron; wissels wachten de hysterese van de bron af."""
+        if (source := self._sources.get(entity_id)) is None:
+            return
+        raw = self._evaluate(source.kind, state)
+        if raw == source.raw:
+            return
+        source.raw = raw
+        key = f"presence_{entity_id}"
+
+        if raw is None or raw == source.stable:
+            if key in self._scheduler:
+                # Teruggevallen (of stil geworden) binnen de hysterese: de wissel telt niet
+                self._scheduler.async_cancel(key)
+                self.suppressed += 1
+                _LOGGER.debug(f"Aanwezigheid: {entity_id} viel terug binnen de hysterese. Genegeerd.")
+                self._on_change()
+            return
+
+        _confidence, arrive_delay, leave_delay = PRESENCE_SOURCES[source.kind]
+        delay = arrive_delay if raw else leave_delay
+        if source.stable is None or not delay:
+            self._scheduler.async_cancel(key)
+            self._async_confirm(entity_id)
+            return
+        _LOGGER.debug(f"Aanwezigheid: {entity_id} meldt '{'thuis' if raw else 'weg'}'. Wacht {delay}s hysterese...")
+        self._scheduler.async_schedule(key, dt_util.utcnow() + timedelta(seconds=delay), self._async_timer_done(entity_id))
+
+    def _async_timer_done(self, entity_id: str) -> Callable[[datetime], None]:
+        @callback
+        def _async_presence_confirmed(_now: datetime) -> None:
+            self._async_confirm(entity_id)
+        return _async_presence_confirmed
+
+    @callback
+    def _async_confirm(self, entity_id: str) -> None:
+        if (source := self._sources.get(entity_id)) is None or source.raw is None:
+            return
+        source.stable = source.raw
+        source.changed_at = dt_util.utcnow()
+
+        changed = [person for person in self._persons.values() if entity_id in person.sources and self._async_fuse(person, entity_id)]
+        if not changed:
+            return
+        self.transitions += len(changed)
+        for person in changed:
+            _LOGGER.info(
+                f"Aanwezigheid bevestigd: {person.entity_id} is {'thuis' if person.home else 'weg'} "
+                f"(bron {person.source}, betrouwbaarheid {person.confidence})."
+            )
+        self._on_change()
+        self.hass.async_create_task(self._on_confirmed([entity_id]))
+
+    def _async_fuse(self, person: PersonPresence, trigger: str | None) -> bool:
+        """Combineer de stabiele bronnen van een persoon; geeft True als de status wisselde."""
+        votes = [source for entity_id in person.sources if (source := self._sources[entity_id]).stable is not None]
+        if not votes:
+            # Geen enkele bron zegt iets: de laatste status blijft staan
+            return False
+        home = any(source.stable for source in votes)
+        strongest = max((source for source in votes if source.stable == home), key=lambda source: source.confidence)
+        person.confidence = strongest.confidence
+        person.source = strongest.entity_id
+        if home == person.home:
+            return False
+        person.home = home
+        person.since = strongest.changed_at if trigger is None else dt_util.utcnow()
+        return trigger is not None
+
+    def states(self) -> dict[str, str]:
+        """De bevestigde status per persoon, zoals de Gateway die verwacht."""
+        return {entity_id: "home" if person.home else "not_home" for entity_id, person in self._persons.items()}
+
+    def person_as_dict(self, entity_id: str) -> dict:
+        if (person := self._persons.get(entity_id)) is None:
+            return {}
+        return {
+            "confidence": person.confidence,
+            "source": person.source,
+            "since": person.since.isoformat() if person.since else None,
+            "sources": {
+                source_id: {True: "home", False: "not_home", None: None}[self._sources[source_id].stable]
+                for source_id in person.sources
+            },
+        }
+
+    def as_dict(self) -> dict:
+        """Status per persoon, voor de diagnose-download."""
+        return {
+            "persons": {entity_id: {"state": state, **self.person_as_dict(entity_id)} for entity_id, state in self.states().items()},
+            "transitions": self.transitions,
+            "suppressed": self.suppressed,
+        }
@@ -0,0 +1,54 @@
+"""Gateway protocol v2: statische config onder een hash, dynamische status per aanroep.
+
+De coordinator bouwt altijd de volledige (v1) payload; de API client splitst die
+hier in twee delen:
+
+- statisch: de `config` (alle setpoints) en per zone de vaste velden. Verandert
+  alleen als de opties veranderen en gaat één keer mee, onder `config_hash`.
+- dynamisch: context, sensoren, personen en per zone de ramen en het schema
+  (het schema kan tijdens een voorverwarming verschuiven).
+
+`merge_payload` is de inverse; de Gateway (en de mock in `bench/`) bouwt daarmee
+de volledige payload weer op.
+"""
+import gzip
+import hashlib
+import json
+
+# Velden van een zone die alleen door een optie-wijziging veranderen
+STATIC_ZONE_FIELDS = ("climate_entity", "lookup_prefix", "_all_climate_entities")
+
+GZIP_LEVEL = 6
+
+
+def split_payload(payload: dict) -> tuple[dict, dict]:
+    """Splits een volledige payload in (statisch, dynamisch)."""
+    static_zones = {}
+    dynamic_zones = {}
+    for zone_name, zone in payload.get("climate_zones", {}).items():
+        static_zones[zone_name] = {key: zone[key] for key in STATIC_ZONE_FIELDS if key in zone}
+        dynamic_zones[zone_name] = {key: value for key, value in zone.items() if key not in STATIC_ZONE_FIELDS}
+
+    static = {"config": payload.get("config", {}), "climate_zones": static_zones}
+    dynamic = {key: value for key, value in payload.items() if key not in ("config", "climate_zones")}
+    dynamic["climate_zones"] = dynamic_zones
+    return static, dynamic
+
+
+def merge_payload(static: dict, dynamic: dict) -> dict:
+    """Bouw de volledige payload weer op uit (statisch, dynamisch)."""
+    zones = {}
+    for zone_name, zone in dynamic.get("climate_zones", {}).items():
+        zones[zone_name] = {**static.get("climate_zones", {}).get(zone_name, {}), **zone}
+    return {**dynamic, "config": static.get("config", {}), "climate_zones": zones}
+
+
+def config_hash(static: dict) -> str:
+    """Stabiele hash van het statische deel (onafhankelijk van de volgorde van de keys)."""
+    canonical = json.dumps(static, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_body(body: dict) -> bytes:
+    """Compacte JSON, gzip-gecomprimeerd."""
+    return gzip.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"), compresslevel=GZIP_LEVEL)
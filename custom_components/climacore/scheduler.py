@@ -0,0 +1,62 @@
+"""Eenmalige, dynamische timers (zoals de start van een voorverwarming)."""
+import logging
+from datetime import datetime
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, HassJob, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_track_point_in_time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TimerScheduler:
+    """Beheert alle dynamische one-shot timers van de coordinator.
+
+    Elke timer heeft een sleutel: een nieuwe timer met dezelfde sleutel annuleert
+    en vervangt de oude, en een afgevuurde timer ruimt zichzelf op. Zo kan het
+    aantal timers nooit groter worden dan het aantal sleutels.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._jobs: dict[str, tuple[datetime, str, CALLBACK_TYPE]] = {}
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._jobs
+
+    @callback
+    def async_schedule(self, key: str, when: datetime, action: Callable[[datetime], Any]) -> None:
+        """Plan `action` op `when`; een bestaande timer met deze sleutel vervalt."""
+        self.async_cancel(key)
+        job = HassJob(action, f"climacore {key}")
+
+        @callback
+        def _async_fire(now: datetime) -> None:
+            self._jobs.pop(key, None)
+            _LOGGER.debug(f"Dynamische trigger '{key}' afgevuurd.")
+            self.hass.async_run_hass_job(job, now)
+
+        name = getattr(action, "__name__", repr(action))
+        self._jobs[key] = (when, name, async_track_point_in_time(self.hass, _async_fire, when))
+
+    @callback
+    def async_cancel(self, key: str) -> None:
+        if job := self._jobs.pop(key, None):
+            job[2]()
+
+    @callback
+    def async_cancel_all(self) -> None:
+        """Annuleer alle lopende timers (bij unload)."""
+        for _when, _name, remove_timer in self._jobs.values():
+            remove_timer()
+        self._jobs = {}
+
+    def pending(self) -> list[dict]:
+        """De geplande timers, op volgorde van tijdstip (voor diagnose)."""
+        return [
+            {"key": key, "when": when.isoformat(), "action": name}
+            for key, (when, name, _remove) in sorted(self._jobs.items(), key=lambda item: item[1][0])
+        ]
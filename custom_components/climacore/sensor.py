@@ -1,18 +1,37 @@
 """Sensor platform voor ClimaCore."""
 import logging
 from homeassistant.core import callback
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTime, UnitOfTemperature
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_STATUS_UPDATE, SIGNAL_DECISION_UPDATE, SIGNAL_PRESENCE_UPDATE
+from .trace import STAGE_PAYLOAD, STAGE_GATEWAY, STAGE_ACTIONS
 
 _LOGGER = logging.getLogger(__name__)
 
 # De prefix voor de assets, zoals geregistreerd in __init__.py
 ASSET_URL_PREFIX = f"/{DOMAIN}_assets"
 
+# Diagnose-sensoren voor de instrumentatie van het hete pad
+TIMING_SENSORS = (
+    (STAGE_PAYLOAD, "ClimaCore Payload Opbouw"),
+    (STAGE_GATEWAY, "ClimaCore Gateway Round-trip"),
+    (STAGE_ACTIONS, "ClimaCore Actie-uitvoering"),
+)
+COUNTER_SENSORS = (
+    ("gateway_calls", "ClimaCore Gateway-aanroepen", "mdi:cloud-upload-outline"),
+    ("gateway_calls_skipped", "ClimaCore Overgeslagen Gateway-aanroepen", "mdi:debug-step-over"),
+    ("merged_triggers", "ClimaCore Samengevoegde Triggers", "mdi:call-merge"),
+    ("dropped_window_triggers", "ClimaCore Genegeerde Raam-triggers", "mdi:window-open-variant"),
+    ("suppressed_presence_flaps", "ClimaCore Genegeerde Aanwezigheid-wissels", "mdi:account-switch-outline"),
+    ("ignored_weather_updates", "ClimaCore Genegeerde Weer-updates", "mdi:weather-partly-cloudy"),
+    ("guard_skipped", "ClimaCore Smart Guard Overgeslagen", "mdi:shield-check-outline"),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -24,11 +43,45 @@ async def async_setup_entry(
     # Maak beide sensoren aan en voeg ze toe
     scenario_sensor = ClimaCoreScenarioSensor(hass, entry)
     background_sensor = ClimaCoreBackgroundSensor(hass, entry, scenario_sensor)
-    
-    async_add_entities([scenario_sensor, background_sensor])
+    gateway_sensor = ClimaCoreGatewaySensor(hass, entry, scenario_sensor)
+    timing_sensors = [
+        ClimaCoreTimingSensor(hass, entry, scenario_sensor, stage, name) for stage, name in TIMING_SENSORS
+    ]
+    counter_sensors = [
+        ClimaCoreCounterSensor(hass, entry, scenario_sensor, key, name, icon) for key, name, icon in COUNTER_SENSORS
+    ]
+    # Per zone (uit de zone-index van de coordinator) een scenario- en een doeltemperatuur-sensor
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    zone_sensors = [
+        sensor_cls(hass, entry, scenario_sensor, zone)
+        for zone in coordinator.snapshot.zones
+        for sensor_cls in (ClimaCoreZoneScenarioSensor, ClimaCoreZoneSetpointSensor)
+    ]
+    presence_sensors = [
+        ClimaCorePresenceSensor(hass, entry, scenario_sensor, person) for person in coordinator.snapshot.person_entities
+    ]
+
+    async_add_entities([
+        scenario_sensor, background_sensor, ClimaCoreLastDecisionSensor(hass, entry, scenario_sensor),
+        gateway_sensor, *timing_sensors, *counter_sensors, *zone_sensors, *presence_sensors,
+    ])
+
 
+class WriteOnChangeMixin:
+    """Schrijft de status alleen naar HA als de waarde of de attributen echt zijn veranderd."""
+
+    _last_written: tuple | None = None
+
+    @callback
+    def async_write_if_changed(self) -> None:
+        state = (self.native_value, self.extra_state_attributes)
+        if state == self._last_written:
+            return
+        self._last_written = state
+        self.async_write_ha_state()
 
-class ClimaCoreScenarioSensor(SensorEntity):
+
+class ClimaCoreScenarioSensor(WriteOnChangeMixin, SensorEntity):
     """De sensor die het huidige ClimaCore scenario bijhoudt."""
 
     _attr_icon = "mdi:theme-light-dark"
@@ -38,38 +91,59 @@ class ClimaCoreScenarioSensor(SensorEntity):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         """Initialiseer de sensor."""
         self.hass = hass
+        self._entry = entry
         self._attr_unique_id = f"{entry.entry_id}_current_scenario"
         
         # De apparaat-info wordt gedeeld door alle entiteiten
         self._attr_device_info = {
             "identifiers": {(DOMAIN, entry.entry_id)},
-            "name": "ClimaCore",
+            "name": entry.title or "ClimaCore",
             "manufacturer": "Home Optimizer",
             "model": "ClimaCore v1.5" # Versie bijgewerkt
         }
-        self._attr_native_value = "Onbekend" # Begin-staat
+        # Begin-staat: het laatst bekende scenario (warme start), anders "Onbekend"
+        coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+        self._attr_native_value = (coordinator and coordinator.scenario) or "Onbekend"
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Interne status van de coordinator, handig voor diagnose."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+        if not coordinator:
+            return {}
+        return {
+            # Tellers en geleerde opwarmsnelheden horen hier niet: die veranderen bij bijna
+            # elke run (eigen diagnose-sensoren en de diagnose-download)
+            "pending_window_timers": coordinator.window_debouncer.pending,
+            "decision_source": coordinator.decision_source,
+        }
 
     @callback
-    def _async_handle_event(self, event):
-        """Handel de scenario update event af."""
-        new_scenario = event.data.get("scenario")
-        if new_scenario:
-            self._attr_native_value = new_scenario
-            self.async_write_ha_state()
+    def _async_handle_decision(self) -> None:
+        """Nieuwe beslissing van de coordinator van dit huis."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+        if coordinator and coordinator.scenario:
+            self._attr_native_value = coordinator.scenario
+        self.async_write_if_changed()
 
     async def async_added_to_hass(self) -> None:
         """Wordt aangeroepen wanneer de sensor aan HA wordt toegevoegd."""
         await super().async_added_to_hass()
-        # Luister naar de custom event die de __init__.py zal afvuren
+        # Beslissingen en interne status (zoals lopende raam-timers) komen per huis via de dispatcher binnen
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_DECISION_UPDATE.format(self._entry.entry_id), self._async_handle_decision
+            )
+        )
         self.async_on_remove(
-            self.hass.bus.async_listen(
-                "climacore_scenario_update", self._async_handle_event
+            async_dispatcher_connect(
+                self.hass, SIGNAL_STATUS_UPDATE.format(self._entry.entry_id), self.async_write_if_changed
             )
         )
 
 # --- NIEUWE SENSOR ---
 
-class ClimaCoreBackgroundSensor(SensorEntity):
+class ClimaCoreBackgroundSensor(WriteOnChangeMixin, SensorEntity):
     """Genereert de URL voor de dynamische achtergrondafbeelding."""
 
     _attr_icon = "mdi:image"
@@ -79,13 +153,14 @@ class ClimaCoreBackgroundSensor(SensorEntity):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor):
         """Initialiseer de achtergrond sensor."""
         self.hass = hass
+        self._entry = entry
         self._attr_unique_id = f"{entry.entry_id}_background_url"
         
         # Koppel aan hetzelfde ClimaCore "Apparaat"
         self._attr_device_info = scenario_sensor.device_info
         
-        # Begin-staat (kan ook een 'default.jpg' zijn als je die hebt)
-        self._attr_native_value = f"{ASSET_URL_PREFIX}/afwezig.jpg" 
+        # Begin-staat: volgt het (herstelde) scenario, met afwezig.jpg als fallback
+        self._attr_native_value = f"{ASSET_URL_PREFIX}/{self._format_scenario_to_filename(scenario_sensor.native_value)}"
 
     def _format_scenario_to_filename(self, scenario_name: str) -> str:
         """Converteert 'Scenario Titel' naar 'scenario-titel.jpg'."""
@@ -96,20 +171,265 @@ class ClimaCoreBackgroundSensor(SensorEntity):
         return f"{filename}.jpg"
 
     @callback
-    def _async_handle_event(self, event):
-        """Handel de scenario update event af."""
-        new_scenario = event.data.get("scenario")
-        if new_scenario:
-            filename = self._format_scenario_to_filename(new_scenario)
+    def _async_handle_decision(self) -> None:
+        """Nieuwe beslissing: de achtergrond volgt het scenario."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+        if coordinator and coordinator.scenario:
+            filename = self._format_scenario_to_filename(coordinator.scenario)
             self._attr_native_value = f"{ASSET_URL_PREFIX}/{filename}"
-            self.async_write_ha_state()
+            self.async_write_if_changed()
+
+    async def async_added_to_hass(self) -> None:
+        """Wordt aangeroepen wanneer de sensor aan HA wordt toegevoegd."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_DECISION_UPDATE.format(self._entry.entry_id), self._async_handle_decision
+            )
+        )
+
+
+class ClimaCoreDiagnosticSensor(WriteOnChangeMixin, SensorEntity):
+    """Basis voor de diagnose-sensoren: lezen de coordinator uit, bijgewerkt via de dispatcher."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, key: str):
+        self.hass = hass
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_device_info = scenario_sensor.device_info
+
+    @property
+    def _coordinator(self):
+        return self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+
+    async def async_added_to_hass(self) -> None:
+        """Wordt aangeroepen wanneer de sensor aan HA wordt toegevoegd."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_STATUS_UPDATE.format(self._entry.entry_id), self.async_write_if_changed
+            )
+        )
+
+
+class ClimaCoreGatewaySensor(ClimaCoreDiagnosticSensor):
+    """Diagnose: status van de circuit breaker richting de ClimaCore Gateway."""
+
+    _attr_icon = "mdi:cloud-check-outline"
+    _attr_name = "ClimaCore Gateway Status"
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor):
+        """Initialiseer de gateway sensor."""
+        super().__init__(hass, entry, scenario_sensor, "gateway_status")
+
+    @property
+    def native_value(self) -> str | None:
+        if coordinator := self._coordinator:
+            return coordinator.api_client.breaker.state
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        if not (coordinator := self._coordinator):
+            return {}
+        api_client = coordinator.api_client
+        attributes = api_client.breaker.as_dict()
+        attributes.pop("state")
+        attributes["retry_budget"] = round(api_client.retry_budget.tokens, 2)
+        attributes["protocol"] = api_client.protocol
+        return attributes
+
+
+class ClimaCoreTimingSensor(ClimaCoreDiagnosticSensor):
+    """Diagnose: duur van één stap van de hoofdlogica in de laatste run (ms)."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, stage: str, name: str):
+        super().__init__(hass, entry, scenario_sensor, f"timing_{stage}")
+        self._stage = stage
+        self._attr_name = name
+
+    @property
+    def native_value(self) -> float | None:
+        if coordinator := self._coordinator:
+            return coordinator.traces.last_timing(self._stage)
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        if not (coordinator := self._coordinator):
+            return {}
+        attributes = coordinator.traces.timing_stats(self._stage)
+        if self._stage == STAGE_ACTIONS:
+            attributes["zones_ms"] = coordinator.traces.last_zone_timings()
+        return attributes
+
+
+class ClimaCoreCounterSensor(ClimaCoreDiagnosticSensor):
+    """Diagnose: een teller van de coordinator (zie `ClimaCoreCoordinator.stats`)."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, key: str, name: str, icon: str):
+        super().__init__(hass, entry, scenario_sensor, key)
+        self._key = key
+        self._attr_name = name
+        self._attr_icon = icon
+
+    @property
+    def native_value(self) -> int | None:
+        if coordinator := self._coordinator:
+            return coordinator.stats().get(self._key)
+        return None
+
+
+class ClimaCoreDecisionSensor(WriteOnChangeMixin, SensorEntity):
+    """Basis voor sensoren die de laatste beslissing tonen; bijgewerkt via het beslissingssignaal."""
+
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, key: str):
+        self.hass = hass
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_device_info = scenario_sensor.device_info
+
+    @property
+    def _coordinator(self):
+        return self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+
+    async def async_added_to_hass(self) -> None:
+        """Wordt aangeroepen wanneer de sensor aan HA wordt toegevoegd."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_DECISION_UPDATE.format(self._entry.entry_id), self.async_write_if_changed
+            )
+        )
+
+
+class ClimaCoreLastDecisionSensor(ClimaCoreDecisionSensor):
+    """Tijdstip van de laatste beslissing (Gateway of noodloop)."""
+
+    _attr_icon = "mdi:clock-check-outline"
+    _attr_name = "ClimaCore Laatste Beslissing"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor):
+        super().__init__(hass, entry, scenario_sensor, "last_decision")
+
+    @property
+    def native_value(self):
+        if coordinator := self._coordinator:
+            return coordinator.last_decision_time
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        if not (coordinator := self._coordinator):
+            return {}
+        return {"decision_source": coordinator.decision_source}
+
+
+class ClimaCoreZoneSensor(ClimaCoreDecisionSensor):
+    """Eén veld uit de laatste beslissing van één zone (zie `ClimaCoreCoordinator.zone_decisions`)."""
+
+    _field: str
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, zone):
+        super().__init__(hass, entry, scenario_sensor, f"{zone.key}_{self._field}")
+        self._zone_key = zone.key
+
+    @property
+    def native_value(self):
+        if coordinator := self._coordinator:
+            return coordinator.zone_decisions.get(self._zone_key, {}).get(self._field)
+        return None
+
+
+class ClimaCoreZoneScenarioSensor(ClimaCoreZoneSensor):
+    """Het scenario dat de laatste beslissing voor deze zone koos."""
+
+    _attr_icon = "mdi:home-thermometer-outline"
+    _field = "scenario"
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, zone):
+        super().__init__(hass, entry, scenario_sensor, zone)
+        self._attr_name = f"ClimaCore {zone.name} Scenario"
+
+
+class ClimaCoreZoneSetpointSensor(ClimaCoreZoneSensor):
+    """Het doel-setpoint van deze zone, met de rest van de beslis-cache als attributen.
+
+    Dashboards en automations lezen hier wat ClimaCore besliste, zonder de
+    thermostaten zelf te hoeven pollen. `changed_at` verschuift alleen bij een
+    echte wijziging, dus een ongewijzigde beslissing schrijft geen nieuwe status.
+    """
+
+    _attr_icon = "mdi:thermometer-check"
+    _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+    _field = "target_temperature"
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, zone):
+        super().__init__(hass, entry, scenario_sensor, zone)
+        self._attr_name = f"ClimaCore {zone.name} Doeltemperatuur"
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        if not (coordinator := self._coordinator):
+            return {}
+        decision = coordinator.zone_decisions.get(self._zone_key, {})
+        return {key: decision.get(key) for key in ("hvac_mode", "reason", "source", "changed_at", "error")}
+
+
+class ClimaCorePresenceSensor(WriteOnChangeMixin, SensorEntity):
+    """De bevestigde (gedebouncede) aanwezigheid van één persoon, zoals ClimaCore die gebruikt."""
+
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, scenario_sensor: ClimaCoreScenarioSensor, person: str):
+        self.hass = hass
+        self._entry = entry
+        self._person = person
+        state = hass.states.get(person)
+        self._attr_name = f"ClimaCore Aanwezigheid {state.name if state else person.split('.', 1)[-1]}"
+        self._attr_unique_id = f"{entry.entry_id}_presence_{person}"
+        self._attr_device_info = scenario_sensor.device_info
+
+    @property
+    def _coordinator(self):
+        return self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+
+    @property
+    def native_value(self):
+        if coordinator := self._coordinator:
+            return coordinator.presence.states().get(self._person)
+        return None
+
+    @property
+    def icon(self) -> str:
+        return "mdi:home-account" if self.native_value == "home" else "mdi:account-arrow-right"
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        if not (coordinator := self._coordinator):
+            return {}
+        return {"person": self._person, **coordinator.presence.person_as_dict(self._person)}
 
     async def async_added_to_hass(self) -> None:
         """Wordt aangeroepen wanneer de sensor aan HA wordt toegevoegd."""
         await super().async_added_to_hass()
-        # Luister ook naar dezelfde event
         self.async_on_remove(
-            self.hass.bus.async_listen(
-                "climacore_scenario_update", self._async_handle_event
+            async_dispatcher_connect(
+                self.hass, SIGNAL_PRESENCE_UPDATE.format(self._entry.entry_id), self.async_write_if_changed
             )
         )
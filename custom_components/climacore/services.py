@@ -0,0 +1,249 @@
+"""Services voor ClimaCore: de volledige configuratie in één keer exporteren en importeren.
+
+Een huis inrichten via de options flow kost tientallen formulieren, en elke
+submit schrijft de config entry weg en bouwt alle listeners opnieuw op. Met
+`import_config` gaat een heel configuratie-document (YAML of JSON) in één keer
+door dezelfde schema's als de options flow, en wordt het als één options-update
+toegepast: één keer wegschrijven, één keer listeners opbouwen.
+
+Het document is wat `export_config` teruggeeft: `{"options": {...}}`, of direct
+de opties. Oude documenten met zone-slots (`zone_1` ..) worden eerst gemigreerd.
+
+Beide services zijn alleen voor beheerders. Bestanden staan altijd in de map
+`climacore/` van de config-map (alleen .yaml/.json), en een export overschrijft
+alleen bestanden die zelf een ClimaCore-export zijn.
+"""
+import json
+import logging
+import os
+from typing import Any, Mapping
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, Unauthorized, UnknownUser
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import yaml as yaml_util
+
+from .const import DOMAIN, CONF_ZONES, CONF_ZONE_ID, SETPOINT_GROUPS, OBSOLETE_OPTIONS
+from .config_flow import (
+    _get_general_schema, _get_entities_schema, _get_persons_schema, _get_fallback_schema,
+    _get_zone_schema_generic, _get_setpoints_schema,
+)
+from .snapshot import migrate_zone_slots
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_EXPORT_CONFIG = "export_config"
+SERVICE_IMPORT_CONFIG = "import_config"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_CONFIG = "config"
+ATTR_FILENAME = "filename"
+ATTR_MODE = "mode"
+
+# Submap van de config-map voor export/import, en de toegestane bestandstypes
+FILES_SUBDIR = DOMAIN
+FILE_EXTENSIONS = (".yaml", ".json")
+# Markering in elke export: alleen zulke bestanden mogen overschreven worden
+EXPORT_MARKER = "generator"
+
+MODE_MERGE = "merge"
+MODE_REPLACE = "replace"
+
+EXPORT_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_FILENAME): cv.string,
+})
+IMPORT_SCHEMA = vol.Schema(vol.All(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Exclusive(ATTR_CONFIG, "source"): dict,
+        vol.Exclusive(ATTR_FILENAME, "source"): cv.string,
+        vol.Optional(ATTR_MODE, default=MODE_MERGE): vol.In([MODE_MERGE, MODE_REPLACE]),
+    },
+    cv.has_at_least_one_key(ATTR_CONFIG, ATTR_FILENAME),
+))
+
+
+class ConfigDocumentError(HomeAssistantError):
+    """Het configuratie-document klopt niet; `errors` bevat alle gevonden fouten."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("Ongeldige ClimaCore configuratie: " + "; ".join(errors))
+        self.errors = errors
+
+
+def _section_schemas(options: Mapping[str, Any]) -> list[vol.Schema]:
+    """De schema's van de options flow, met de defaults uit `options`."""
+    return [
+        _get_general_schema(options),
+        _get_entities_schema(options),
+        _get_persons_schema(options),
+        _get_fallback_schema(options),
+        *(_get_setpoints_schema(options, group) for group in SETPOINT_GROUPS),
+    ]
+
+
+def validate_config_document(document: Mapping[str, Any], current: Mapping[str, Any], mode: str = MODE_MERGE) -> dict:
+    """Valideer een configuratie-document en geef de nieuwe opties terug.
+
+    merge: het document overschrijft alleen de sleutels die erin staan (`zones` als geheel).
+    replace: het document is de volledige configuratie; de rest krijgt de standaardwaarde.
+    """
+    document = {key: value for key, value in document.get("options", document).items() if key not in OBSOLETE_OPTIONS}
+    if any(key.startswith("zone_") for key in document):
+        document = migrate_zone_slots(document)
+
+    merged = {**current, **document} if mode == MODE_MERGE else document
+    errors: list[str] = []
+    options: dict = dict(current) if mode == MODE_MERGE else {}
+    known = {CONF_ZONES}
+
+    for schema in _section_schemas(merged):
+        keys = {str(key) for key in schema.schema}
+        known |= keys
+        try:
+            options.update(schema({key: merged[key] for key in keys if key in merged}))
+        except vol.MultipleInvalid as e:
+            errors.extend(f"{'.'.join(map(str, error.path))}: {error.msg}" for error in e.errors)
+
+    zones = []
+    seen_ids = set()
+    for index, zone in enumerate(merged.get(CONF_ZONES) or [], start=1):
+        zone = dict(zone)
+        zone_id = zone.pop(CONF_ZONE_ID, None) or f"zone_{index}"
+        if zone_id in seen_ids:
+            errors.append(f"zones[{index}]: dubbele id '{zone_id}'")
+            continue
+        seen_ids.add(zone_id)
+        try:
+            zones.append({CONF_ZONE_ID: zone_id, **_get_zone_schema_generic(zone)(zone)})
+        except vol.MultipleInvalid as e:
+            errors.extend(f"zones[{index}].{'.'.join(map(str, error.path))}: {error.msg}" for error in e.errors)
+    options[CONF_ZONES] = zones
+
+    if unknown := sorted(set(document) - known):
+        errors.append(f"onbekende sleutels: {', '.join(unknown)}")
+    if errors:
+        raise ConfigDocumentError(errors)
+    return options
+
+
+def _resolve_entry(hass: HomeAssistant, call: ServiceCall) -> ConfigEntry:
+    entries = hass.config_entries.async_entries(DOMAIN)
+    if entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID):
+        entries = [entry for entry in entries if entry.entry_id == entry_id]
+    if len(entries) != 1:
+        raise HomeAssistantError(
+            "Geef een geldige config_entry_id op (er is meer dan één, of geen, ClimaCore huis)."
+        )
+    return entries[0]
+
+
+def _resolve_path(hass: HomeAssistant, filename: str) -> str:
+    """Een .yaml/.json bestand in de map `climacore/` van de config-map; al het andere wordt geweigerd.
+
+    `filename` is relatief aan de config-map (`climacore/woning.yaml`); een naam
+    zonder map (`woning.yaml`) komt ook in `climacore/` terecht.
+    """
+    files_dir = os.path.realpath(hass.config.path(FILES_SUBDIR))
+    if os.path.dirname(os.path.normpath(filename)) in ("", "."):
+        filename = os.path.join(FILES_SUBDIR, filename)
+    path = os.path.realpath(os.path.join(hass.config.path(), filename))
+    if os.path.commonpath([files_dir, path]) != files_dir or path == files_dir:
+        raise HomeAssistantError(f"Bestand moet in de map '{FILES_SUBDIR}/' van de config-map staan: {filename}")
+    if not path.endswith(FILE_EXTENSIONS):
+        raise HomeAssistantError(f"Alleen {' of '.join(FILE_EXTENSIONS)} bestanden zijn toegestaan: {filename}")
+    return path
+
+
+def _read_document(path: str) -> dict:
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    return yaml_util.load_yaml(path)
+
+
+def _write_document(path: str, document: dict) -> None:
+    if os.path.exists(path):
+        # Nooit een bestand overschrijven dat ClimaCore niet zelf heeft geschreven
+        try:
+            existing = _read_document(path)
+        except (OSError, ValueError, HomeAssistantError):
+            existing = None
+        if not isinstance(existing, Mapping) or existing.get(EXPORT_MARKER) != DOMAIN:
+            raise HomeAssistantError(f"{os.path.basename(path)} bestaat al en is geen ClimaCore export; niet overschreven.")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    content = json.dumps(document, indent=2, ensure_ascii=False) if path.endswith(".json") else yaml_util.dump(document)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def _to_plain(value: Any) -> Any:
+    """MappingProxy/tuples uit de config entry naar gewone dicts en lijsten (voor YAML/JSON)."""
+    if isinstance(value, Mapping):
+        return {key: _to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+async def async_export_config(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    entry = _resolve_entry(hass, call)
+    document = {EXPORT_MARKER: DOMAIN, "version": entry.version, "title": entry.title, "options": _to_plain(entry.options)}
+    if filename := call.data.get(ATTR_FILENAME):
+        await hass.async_add_executor_job(_write_document, _resolve_path(hass, filename), document)
+        _LOGGER.info(f"ClimaCore configuratie van '{entry.title}' geëxporteerd naar {filename}.")
+    return document
+
+
+async def async_import_config(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    entry = _resolve_entry(hass, call)
+    if filename := call.data.get(ATTR_FILENAME):
+        try:
+            document = await hass.async_add_executor_job(_read_document, _resolve_path(hass, filename))
+        except (OSError, ValueError, HomeAssistantError) as e:
+            raise HomeAssistantError(f"Kon {filename} niet lezen: {e}") from e
+    else:
+        document = call.data[ATTR_CONFIG]
+    if not isinstance(document, Mapping):
+        raise ConfigDocumentError(["het document is geen mapping"])
+
+    options = validate_config_document(document, entry.options, call.data[ATTR_MODE])
+    # Eén update: één keer wegschrijven en één keer de listeners opnieuw opbouwen
+    hass.config_entries.async_update_entry(entry, options=options)
+    _LOGGER.info(f"ClimaCore configuratie geïmporteerd voor '{entry.title}' ({len(options[CONF_ZONES])} zones).")
+    return {"zones": len(options[CONF_ZONES]), "options": len(options)}
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    """Registreer de services (één keer, gedeeld door alle huizen)."""
+    if hass.services.has_service(DOMAIN, SERVICE_IMPORT_CONFIG):
+        return
+
+    def _admin_only(handler):
+        async def _handle(call: ServiceCall) -> ServiceResponse:
+            # Zelf controleren: de admin-helper van HA 2024.1 kan geen antwoord teruggeven
+            if call.context.user_id:
+                user = await hass.auth.async_get_user(call.context.user_id)
+                if user is None:
+                    raise UnknownUser(context=call.context, user_id=call.context.user_id)
+                if not user.is_admin:
+                    raise Unauthorized(context=call.context)
+            return await handler(hass, call)
+        return _handle
+
+    for service, handler, schema in (
+        (SERVICE_EXPORT_CONFIG, async_export_config, EXPORT_SCHEMA),
+        (SERVICE_IMPORT_CONFIG, async_import_config, IMPORT_SCHEMA),
+    ):
+        hass.services.async_register(
+            DOMAIN, service, _admin_only(handler), schema=schema, supports_response=SupportsResponse.OPTIONAL
+        )
+
+
+def async_unregister_services(hass: HomeAssistant) -> None:
+    hass.services.async_remove(DOMAIN, SERVICE_EXPORT_CONFIG)
+    hass.services.async_remove(DOMAIN, SERVICE_IMPORT_CONFIG)
@@ -0,0 +1,224 @@
+"""Voorgecompileerde, onveranderlijke weergave van de ClimaCore opties.
+
+De coordinator bouwt deze snapshot één keer per (gewijzigde) configuratie.
+Het hete pad (triggers, payload, proactieve start) leest daarna alleen nog
+O(1) lookups in plaats van alle zone-slots en opties opnieuw te scannen.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import time
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping
+
+from .const import (
+    CONF_ZONES, CONF_ZONE_ID, LEGACY_ZONE_SLOTS,
+    DEFAULT_WINDOW_DEBOUNCE, SETPOINT_SCENARIOS, BACKEND_CONCURRENCY, DEFAULT_BACKEND_CONCURRENCY,
+    ROLE_PERSON, ROLE_WEATHER, ROLE_GUESTS, ROLE_EN_ROUTE,
+    ROLE_PRESENCE, ROLE_WIFI, ROLE_WINDOW, ROLE_CLIMATE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def iter_zone_options(options: Mapping[str, Any]) -> Iterator[tuple[str, dict]]:
+    """Geef (zone id, zone_config) voor elke geconfigureerde zone, in volgorde."""
+    for zone_config in options.get(CONF_ZONES) or ():
+        yield zone_config[CONF_ZONE_ID], zone_config
+
+
+def migrate_zone_slots(options: Mapping[str, Any]) -> dict:
+    """Zet de oude slots (zone_1 .. zone_10) om naar de zone-lijst.
+
+    De slotnaam wordt de vaste id, zodat entiteiten, geleerde modellen en
+    boost-vensters (allemaal op zone key) na de migratie gewoon doorlopen.
+    """
+    migrated = {key: value for key, value in options.items() if key not in {f"zone_{i}" for i in LEGACY_ZONE_SLOTS}}
+    zones = list(migrated.get(CONF_ZONES) or [])
+    for i in LEGACY_ZONE_SLOTS:
+        if zone_config := options.get(f"zone_{i}"):
+            zones.append({CONF_ZONE_ID: f"zone_{i}", **zone_config})
+    migrated[CONF_ZONES] = zones
+    return migrated
+
+
+def _parse_time(value: Any, default: str) -> time:
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        _LOGGER.warning(f"Ongeldige tijd '{value}' in configuratie, gebruik {default}.")
+        return time.fromisoformat(default)
+
+
+@dataclass(frozen=True)
+class ZoneSnapshot:
+    """Eén zone, met voorgeparste tijden."""
+
+    key: str
+    name: str
+    climate_entities: tuple[str, ...]
+    window_sensors: tuple[str, ...]
+    lookup_prefix: str
+    day_start: str
+    night_start: str
+    day_start_time: time
+    night_start_time: time
+    window_debounce: float
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Alle opties die de coordinator op het hete pad nodig heeft."""
+
+    zones: tuple[ZoneSnapshot, ...]
+    # entity_id -> rol (ROLE_*), zone en lookup_prefix
+    entity_roles: Mapping[str, str]
+    entity_zones: Mapping[str, ZoneSnapshot]
+    # raamsensor -> debounce (seconden)
+    window_debounce: Mapping[str, float]
+    zones_by_name: Mapping[str, ZoneSnapshot]
+    zones_by_prefix: Mapping[str, ZoneSnapshot]
+    # De 'config' sectie van de payload (temp_* en fallback_temp)
+    config_data: Mapping[str, Any]
+    # lookup_prefix -> scenario -> setpoint
+    setpoints: Mapping[str, Mapping[str, float]]
+    fallback_temp: float
+    person_entities: tuple[str, ...]
+    presence_sensors: tuple[str, ...]
+    wifi_sensors: tuple[str, ...]
+    home_wifi_ssid: str | None
+    weather_entity: str | None
+    gasten_entity: str | None
+    onderweg_entity: str | None
+    systeem_keuze: str
+    # Maximaal aantal parallelle service-calls voor de gekozen backend
+    max_parallel_calls: int
+    minutes_per_degree: float
+    # Gesorteerde tijdstippen waarop de Gateway anders kan beslissen (zie fingerprint.py)
+    schedule_boundaries: tuple[time, ...]
+    # Entiteiten waarvan een statuswijziging de hoofdlogica direct triggert
+    main_triggers: tuple[str, ...]
+
+    @property
+    def window_sensors(self) -> tuple[str, ...]:
+        return tuple(self.window_debounce)
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> ConfigSnapshot:
+        """Compileer de opties tot een snapshot."""
+        zones = []
+        for index, (zone_key, zone_config) in enumerate(iter_zone_options(options), start=1):
+            if not zone_config.get("climate_entities"):
+                continue
+            name = zone_config.get("zone_name") or f"Zone {index}"
+            day_start = zone_config.get("day_start", "06:00:00")
+            night_start = zone_config.get("night_start", "22:00:00")
+            zones.append(ZoneSnapshot(
+                key=zone_key,
+                name=name,
+                climate_entities=tuple(zone_config["climate_entities"]),
+                window_sensors=tuple(zone_config.get("window_sensors", [])),
+                lookup_prefix=zone_config.get("lookup_prefix", "woonkamer"),
+                day_start=day_start,
+                night_start=night_start,
+                day_start_time=_parse_time(day_start, "06:00:00"),
+                night_start_time=_parse_time(night_start, "22:00:00"),
+                window_debounce=zone_config.get("window_debounce", DEFAULT_WINDOW_DEBOUNCE),
+            ))
+
+        # Raamsensoren tellen ook mee als ze in een zone zonder thermostaat staan
+        window_debounce: dict[str, float] = {}
+        for zone_key, zone_config in iter_zone_options(options):
+            for sensor in zone_config.get("window_sensors", []):
+                window_debounce.setdefault(sensor, zone_config.get("window_debounce", DEFAULT_WINDOW_DEBOUNCE))
+
+        person_entities = tuple(options.get("person_entities", []))
+        presence_sensors = tuple(options.get("presence_sensors", []))
+        wifi_sensors = tuple(options.get("wifi_tracker_sensors", []))
+        weather_entity = options.get("weather_entity")
+        gasten_entity = options.get("gasten_entity")
+        onderweg_entity = options.get("onderweg_entity")
+
+        entity_roles: dict[str, str] = {}
+        entity_zones: dict[str, ZoneSnapshot] = {}
+        for zone in zones:
+            for entity_id in zone.climate_entities:
+                entity_roles.setdefault(entity_id, ROLE_CLIMATE)
+                entity_zones.setdefault(entity_id, zone)
+            for entity_id in zone.window_sensors:
+                entity_zones.setdefault(entity_id, zone)
+        for entity_id in window_debounce:
+            entity_roles[entity_id] = ROLE_WINDOW
+        for entity_id in wifi_sensors:
+            entity_roles[entity_id] = ROLE_WIFI
+        for entity_id in presence_sensors:
+            entity_roles[entity_id] = ROLE_PRESENCE
+        if onderweg_entity:
+            entity_roles[onderweg_entity] = ROLE_EN_ROUTE
+        if gasten_entity:
+            entity_roles[gasten_entity] = ROLE_GUESTS
+        if weather_entity:
+            entity_roles[weather_entity] = ROLE_WEATHER
+        for entity_id in person_entities:
+            entity_roles[entity_id] = ROLE_PERSON
+
+        main_triggers = [*person_entities]
+        if weather_entity: main_triggers.append(weather_entity)
+        if gasten_entity: main_triggers.append(gasten_entity)
+        if onderweg_entity: main_triggers.append(onderweg_entity)
+        main_triggers.extend(presence_sensors)
+        main_triggers.extend(wifi_sensors)
+
+        config_data = {key: value for key, value in options.items() if key.startswith("temp_")}
+        fallback_temp = options.get("fallback_temp", 18.0)
+        config_data["fallback_temp"] = fallback_temp
+
+        setpoints: dict[str, dict[str, float]] = {}
+        for key, value in config_data.items():
+            for scenario in SETPOINT_SCENARIOS:
+                if key.startswith("temp_") and key.endswith(f"_{scenario}"):
+                    prefix = key[len("temp_"):-len(scenario) - 1]
+                    try:
+                        setpoints.setdefault(prefix, {})[scenario] = float(value)
+                    except (TypeError, ValueError):
+                        pass
+                    break
+
+        boundaries = {_parse_time(options.get("night_start_time", "23:00:00"), "23:00:00")}
+        for zone in zones:
+            boundaries.update((zone.day_start_time, zone.night_start_time))
+
+        systeem_keuze = options.get("systeem_keuze_direct", "Ambisense/MyPyllant")
+        concurrency_key, concurrency_default = BACKEND_CONCURRENCY.get(
+            systeem_keuze, (None, DEFAULT_BACKEND_CONCURRENCY)
+        )
+        max_parallel_calls = int(options.get(concurrency_key, concurrency_default)) if concurrency_key else concurrency_default
+
+        zones_by_prefix: dict[str, ZoneSnapshot] = {}
+        for zone in zones:
+            zones_by_prefix.setdefault(zone.lookup_prefix, zone)
+
+        return cls(
+            zones=tuple(zones),
+            entity_roles=MappingProxyType(entity_roles),
+            entity_zones=MappingProxyType(entity_zones),
+            window_debounce=MappingProxyType(window_debounce),
+            zones_by_name=MappingProxyType({zone.name: zone for zone in zones}),
+            zones_by_prefix=MappingProxyType(zones_by_prefix),
+            config_data=MappingProxyType(config_data),
+            setpoints=MappingProxyType({k: MappingProxyType(v) for k, v in setpoints.items()}),
+            fallback_temp=fallback_temp,
+            person_entities=person_entities,
+            presence_sensors=presence_sensors,
+            wifi_sensors=wifi_sensors,
+            home_wifi_ssid=options.get("home_wifi_ssid"),
+            weather_entity=weather_entity,
+            gasten_entity=gasten_entity,
+            onderweg_entity=onderweg_entity,
+            systeem_keuze=systeem_keuze,
+            max_parallel_calls=max_parallel_calls,
+            minutes_per_degree=options.get("minutes_per_degree", 30),
+            schedule_boundaries=tuple(sorted(boundaries)),
+            main_triggers=tuple(dict.fromkeys(main_triggers)),
+        )
@@ -0,0 +1,142 @@
+"""Zelflerend thermisch model: de echte opwarmsnelheid per zone.
+
+Het model leert uit de `current_temperature` van de thermostaat, telkens als het
+setpoint boven de kamertemperatuur ligt (de zone is aan het opwarmen). Elke
+gemeten stijging levert één sample op: (buitentemperatuur, °C per minuut).
+Daarop fitten we incrementeel een rechte lijn, zodat de opwarmsnelheid bij
+vriesweer anders mag zijn dan bij zacht weer.
+
+Geheugen is begrensd (vaste ring buffers op `array('d')`) en een update is O(1).
+"""
+from array import array
+
+from .const import (
+    THERMAL_WINDOW, THERMAL_MIN_SAMPLES, THERMAL_MIN_GAP,
+    THERMAL_MAX_INTERVAL_MINUTES, THERMAL_MAX_RATE,
+    MIN_MINUTES_PER_DEGREE, MAX_MINUTES_PER_DEGREE,
+)
+
+
+class RingBuffer:
+    """Ring buffer van floats met een vaste capaciteit."""
+
+    __slots__ = ("_data", "_capacity", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        self._data = array("d", [0.0]) * capacity
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value: float) -> float | None:
+        """Voeg een waarde toe; geeft de verdrongen (oudste) waarde terug als de buffer vol was."""
+        if self._size < self._capacity:
+            self._data[(self._start + self._size) % self._capacity] = value
+            self._size += 1
+            return None
+        evicted = self._data[self._start]
+        self._data[self._start] = value
+        self._start = (self._start + 1) % self._capacity
+        return evicted
+
+    def to_list(self) -> list[float]:
+        return [self._data[(self._start + i) % self._capacity] for i in range(self._size)]
+
+
+class ZoneThermalModel:
+    """Opwarmsnelheid van één zone, als lineaire functie van de buitentemperatuur.
+
+    rate(T_buiten) = a + b * T_buiten   [°C per minuut]
+
+    De sommen voor de kleinste-kwadraten fit worden bij elke sample bijgewerkt
+    (en de verdrongen sample wordt er weer afgetrokken), dus er is nooit een
+    volledige herberekening nodig.
+    """
+
+    def __init__(self, capacity: int = THERMAL_WINDOW):
+        self._outdoor = RingBuffer(capacity)
+        self._rate = RingBuffer(capacity)
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        # Ankerpunt van de huidige opwarm-episode: (tijd in minuten, kamertemperatuur)
+        self._anchor: tuple[float, float] | None = None
+
+    @property
+    def samples(self) -> int:
+        return len(self._rate)
+
+    def add_sample(self, outdoor_temp: float, rate: float) -> None:
+        evicted_x = self._outdoor.append(outdoor_temp)
+        evicted_y = self._rate.append(rate)
+        self._sx += outdoor_temp
+        self._sy += rate
+        self._sxx += outdoor_temp * outdoor_temp
+        self._sxy += outdoor_temp * rate
+        if evicted_x is not None:
+            self._sx -= evicted_x
+            self._sy -= evicted_y
+            self._sxx -= evicted_x * evicted_x
+            self._sxy -= evicted_x * evicted_y
+
+    def observe(self, minutes: float, current_temp: float, setpoint: float, outdoor_temp: float) -> bool:
+        """Verwerk een nieuwe meting van de thermostaat. Geeft True als er een sample is bijgekomen."""
+        if setpoint - current_temp < THERMAL_MIN_GAP:
+            # Niet (meer) aan het opwarmen: episode afsluiten
+            self._anchor = None
+            return False
+
+        if self._anchor is None:
+            self._anchor = (minutes, current_temp)
+            return False
+
+        anchor_minutes, anchor_temp = self._anchor
+        elapsed = minutes - anchor_minutes
+        if elapsed <= 0:
+            return False
+        if elapsed > THERMAL_MAX_INTERVAL_MINUTES or current_temp < anchor_temp:
+            # Te lang geen meting, of de kamer koelt af ondanks de vraag (raam open?): opnieuw beginnen
+            self._anchor = (minutes, current_temp)
+            return False
+        if current_temp == anchor_temp:
+            return False
+
+        self._anchor = (minutes, current_temp)
+        rate = (current_temp - anchor_temp) / elapsed
+        if rate > THERMAL_MAX_RATE:
+            return False
+        self.add_sample(outdoor_temp, rate)
+        return True
+
+    def rate_at(self, outdoor_temp: float) -> float | None:
+        """Verwachte opwarmsnelheid (°C/min) bij deze buitentemperatuur, of None als er te weinig data is."""
+        n = len(self._rate)
+        if n < THERMAL_MIN_SAMPLES:
+            return None
+        denominator = n * self._sxx - self._sx * self._sx
+        if abs(denominator) < 1e-9:
+            # Alle samples bij (bijna) dezelfde buitentemperatuur: gebruik het gemiddelde
+            slope = 0.0
+        else:
+            slope = (n * self._sxy - self._sx * self._sy) / denominator
+        intercept = (self._sy - slope * self._sx) / n
+        rate = intercept + slope * outdoor_temp
+        return rate if rate > 0 else None
+
+    def minutes_per_degree(self, outdoor_temp: float) -> float | None:
+        """Geleerde 'minuten per graad' (begrensd op het bereik van de slider), of None."""
+        rate = self.rate_at(outdoor_temp)
+        if rate is None:
+            return None
+        return round(min(MAX_MINUTES_PER_DEGREE, max(MIN_MINUTES_PER_DEGREE, 1.0 / rate)), 1)
+
+    def as_dict(self) -> dict:
+        return {"outdoor": self._outdoor.to_list(), "rate": self._rate.to_list()}
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity: int = THERMAL_WINDOW) -> "ZoneThermalModel":
+        model = cls(capacity)
+        for outdoor_temp, rate in zip(data.get("outdoor", []), data.get("rate", [])):
+            model.add_sample(float(outdoor_temp), float(rate))
+        return model
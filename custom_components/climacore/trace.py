@@ -0,0 +1,102 @@
+"""Instrumentatie van het hete pad: timings per stap en een ring buffer van beslis-traces.
+
+Elke run van de hoofdlogica levert één `DecisionTrace` op, met de duur van
+elke stap (payload opbouwen, Gateway round-trip, acties per zone), de payload,
+het antwoord en de uitgevoerde acties. De laatste N traces blijven in een
+`deque` met vaste lengte en zijn te downloaden via de diagnose van de integratie.
+"""
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator
+
+import homeassistant.util.dt as dt_util
+
+from .const import TRACE_BUFFER_SIZE
+
+STAGE_PAYLOAD = "payload_build"
+STAGE_GATEWAY = "gateway"
+STAGE_ACTIONS = "actions"
+
+
+class DecisionTrace:
+    """Eén run van de hoofdlogica."""
+
+    __slots__ = (
+        "started", "trigger_entity_ids", "timings", "zone_timings",
+        "outcome", "payload", "response", "guard_skipped", "error",
+    )
+
+    def __init__(self, trigger_entity_ids: list[str]):
+        self.started = dt_util.utcnow()
+        self.trigger_entity_ids = list(trigger_entity_ids)
+        # stap -> duur in ms
+        self.timings: dict[str, float] = {}
+        # zone -> duur van de acties in ms
+        self.zone_timings: dict[str, float] = {}
+        # 'cloud', 'local', 'skipped' of 'error'; None zolang de run loopt
+        self.outcome: str | None = None
+        self.payload: dict | None = None
+        self.response: dict | None = None
+        self.guard_skipped = 0
+        self.error: str | None = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Meet de duur van een stap; ook als die met een exceptie eindigt."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((perf_counter() - start) * 1000, 2)
+
+    def as_dict(self) -> dict:
+        return {
+            "started": self.started.isoformat(),
+            "trigger_entity_ids": self.trigger_entity_ids,
+            "outcome": self.outcome,
+            "timings_ms": self.timings,
+            "zone_timings_ms": self.zone_timings,
+            "guard_skipped": self.guard_skipped,
+            "error": self.error,
+            "payload": self.payload,
+            "response": self.response,
+        }
+
+
+class TraceBuffer:
+    """De laatste N traces (oudste valt eruit)."""
+
+    def __init__(self, maxlen: int = TRACE_BUFFER_SIZE):
+        self._traces: deque[DecisionTrace] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def start(self, trigger_entity_ids: list[str]) -> DecisionTrace:
+        trace = DecisionTrace(trigger_entity_ids)
+        self._traces.append(trace)
+        return trace
+
+    def last_timing(self, stage: str) -> float | None:
+        """De meest recente duur van een stap (ms), of None als die nog niet gemeten is."""
+        for trace in reversed(self._traces):
+            if stage in trace.timings:
+                return trace.timings[stage]
+        return None
+
+    def timing_stats(self, stage: str) -> dict:
+        """Gemiddelde en maximum van een stap over de traces in de buffer."""
+        values = [trace.timings[stage] for trace in self._traces if stage in trace.timings]
+        if not values:
+            return {}
+        return {"samples": len(values), "avg_ms": round(sum(values) / len(values), 2), "max_ms": max(values)}
+
+    def last_zone_timings(self) -> dict[str, float]:
+        for trace in reversed(self._traces):
+            if trace.zone_timings:
+                return trace.zone_timings
+        return {}
+
+    def as_list(self) -> list[dict]:
+        return [trace.as_dict() for trace in self._traces]